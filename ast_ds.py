@@ -0,0 +1,107 @@
+class Node(object):
+    """
+    Base of the syntax tree nodes built by the parser, every node stores its
+    children in the slots listed at __slots__
+
+    A statement sequence is a plain list of statement nodes
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return self.__class__.__name__ + "(" + ", ".join(
+            repr(getattr(self, i)) for i in self.__slots__) + ")"
+
+
+class If(Node):
+    """
+    if <test> then <then_part> [else <else_part>] end
+
+    ### Attributes
+    - test : the condition expression
+    - then_part : list of statements
+    - else_part : list of statements, None when there is no else
+    """
+    __slots__ = ("test", "then_part", "else_part")
+
+    def __init__(self, test, then_part, else_part=None):
+        self.test = test
+        self.then_part = then_part
+        self.else_part = else_part
+
+
+class Repeat(Node):
+    """
+    repeat <body> until <test>
+
+    ### Attributes
+    - body : list of statements
+    - test : the exit condition expression
+    """
+    __slots__ = ("body", "test")
+
+    def __init__(self, body, test):
+        self.body = body
+        self.test = test
+
+
+class Assign(Node):
+    """
+    <name> := <expr>
+    """
+    __slots__ = ("name", "expr")
+
+    def __init__(self, name, expr):
+        self.name = name
+        self.expr = expr
+
+
+class Read(Node):
+    """
+    read <name>
+    """
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Write(Node):
+    """
+    write <expr>
+    """
+    __slots__ = ("expr",)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+
+class Op(Node):
+    """
+    <left> <op> <right>, op is one of + - * / < =
+    """
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+
+class Const(Node):
+    """
+    A number literal, value keeps the literal text
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Id(Node):
+    """
+    An identifier used inside an expression
+    """
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
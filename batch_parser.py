@@ -0,0 +1,159 @@
+"""
+Batch entry point : parses every TINY program matched by the given directories / globs
+with a fresh parser per file, spread over a process pool, then prints a summary
+
+    python batch_parser.py programs/ "generated/*.txt" --no-render --jobs 8 --json summary.json
+
+With --recover every scanner and syntax error of a file is listed in one run,
+--export json [or dot, sexp] writes each tree as text, without graphviz when used with --no-render,
+--metrics metrics.prom [or .json] writes the time per stage and the counts summed over the files
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics_class import ParseMetrics
+from parse_cache import ParseCache
+from parser_class import Parser
+from tree_export import FORMATS
+
+
+def collect_files(patterns):
+    """
+    Expands directories (all their .txt files) and glob patterns into a sorted file list
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(glob.glob(os.path.join(pattern, "*.txt")))
+        else:
+            files.extend(glob.glob(pattern))
+    return sorted(set(files))
+
+
+def parse_file(in_file_dir, out_dir=None, render=True, trace=False, cache_dir=None, recover=False,
+               tree_format=None, metrics=False):
+    """
+    Parses one file with its own Parser, the outputs are named after the input file
+    and stored at out_dir [next to the input by default]. tree_format is one of
+    tree_export.FORMATS to also write the tree as text, metrics measures the parse
+    with a ParseMetrics
+
+    ### Returns
+    a summary dict : file, ok, error, tokens, seconds, tokens_per_sec, cached, diagnostics
+    [a list of Diagnostic dicts, empty unless recovering], metrics [ParseMetrics.to_dict(),
+    None unless measured]
+    """
+    stem = os.path.splitext(os.path.basename(in_file_dir))[0]
+    out_dir = out_dir or os.path.dirname(in_file_dir)
+    parser = Parser()
+    file_metrics = ParseMetrics() if metrics else None
+    error = None
+    start = time.perf_counter()
+    try:
+        # the per file "executed successfully" messages are of no use here
+        with contextlib.redirect_stdout(io.StringIO()):
+            tree = parser.parse(in_file_dir,
+                                out_file_dir=os.path.join(out_dir, stem + "_parser_output.txt"),
+                                out_image_dir=os.path.join(out_dir, stem + "_syntax_tree.png"),
+                                render=render, trace="stream" if trace else None,
+                                cache=ParseCache(cache_dir) if cache_dir else None, recover=recover,
+                                export=os.path.join(out_dir, stem + "_syntax_tree." + tree_format)
+                                if tree_format else None, metrics=file_metrics)
+        if tree is None:
+            error = "Scanner error at line " + str(parser.scanner.error_line)
+        elif parser.diagnostics:
+            error = str(len(parser.diagnostics)) + " errors"
+    except Exception as err:
+        error = err.__class__.__name__ + ": " + str(err)
+    seconds = time.perf_counter() - start
+    tokens = parser.num_tokens if parser.num_tokens is not None else parser.next_token
+    return {
+        "file": in_file_dir,
+        "ok": error is None,
+        "error": error,
+        "tokens": tokens,
+        "seconds": seconds,
+        "tokens_per_sec": tokens / seconds if seconds > 0 else 0.0,
+        "cached": parser.from_cache,
+        "diagnostics": [i.to_dict() for i in parser.diagnostics],
+        "metrics": file_metrics.to_dict() if file_metrics is not None else None,
+    }
+
+
+def run_batch(files, jobs=None, out_dir=None, render=True, trace=False, cache_dir=None,
+              recover=False, tree_format=None, metrics=False):
+    """
+    Parses all the files over a process pool, returns their summaries in the files order
+    """
+    if not files:
+        return []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(parse_file, i, out_dir, render, trace, cache_dir, recover, tree_format,
+                               metrics)
+                   for i in files]
+        return [i.result() for i in futures]
+
+
+def main(argv=None):
+    """
+    Command line interface, exits with 1 if any file failed
+    """
+    arg_parser = argparse.ArgumentParser(description="Parse many TINY programs at once")
+    arg_parser.add_argument("paths", nargs="+", help="directories or glob patterns of .txt programs")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=None,
+                            help="number of worker processes [cpu count by default]")
+    arg_parser.add_argument("-o", "--out-dir", default=None,
+                            help="where to store the outputs [next to each input by default]")
+    arg_parser.add_argument("--no-render", action="store_true", help="skip the syntax tree images")
+    arg_parser.add_argument("--trace", action="store_true", help="write the parser text output")
+    arg_parser.add_argument("--cache-dir", default=None,
+                            help="reuse the results of unchanged files from this trusted parse cache")
+    arg_parser.add_argument("--export", default=None, choices=sorted(FORMATS),
+                            help="also write each syntax tree as text in this format")
+    arg_parser.add_argument("--recover", action="store_true",
+                            help="report every error of a file instead of stopping at the first one")
+    arg_parser.add_argument("--metrics", default=None,
+                            help="write the time per stage and the counts to this file, "
+                                 "Prometheus text for a .prom file, JSON otherwise")
+    arg_parser.add_argument("--json", default=None, help="also write the summary to this file")
+    args = arg_parser.parse_args(argv)
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    files = collect_files(args.paths)
+    results = run_batch(files, args.jobs, args.out_dir, not args.no_render, args.trace,
+                        args.cache_dir, args.recover, args.export, args.metrics is not None)
+    failed = 0
+    for res in results:
+        if res["ok"]:
+            print("PASS %s  %d tokens  %.0f tokens/sec%s" % (res["file"], res["tokens"], res["tokens_per_sec"],
+                                                           "  [cached]" if res["cached"] else ""))
+        else:
+            failed += 1
+            print("FAIL %s  %s" % (res["file"], res["error"]))
+            for diag in res["diagnostics"]:
+                print("    line %s, column %s : %s [expected %s, found %r]" % (
+                    diag["line"], diag["column"], diag["message"], diag["expected"], diag["found"]))
+    print("%d files, %d passed, %d failed" % (len(results), len(results) - failed, failed))
+    if args.json:
+        with open(args.json, 'w') as out_file:
+            json.dump(results, out_file, indent=2)
+    if args.metrics:
+        total = ParseMetrics()
+        for res in results:
+            if res["metrics"] is not None:
+                total.merge(res["metrics"])
+        with open(args.metrics, 'w') as out_file:
+            out_file.write(total.to_prometheus() if args.metrics.endswith(".prom") else total.to_json() + "\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
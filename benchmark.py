@@ -0,0 +1,177 @@
+"""
+Benchmarks the scanner, the parser and the syntax tree drawing separately over
+generated TINY programs, the results are written as JSON to compare runs
+
+    python benchmark.py --statements 50000 --depth 4 --out bench.json --compare old_bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from parser_class import Parser
+from scanner_class import Scanner
+from tiny_generator import TinyGenerator
+
+
+def peak_rss_kb():
+    """
+    Returns the peak resident set size of the process so far, in KB. This is a high-water
+    mark over the whole run, not the memory of one stage
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def measure(func, repeat=3):
+    """
+    Runs func <repeat> times, then once more under tracemalloc
+
+    ### Returns
+    (the result of the last run, a dict with the best wall time, the traced allocations of
+    the stage, the process peak RSS after it and how much the timed runs raised it)
+    """
+    rss_before = peak_rss_kb()
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    rss = peak_rss_kb()
+    gc.collect()
+    tracemalloc.start()
+    func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "seconds": best,
+        "process_peak_rss_kb": rss,
+        "rss_growth_kb": rss - rss_before,
+        "alloc_peak_bytes": peak,
+        "alloc_retained_bytes": current,
+    }
+
+
+def run(in_file_dir, repeat=3, render=True):
+    """
+    Times every stage over in_file_dir
+
+    ### Returns
+    a dict of stage name to its measures, tree_draw is skipped without PyGraphviz or dot
+    """
+    results = {}
+    for engine in Scanner.ENGINES:
+        def scan(engine=engine):
+            scanner = Scanner(engine=engine)
+            if scanner.scan(in_file_dir, write_opt=False) == 0:
+                raise ValueError("The benchmark program does not scan")
+            return scanner.tokens
+        tokens, stats = measure(scan, repeat)
+        results["scan_" + engine] = stats
+    num_tokens = len(tokens)
+
+    def scan_mapped():
+        table = Scanner().scan_mapped(in_file_dir)
+        table.close()
+        return table
+    _, results["scan_mapped"] = measure(scan_mapped, repeat)
+
+    parser = Parser()
+    tree, results["parse"] = measure(lambda: parser.parse_tokens(tokens), repeat)
+
+    if render:
+        from syntaxtree_draw import SyntaxTree
+        image_dir = os.path.join(tempfile.gettempdir(), "benchmark_tree.png")
+
+        def build():
+            graph = SyntaxTree(image_dir)
+            graph.draw(tree)
+            return graph
+        graph, results["tree_build"] = measure(build, repeat)
+        try:
+            # PyGraphviz is only imported here
+            _, results["tree_draw"] = measure(graph.show, 1)
+        except (ImportError, OSError) as err:
+            results["tree_draw"] = {"skipped": str(err)}
+
+    for stats in results.values():
+        if "seconds" in stats:
+            stats["tokens"] = num_tokens
+            stats["tokens_per_sec"] = num_tokens / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    return results
+
+
+def compare(results, old_results):
+    """
+    Prints the time ratio of every stage against a previous run, > 1 means slower
+    """
+    for stage, stats in sorted(results.items()):
+        old = old_results.get(stage, {})
+        if "seconds" in stats and old.get("seconds"):
+            print("%-12s %8.3fs  x%.2f" % (stage, stats["seconds"], stats["seconds"] / old["seconds"]))
+
+
+def main(argv=None):
+    """
+    Command line interface
+    """
+    arg_parser = argparse.ArgumentParser(description="Benchmark the TINY scanner and parser")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--statements", type=int, default=20000)
+    arg_parser.add_argument("--depth", type=int, default=3, help="max if/repeat nesting")
+    arg_parser.add_argument("--expr-length", type=int, default=4, help="max operands per expression")
+    arg_parser.add_argument("--comments", type=float, default=0.1, help="comment probability per statement")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage, the best is kept")
+    arg_parser.add_argument("--no-render", action="store_true", help="skip the syntax tree stages")
+    arg_parser.add_argument("--out", default="bench_output.json", help="where to write the results")
+    arg_parser.add_argument("--compare", default=None, help="a previous results file to compare with")
+    args = arg_parser.parse_args(argv)
+
+    config = {
+        "seed": args.seed,
+        "statements": args.statements,
+        "depth": args.depth,
+        "expr_length": args.expr_length,
+        "comments": args.comments,
+    }
+    fd, in_file_dir = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        size = TinyGenerator(args.seed, args.statements, args.depth, args.expr_length,
+                             args.comments).write(in_file_dir)
+        config["characters"] = size
+        results = run(in_file_dir, args.repeat, not args.no_render)
+    finally:
+        os.remove(in_file_dir)
+
+    report = {
+        "config": config,
+        "env": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+    with open(args.out, 'w') as out_file:
+        json.dump(report, out_file, indent=2, sort_keys=True)
+    for stage, stats in sorted(results.items()):
+        if "seconds" in stats:
+            print("%-12s %8.3fs  %10.0f tokens/sec  %8d KB allocated  %8d KB process peak RSS (+%d)" % (
+                stage, stats["seconds"], stats["tokens_per_sec"], stats["alloc_peak_bytes"] // 1024,
+                stats["process_peak_rss_kb"], stats["rss_growth_kb"]))
+        else:
+            print("%-12s skipped : %s" % (stage, stats["skipped"]))
+    if args.compare:
+        with open(args.compare) as old_file:
+            compare(results, json.load(old_file)["results"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
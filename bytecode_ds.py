@@ -0,0 +1,92 @@
+from array import array
+
+# opcodes, every instruction is 4 words : opcode, then up to 3 operands [unused ones are 0]
+# the operands are slot indexes, but for the jump targets which are instruction indexes
+ADD = 0               # ADD dst left right : slots[dst] = slots[left] + slots[right]
+SUB = 1
+MUL = 2
+DIV = 3               # integer division truncated toward zero, an error on a zero divisor
+LT = 4                # slots[dst] = 1 if slots[left] < slots[right] else 0
+EQ = 5
+MOVE = 6              # MOVE dst src
+JUMP = 7              # JUMP target
+JUMP_UNLESS = 8       # JUMP_UNLESS src target : jumps when slots[src] is 0
+JUMP_UNLESS_LT = 9    # JUMP_UNLESS_LT left right target : jumps unless slots[left] < slots[right]
+JUMP_UNLESS_EQ = 10
+READ = 11             # READ dst : the next input
+WRITE = 12            # WRITE src : outputs slots[src]
+HALT = 13
+OP_NAMES = ("ADD", "SUB", "MUL", "DIV", "LT", "EQ", "MOVE", "JUMP", "JUMP_UNLESS", "JUMP_UNLESS_LT",
+            "JUMP_UNLESS_EQ", "READ", "WRITE", "HALT")
+# the number of operands of every opcode, used to print the code
+OP_ARITY = (3, 3, 3, 3, 3, 3, 2, 1, 2, 3, 3, 1, 1, 0)
+
+# the opcodes of the TINY operators
+BINARY_OPS = {"+": ADD, "-": SUB, "*": MUL, "/": DIV, "<": LT, "=": EQ}
+# the fused compare and branch of the comparisons used as a test
+BRANCH_OPS = {"<": JUMP_UNLESS_LT, "=": JUMP_UNLESS_EQ}
+
+WIDTH = 4
+
+
+class CodeObject(object):
+    """
+    A compiled TINY program (see compiler_class), run by tiny_vm.VM
+
+    The VM works on a single list of slots : the variables first, then the constant pool,
+    then the temporaries holding the partial results of the expressions. An operand is
+    always a slot index, so a constant or a variable is read the same way
+
+    ### Attributes
+    - code : array of the instruction words, WIDTH words per instruction
+    - names : the variable names, the variable names[i] is the slot i
+    - consts : the constant pool, the constant consts[i] is the slot len(names) + i
+    - num_slots : the total number of slots, temporaries included
+    """
+
+    def __init__(self, code, names, consts, num_slots):
+        """
+        constructor
+        """
+        self.code = code if isinstance(code, array) else array('l', code)
+        self.names = list(names)
+        self.consts = list(consts)
+        self.num_slots = num_slots
+
+    def __len__(self):
+        """
+        the number of instructions
+        """
+        return len(self.code) // WIDTH
+
+    def instructions(self):
+        """
+        Returns the instructions as a list of (opcode, a, b, c) tuples
+        """
+        code = self.code.tolist()
+        return [tuple(code[i:i + WIDTH]) for i in range(0, len(code), WIDTH)]
+
+    def slot_name(self, slot):
+        """
+        Returns a readable name of a slot : the variable name, #constant or $temporary
+        """
+        if slot < len(self.names):
+            return self.names[slot]
+        slot -= len(self.names)
+        if slot < len(self.consts):
+            return "#" + str(self.consts[slot])
+        return "$" + str(slot - len(self.consts))
+
+    def disassemble(self):
+        """
+        Returns the code as text, one instruction per line
+        """
+        lines = []
+        for index, (op, a, b, c) in enumerate(self.instructions()):
+            operands = (a, b, c)[:OP_ARITY[op]]
+            if op in (JUMP, JUMP_UNLESS, JUMP_UNLESS_LT, JUMP_UNLESS_EQ):
+                text = [self.slot_name(i) for i in operands[:-1]] + ["-> " + str(operands[-1])]
+            else:
+                text = [self.slot_name(i) for i in operands]
+            lines.append(("%4d  %-15s %s" % (index, OP_NAMES[op], " ".join(text))).rstrip())
+        return "\n".join(lines)
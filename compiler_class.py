@@ -0,0 +1,178 @@
+from array import array
+
+from ast_ds import If, Assign, Read, Write, Op, Const, Id
+from bytecode_ds import CodeObject, BINARY_OPS, BRANCH_OPS, MOVE, JUMP, JUMP_UNLESS, READ, WRITE, HALT, \
+    WIDTH
+
+
+class Compiler(object):
+    """
+    Compiles the syntax tree built by the parser into a CodeObject run by tiny_vm.VM
+
+    Expressions are compiled to three address instructions over slots instead of stack
+    pushes and pops : x := x * y is the single instruction MUL x x y. The partial results
+    of an expression go to temporary slots, one per nesting level of its right operands.
+    A comparison used as an if / until test becomes a single compare and branch
+
+    ### Attributes
+    - code : the instruction words emitted so far
+    - slots : the slot of every variable name and constant value
+    - names : the variable names in slot order
+    - consts : the constant values in slot order
+    - temps : the slot of the first temporary
+    - num_temps : the temporaries used so far
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the previous program
+        """
+        self.code = array('l')
+        self.slots = {}
+        self.names = []
+        self.consts = []
+        self.temps = 0
+        self.num_temps = 0
+
+    def compile(self, tree):
+        """
+        Compiles a whole program, the list of its top level statement nodes
+
+        ### Returns
+        the CodeObject
+        """
+        self.reset()
+        self.collect(tree)
+        # the variables come first, the constants follow, then the temporaries
+        for i in self.names:
+            self.slots[("name", i)] = len(self.slots)
+        for i in self.consts:
+            self.slots[("const", i)] = len(self.slots)
+        self.temps = len(self.slots)
+        self.stmt_seq(tree)
+        self.emit(HALT)
+        return CodeObject(self.code, self.names, self.consts, self.temps + self.num_temps)
+
+    def collect(self, tree):
+        """
+        Lists the variable names and the constant values of tree, in the order they appear
+        """
+        names = {}
+        consts = {}
+        stack = list(reversed(tree))
+        while stack:
+            node = stack.pop()
+            cls = node.__class__
+            if cls is Id or cls is Assign or cls is Read:
+                names.setdefault(node.name, None)
+            elif cls is Const:
+                consts.setdefault(int(node.value), None)
+            for i in reversed(node.__slots__):
+                child = getattr(node, i)
+                if child.__class__ is list:
+                    stack.extend(reversed(child))
+                elif child is not None and child.__class__ is not str:
+                    stack.append(child)
+        self.names = list(names)
+        self.consts = list(consts)
+
+    def emit(self, op, a=0, b=0, c=0):
+        """
+        Appends one instruction
+
+        ### Returns
+        its index
+        """
+        self.code.extend((op, a, b, c))
+        return len(self.code) // WIDTH - 1
+
+    def patch(self, index, operand, target):
+        """
+        Sets the jump target of the instruction #index, operand is its position (1 to 3)
+        """
+        self.code[index * WIDTH + operand] = target
+
+    def here(self):
+        """
+        Returns the index of the next instruction
+        """
+        return len(self.code) // WIDTH
+
+    def stmt_seq(self, stmts):
+        """
+        Compiles a statement sequence
+        """
+        for stmt in stmts:
+            self.stmt(stmt)
+
+    def stmt(self, stmt):
+        """
+        Compiles one statement
+        """
+        cls = stmt.__class__
+        if cls is Assign:
+            dst = self.slots[("name", stmt.name)]
+            if stmt.expr.__class__ is Op:
+                self.expr(stmt.expr, 0, dst)
+            else:
+                self.emit(MOVE, dst, self.expr(stmt.expr, 0))
+        elif cls is Read:
+            self.emit(READ, self.slots[("name", stmt.name)])
+        elif cls is Write:
+            self.emit(WRITE, self.expr(stmt.expr, 0))
+        elif cls is If:
+            jump, operand = self.jump_unless(stmt.test)
+            self.stmt_seq(stmt.then_part)
+            if stmt.else_part is not None:
+                skip = self.emit(JUMP)
+                self.patch(jump, operand, self.here())
+                self.stmt_seq(stmt.else_part)
+                self.patch(skip, 1, self.here())
+            else:
+                self.patch(jump, operand, self.here())
+        else:
+            start = self.here()
+            self.stmt_seq(stmt.body)
+            jump, operand = self.jump_unless(stmt.test)
+            self.patch(jump, operand, start)
+
+    def jump_unless(self, test):
+        """
+        Emits the jump taken when test is false, its target is patched later
+
+        ### Returns
+        (the jump instruction index, the position of its target operand)
+        """
+        if test.__class__ is Op and test.op in BRANCH_OPS:
+            left = self.expr(test.left, 0)
+            right = self.expr(test.right, 1)
+            return self.emit(BRANCH_OPS[test.op], left, right), 3
+        return self.emit(JUMP_UNLESS, self.expr(test, 0)), 2
+
+    def expr(self, node, depth, dst=None):
+        """
+        Compiles an expression, temporaries from the #depth one on are free to use
+
+        ### Returns
+        the slot holding its value, dst when given
+        """
+        cls = node.__class__
+        if cls is Const:
+            return self.slots[("const", int(node.value))]
+        if cls is Id:
+            return self.slots[("name", node.name)]
+        left = self.expr(node.left, depth)
+        # the left value may be in the temporary #depth, the right one goes past it
+        right = self.expr(node.right, depth + 1)
+        if dst is None:
+            dst = self.temps + depth
+            if depth >= self.num_temps:
+                self.num_temps = depth + 1
+        self.emit(BINARY_OPS[node.op], dst, left, right)
+        return dst
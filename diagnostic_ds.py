@@ -0,0 +1,44 @@
+class ParseError(ValueError):
+    """
+    Syntax error raised by the parser, still a ValueError for the existing callers
+
+    ### Attributes
+    - expected : what the grammar expected at the error, e.g. '"then"' or 'an expression'
+    """
+    def __init__(self, message, expected):
+        ValueError.__init__(self, message)
+        self.expected = expected
+
+
+class Diagnostic(object):
+    """
+    One error found by the scanner or the parser when recovering (see Parser.parse(recover=True))
+
+    ### Attributes
+    - line : 1 based line of the error, None if the tokens carry no position
+    - column : 1 based column of the error, None if the tokens carry no position
+    - expected : what was expected there
+    - found : the offending character or token literal, "<eof>" at the end of the input
+    - message : the text of the error the same input raises without recovery
+    """
+    __slots__ = ("line", "column", "expected", "found", "message")
+
+    def __init__(self, line, column, expected, found, message):
+        self.line = line
+        self.column = column
+        self.expected = expected
+        self.found = found
+        self.message = message
+
+    def __repr__(self):
+        return "Diagnostic(" + ", ".join(repr(getattr(self, i)) for i in self.__slots__) + ")"
+
+    def __str__(self):
+        return "line %s, column %s : %s [expected %s, found %r]" % (
+            self.line, self.column, self.message, self.expected, self.found)
+
+    def to_dict(self):
+        """
+        returns the diagnostic as a JSON ready dict
+        """
+        return dict((i, getattr(self, i)) for i in self.__slots__)
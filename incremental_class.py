@@ -0,0 +1,318 @@
+from parser_class import Parser
+from scanner_class import Scanner
+from sum_tree_ds import SumTree
+from token_ds import Token, TokenList, K_SEMI, end_position
+
+
+class TextTokens(object):
+    """
+    The tokens of an IncrementalParser with their positions in the whole text. The parser
+    stores them relative to their line, the line, column and offset are computed on access
+    from the line token counts and lengths, so an edit never has to move the tokens after it
+
+    Read like a TokenList : literal(), type_code(), kind(), position(), indexing and iteration
+
+    ### Args
+    - owner : the IncrementalParser
+    """
+    def __init__(self, owner):
+        """
+        constructor
+        """
+        self.owner = owner
+
+    def __len__(self):
+        return len(self.owner.line_tokens)
+
+    def literal(self, index):
+        """
+        returns the literal of the token #index
+        """
+        return self.owner.line_tokens[index].literal
+
+    def type_code(self, index):
+        """
+        returns the type code of the token #index
+        """
+        return self.owner.line_tokens[index].type_code
+
+    def kind(self, index):
+        """
+        returns the kind code of the token #index
+        """
+        return self.owner.line_tokens[index].kind
+
+    def position(self, index):
+        """
+        returns the (line, column) of the token #index, right after the last token
+        for an index past the end
+        """
+        owner = self.owner
+        if index < len(owner.line_tokens):
+            token = owner.line_tokens[index]
+            return owner.line_counts.bisect_right(index) + token.line, token.column
+        return end_position(self[-1] if len(owner.line_tokens) else None)
+
+    def __getitem__(self, index):
+        """
+        returns the token #index as a new Token, placed in the whole text
+        """
+        owner = self.owner
+        if index < 0:
+            index += len(owner.line_tokens)
+        token = owner.line_tokens[index]
+        line = owner.line_counts.bisect_right(index)
+        return Token(token.literal, token.type_code, token.kind, owner.line_lengths.prefix(line) + token.offset,
+                     line + token.line, token.column)
+
+    def __iter__(self):
+        owner = self.owner
+        tokens = owner.line_tokens
+        index = 0
+        offset = 0
+        for line, (count, length) in enumerate(zip(owner.line_counts.values(), owner.line_lengths.values())):
+            for token in tokens[index:index + count]:
+                yield Token(token.literal, token.type_code, token.kind, offset + token.offset,
+                            line + token.line, token.column)
+            index += count
+            offset += length
+
+
+class IncrementalParser(object):
+    """
+    Keeps the scan and parse results of a text being edited and updates them per edit,
+    meant for editor integrations re-parsing on every keystroke
+
+    1. Only the edited lines are rescanned, followed by the next lines until the FSM state
+    at a line boundary (see Scanner.scan_line) is back to what it was before the edit,
+    e.g. after opening a "{" every line up to the closing "}" is rescanned
+    2. Only the top level statements whose tokens changed are parsed again, parsing resumes
+    at the first changed statement and stops as soon as it reaches the start of an old,
+    untouched statement. Untouched tokens and statement nodes are reused as they are
+
+    The results are the same as scanning and parsing the whole text again, token positions
+    included, without the parser text output. As for Parser.parse_text(), a last line without
+    a new line is scanned as if it had one. The tokens are stored with positions relative
+    to their line, the tokens attribute returns them with their positions in the whole text.
+    The token counts of the lines and of the statements are kept in SumTree objects, finding
+    where an edit starts in the tokens and in the tree takes O(log n) instead of summing
+    everything before it
+
+    ### Attributes
+    - lines : the text lines, each one keeps its new line
+    - start_states : the FSM state at the beginning of each line
+    - start_colons : for the lines starting in state 5, the (offset, line, column) of the ":"
+    relative to the line [see line_tokens], None for the other lines
+    - line_counts : SumTree of the number of tokens of each line
+    - line_lengths : SumTree of the number of characters of each line
+    - error_lines : the lines holding an invalid character
+    - line_tokens : TokenList of all the tokens, the positions relative to the line of the
+    token : its line is 1, its offset counts from the start of the line [a ":=" split over
+    lines is on line 0 or before and at a negative offset]
+    - tokens : TextTokens, the same tokens placed in the whole text
+    - tree : the list of the top level statement nodes, None after a syntax error
+    - stmt_sizes : SumTree of the number of tokens of each top level statement, with its ";"
+    - last_edit : counters of the last update, lines_scanned and statements_parsed
+
+    ### Args
+    - text : the initial text, set_text() can be called later instead
+    """
+
+    def __init__(self, text=None):
+        """
+        Constructor
+        """
+        self.scanner = Scanner()
+        self.parser = Parser()
+        self.clear()
+        if text is not None:
+            self.set_text(text)
+
+    def clear(self):
+        """
+        Forgets the current text and results
+        """
+        self.lines = []
+        self.start_states = []
+        self.start_colons = []
+        self.line_counts = SumTree()
+        self.line_lengths = SumTree()
+        self.error_lines = set()
+        self.line_tokens = TokenList()
+        self.tokens = TextTokens(self)
+        self.tree = None
+        self.stmt_sizes = SumTree()
+        self.last_edit = {"lines_scanned": 0, "statements_parsed": 0}
+
+    def load(self, in_file_dir):
+        """
+        Replaces the text with the content of in_file_dir, returns the tree
+        """
+        in_file = open(in_file_dir)
+        text = in_file.read()
+        in_file.close()
+        return self.set_text(text)
+
+    def set_text(self, text):
+        """
+        Scans and parses a whole new text, returns the tree
+        """
+        self.clear()
+        self.lines = text.splitlines(True)
+        self.start_states = [1] * len(self.lines)
+        self.start_colons = [None] * len(self.lines)
+        self.line_counts = SumTree([0] * len(self.lines))
+        self.line_lengths = SumTree(len(i) for i in self.lines)
+        self.rescan(0, 0, len(self.lines))
+        return self.reparse(0, 0, len(self.tokens))
+
+    @property
+    def text(self):
+        return "".join(self.lines)
+
+    def edit(self, start_line, start_col, end_line, end_col, new_text):
+        """
+        Replaces the text between (start_line, start_col) and (end_line, end_col)
+        [0 based, end excluded] with new_text then updates the tokens and the tree
+
+        ### Returns
+        the updated tree
+
+        ### Raises
+        ValueError : if the new text has a scanner or a syntax error
+        """
+        old_line = self.lines[start_line] if start_line < len(self.lines) else ""
+        last_line = self.lines[end_line] if end_line < len(self.lines) else ""
+        chunk = old_line[:start_col] + new_text + last_line[end_col:]
+        removed = min(end_line + 1, len(self.lines)) - start_line
+        if not chunk.endswith("\n") and start_line + removed < len(self.lines):
+            # the new line at the end of the range was deleted, join the next line
+            chunk += self.lines[start_line + removed]
+            removed += 1
+        new_lines = chunk.splitlines(True)
+        self.last_edit = {"lines_scanned": 0, "statements_parsed": 0}
+
+        first = self.line_counts.prefix(start_line)
+        old_tokens, new_count = self.rescan(start_line, removed, len(new_lines), new_lines)
+        if self.tree is not None and not self.error_lines and self.same_tokens(old_tokens, first, new_count):
+            # e.g. an edit inside a comment, nothing to parse again
+            return self.tree
+        return self.reparse(first, first + len(old_tokens), first + new_count)
+
+    def rescan(self, start_line, removed, added, new_lines=None):
+        """
+        Replaces <removed> lines at start_line with <added> new ones and rescans them, and the
+        following lines until their start state is unchanged
+
+        ### Returns
+        (the replaced tokens, the number of new tokens put in their place)
+        """
+        state = self.start_states[start_line] if start_line < len(self.start_states) else 1
+        colon = self.start_colons[start_line] if start_line < len(self.start_colons) else None
+        if new_lines is not None:
+            stop = start_line + removed
+            self.lines[start_line:stop] = new_lines
+            self.start_states[start_line:stop] = [None] * added
+            self.start_colons[start_line:stop] = [None] * added
+            self.line_lengths.replace(start_line, stop, [len(i) for i in new_lines])
+            self.error_lines = set(i if i < start_line else i - removed + added
+                                   for i in self.error_lines if i < start_line or i >= stop)
+        first = self.line_counts.prefix(start_line)
+        new_tokens = []
+        counts = []
+        i = start_line
+        while i < len(self.lines):
+            if i >= start_line + added and self.start_states[i] == state and self.start_colons[i] == colon:
+                break
+            self.start_states[i] = state
+            self.start_colons[i] = colon
+            line = self.lines[i]
+            # only the last line may miss its new line, its last token would be dropped
+            tokens, state = self.scanner.scan_line(line if line.endswith("\n") else line + "\n", state,
+                                                   colon=colon)
+            self.error_lines.discard(i)
+            colon = None
+            if state < 0:
+                # the full scan stops here, keep going from the input state to stay incremental
+                self.error_lines.add(i)
+                state = 1
+            elif state == 5:
+                # a ":" waiting for its "=" on the next lines, seen from the next line
+                scanner = self.scanner
+                colon = (scanner.token_offset - len(line), scanner.token_line - 1, scanner.token_column)
+            counts.append(len(tokens))
+            new_tokens.extend(tokens)
+            i += 1
+        self.last_edit["lines_scanned"] = i - start_line
+        # the old lines replaced: the removed ones and the following ones scanned again
+        old_stop = i - added + removed
+        old_count = self.line_counts.prefix(old_stop) - first
+        self.line_counts.replace(start_line, old_stop, counts)
+        old_tokens = self.line_tokens[first:first + old_count]
+        self.line_tokens[first:first + old_count] = new_tokens
+        return old_tokens, len(new_tokens)
+
+    def same_tokens(self, old_tokens, first, new_count):
+        """
+        Checks if the tokens replaced by the last rescan are identical to the new ones
+        """
+        if new_count != len(old_tokens):
+            return False
+        new_tokens = self.line_tokens[first:first + new_count]
+        for old, new in zip(old_tokens, new_tokens):
+            if old.literal != new.literal or old.type_code != new.type_code:
+                return False
+        return True
+
+    def reparse(self, first, old_end, new_end):
+        """
+        Parses again the top level statements touched by the tokens [first, old_end)
+        replaced by [first, new_end), returns the tree
+
+        ### Raises
+        ValueError : in case of a scanner or a syntax error
+        """
+        if self.error_lines:
+            self.tree = None
+            raise ValueError('Error in your code at line ' + str(min(self.error_lines) + 1))
+        if self.tree is None:
+            # no valid tree to reuse, parse everything
+            first, old_end, new_end = 0, 0, len(self.tokens)
+            self.tree = []
+            self.stmt_sizes = SumTree()
+        delta = new_end - old_end
+        sizes_tree = self.stmt_sizes
+        count = len(sizes_tree)
+        # the statement right before the change may grow, e.g. "x := y" + "+ 1"
+        k0 = min(sizes_tree.bisect_left(first), max(count - 1, 0))
+        pos = sizes_tree.prefix(k0)
+
+        parser = self.parser
+        parser.reset()
+        parser.tokens = self.tokens
+        parser.num_tokens = len(self.tokens)
+        parser.next_token = pos
+        stmts = []
+        sizes = []
+        k1 = count
+        try:
+            while True:
+                stmts.append(parser.is_statement())
+                more = parser.match_kind(K_SEMI)
+                sizes.append(parser.next_token - pos)
+                pos = parser.next_token
+                if not more:
+                    break
+                if pos >= new_end:
+                    # back in sync with the old parse if an old statement started here
+                    j = sizes_tree.bisect_left(pos - delta)
+                    if j < count - 1 and sizes_tree.prefix(j + 1) == pos - delta:
+                        k1 = j + 1
+                        break
+        except ValueError:
+            self.tree = None
+            raise
+        self.last_edit["statements_parsed"] = len(stmts)
+        self.tree[k0:k1] = stmts
+        sizes_tree.replace(k0, k1, sizes)
+        return self.tree
@@ -0,0 +1,309 @@
+"""
+Explicit stack version of the Parser recursive descent, selected by Parser(engine="iterative")
+
+Nested if/repeat blocks are frames of a list instead of Python calls and an expression
+is a single loop over the factors and operators, only a "(" pushes the state of the enclosing
+expression. The nesting depth is then only bounded by the memory, and no call is made per
+grammar level. The tree, the trace lines and the errors are the same as the recursive
+descent ones, including its fallbacks on malformed input
+"""
+from itertools import islice
+
+from ast_ds import If, Repeat, Assign, Read, Write, Op, Const, Id
+from diagnostic_ds import ParseError
+from symbol_ds import READ_DEF, ASSIGN_DEF, USE
+from token_ds import KIND_NAMES, OP_GROUP, EOF, K_NUMBER, K_IDENTIFIER, K_IF, K_THEN, K_ELSE, \
+    K_END, K_REPEAT, K_UNTIL, K_READ, K_WRITE, K_ASSIGN, K_LPAREN, K_RPAREN, K_SEMI, MUL_OP, ADD_OP, \
+    COMPARE_OP
+
+# compound statement frames
+IF_THEN = 0
+IF_ELSE = 1
+REPEAT = 2
+
+# expression machine states
+FACTOR = 0
+LEAF = 1
+HAVE_FACTOR = 2
+FAIL = 3
+
+
+def token_reader(parser):
+    """
+    Returns get(i), the kind code of the token #i of the parser tokens or EOF past the end
+
+    The kinds of a whole token list are copied once to a flat list ending with EOF, get is
+    then its plain indexing [the parser never reads past the first EOF]. They are copied from
+    the kinds column of a TokenTable or a saved_parse.SavedTokens
+    """
+    tokens = parser.tokens
+    num_tokens = parser.num_tokens
+    if num_tokens is None:
+        kind = tokens.kind
+        available = tokens.available
+
+        def get(i):
+            return kind(i) if available(i) else EOF
+        return get
+    if hasattr(tokens, "kinds"):
+        kinds = tokens.kinds[:num_tokens].tolist()
+    else:
+        kinds = [token.kind for token in islice(tokens, num_tokens)]
+    kinds.append(EOF)
+    return kinds.__getitem__
+
+
+def expr(parser, i, get):
+    """
+    Parses an expression starting at the token #i, like Parser.is_expr
+
+    ### Returns
+    (the expression node or False, the index of the next token)
+    """
+    emit = parser.emit
+    literal = parser.tokens.literal
+    symbols = parser.symbols
+    cur = get(i)
+    # the partial expressions enclosing every open "(", with the symbols mark at the "("
+    stack = []
+    mark = None
+    # comparison lhs/op, additive lhs/op, multiplicative lhs/op of the current level
+    e_left = e_op = s_left = s_op = t_left = t_op = None
+    value = None
+    state = FACTOR
+    while True:
+        if state == FAIL:
+            # the enclosing factor falls back to a number or an identifier
+            if not stack:
+                return False, i
+            e_left, e_op, s_left, s_op, t_left, t_op, mark = stack.pop()
+            if symbols is not None:
+                symbols.rollback(mark)
+            state = LEAF
+            continue
+        if state != HAVE_FACTOR:
+            if state == FACTOR and cur == K_LPAREN:
+                stack.append((e_left, e_op, s_left, s_op, t_left, t_op,
+                              None if symbols is None else symbols.mark()))
+                e_left = e_op = s_left = s_op = t_left = t_op = None
+                i += 1
+                cur = get(i)
+                continue
+            if cur == K_NUMBER:
+                value = Const(literal(i))
+            elif cur == K_IDENTIFIER:
+                value = Id(literal(i))
+                if symbols is not None:
+                    parser.add_symbol(value.name, USE, i)
+            else:
+                state = FAIL
+                continue
+            i += 1
+            cur = get(i)
+        # a factor is complete
+        emit("Factor found")
+        t_left = value if t_op is None else Op(t_op, t_left, value)
+        if OP_GROUP[cur] == MUL_OP:
+            emit("Mul_Operator found")
+            t_op = KIND_NAMES[cur]
+            i += 1
+            cur = get(i)
+            state = FACTOR
+            continue
+        emit("Term found")
+        s_left = t_left if s_op is None else Op(s_op, s_left, t_left)
+        t_left = t_op = None
+        if OP_GROUP[cur] == ADD_OP:
+            emit("Add_Operator found")
+            s_op = KIND_NAMES[cur]
+            i += 1
+            cur = get(i)
+            state = FACTOR
+            continue
+        emit("Simple_Expression found")
+        value = s_left
+        s_left = s_op = None
+        if e_op is not None:
+            value = Op(e_op, e_left, value)
+            e_left = e_op = None
+        elif OP_GROUP[cur] == COMPARE_OP:
+            emit("Comparison_Operator found")
+            e_left = value
+            e_op = KIND_NAMES[cur]
+            i += 1
+            cur = get(i)
+            state = FACTOR
+            continue
+        emit("Expression found")
+        # an expression is complete
+        if not stack:
+            return value, i
+        e_left, e_op, s_left, s_op, t_left, t_op, mark = stack.pop()
+        if cur == K_RPAREN:
+            i += 1
+            cur = get(i)
+            state = HAVE_FACTOR
+        else:
+            if symbols is not None:
+                symbols.rollback(mark)
+            state = LEAF
+
+
+def fail(parser, i, message, expected):
+    """
+    Raises the parser error, leaving next_token where the parsing stopped
+    """
+    parser.next_token = i
+    raise ParseError(message, expected)
+
+
+def recover(parser, err, get):
+    """
+    Reports err then skips to the next ";", "end" or "until", like Parser.is_stmt_seq
+
+    ### Returns
+    (the index of the next token, its kind)
+    """
+    parser.report(err)
+    parser.synchronize()
+    return parser.next_token, get(parser.next_token)
+
+
+def stmt_seq(parser):
+    """
+    Parses a statement sequence starting at parser.next_token, like Parser.is_stmt_seq
+
+    ### Returns
+    the list of the statement nodes, parser.next_token points past them
+    """
+    emit = parser.emit
+    literal = parser.tokens.literal
+    symbols = parser.symbols
+    get = token_reader(parser)
+    i = parser.next_token
+    cur = get(i)
+    # [frame kind, if test, then part, the enclosing statement sequence, the symbols mark]
+    frames = []
+    seq = []
+    mark = None
+    while True:
+        # a statement starts at i, the alternatives are tried in the recursive descent order
+        stmt = None
+        if symbols is not None:
+            mark = symbols.mark()
+        try:
+            if cur == K_IF:
+                test, i = expr(parser, i + 1, get)
+                cur = get(i)
+                if test:
+                    if cur != K_THEN:
+                        fail(parser, i, 'Missing "then" after an if statement', '"then"')
+                    i += 1
+                    cur = get(i)
+                    frames.append([IF_THEN, test, None, seq, mark])
+                    seq = []
+                    continue
+                if symbols is not None:
+                    symbols.rollback(mark)
+            if cur == K_REPEAT:
+                i += 1
+                cur = get(i)
+                frames.append([REPEAT, None, None, seq, mark])
+                seq = []
+                continue
+            if cur == K_IDENTIFIER:
+                target = literal(i)
+                target_index = i
+                i += 1
+                cur = get(i)
+                if cur == K_ASSIGN:
+                    if symbols is not None:
+                        target_position = parser.locate_token(target_index)
+                    value, i = expr(parser, i + 1, get)
+                    cur = get(i)
+                    if not value:
+                        fail(parser, i, 'Missing "expression" after assignment statement',
+                             'an expression')
+                    if symbols is not None:
+                        parser.add_symbol(target, ASSIGN_DEF, target_index, target_position)
+                    emit("Assignment_Statement found")
+                    stmt = Assign(target, value)
+            if stmt is None and cur == K_READ:
+                i += 1
+                cur = get(i)
+                if cur != K_IDENTIFIER:
+                    fail(parser, i, 'Missing "identifier" after read statement', 'an identifier')
+                stmt = Read(literal(i))
+                if symbols is not None:
+                    parser.add_symbol(stmt.name, READ_DEF, i)
+                i += 1
+                cur = get(i)
+                emit("Read_Statement found")
+            if stmt is None and cur == K_WRITE:
+                value, i = expr(parser, i + 1, get)
+                cur = get(i)
+                if not value:
+                    fail(parser, i, 'Missing "expression" after write statement', 'an expression')
+                emit("Write_Statement found")
+                stmt = Write(value)
+            if stmt is None:
+                fail(parser, i, 'Error, malformed statement', 'a statement')
+        except ParseError as err:
+            if not parser.recover:
+                raise
+            if symbols is not None:
+                symbols.rollback(mark)
+            i, cur = recover(parser, err, get)
+
+        # a statement is complete [or skipped], close every sequence and block it ends
+        while True:
+            if stmt is not None:
+                seq.append(stmt)
+                emit("Statement Found")
+            if cur == K_SEMI:
+                i += 1
+                cur = get(i)
+                break
+            emit("Statement_Sequence Found")
+            if not frames:
+                parser.next_token = i
+                return seq
+            frame = frames[-1]
+            stmt = None
+            try:
+                if frame[0] == REPEAT:
+                    if cur != K_UNTIL:
+                        fail(parser, i, 'Missing "until" after a repeat statement', '"until"')
+                    test, i = expr(parser, i + 1, get)
+                    cur = get(i)
+                    if not test:
+                        fail(parser, i, 'Missing "expression" after until statement', 'an expression')
+                    emit("Repeat_statement found")
+                    stmt = Repeat(seq, test)
+                else:
+                    if frame[0] == IF_THEN:
+                        frame[2] = seq
+                        if cur == K_ELSE:
+                            i += 1
+                            cur = get(i)
+                            frame[0] = IF_ELSE
+                            seq = []
+                            break
+                        else_part = None
+                    else:
+                        else_part = seq
+                    if cur != K_END:
+                        fail(parser, i, 'Missing "end" after an if statement', '"end"')
+                    i += 1
+                    cur = get(i)
+                    emit("IF_statement found")
+                    stmt = If(frame[1], frame[2], else_part)
+            except ParseError as err:
+                # the block is left out, like a failed statement of the enclosing sequence
+                if not parser.recover:
+                    raise
+                if symbols is not None:
+                    symbols.rollback(frame[4])
+                i, cur = recover(parser, err, get)
+            frames.pop()
+            seq = frame[3]
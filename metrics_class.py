@@ -0,0 +1,235 @@
+import json
+import time
+
+from ast_ds import Node
+
+# the recursive descent methods counted and timed by ParseMetrics(rules=True)
+RULES = ("is_stmt_seq", "is_statement", "is_if", "is_repeat", "is_assig", "is_read", "is_write",
+         "is_expr", "is_simple_expr", "is_term", "is_factor", "is_number", "is_identifier")
+
+COUNTER_HELP = {
+    "parses": "Parses measured",
+    "tokens": "Tokens parsed",
+    "nodes": "Syntax tree nodes built",
+    "graph_nodes": "SyntaxTree drawing nodes",
+    "diagnostics": "Errors reported by recovering parses",
+}
+
+
+class ParseMetrics(object):
+    """
+    Collects where the time of the parses goes, given to Parser.parse(metrics=...)
+    [or parse_text()] and accumulated over every parse it is given to
+
+    A parse without metrics pays nothing : the stages are only timed when a ParseMetrics is
+    given, and the rules are only counted when it asks for it, by shadowing the is_* methods
+    of the parser instance for the time of the parse
+
+    Stages, in seconds :
+    - read : reading the input file
+    - tokenize : the scanner engine over the text, reading the pages too for a mapped file
+    - parse : the recursive descent [or the iterative engine], including the scan when streaming
+    - trace_write : writing the collected text output
+    - tree_build : SyntaxTree create_node / connect_node over the tree
+    - draw : the graphviz layout and image, only the submission with a RenderPool
+    - optimize : the Optimizer pass over the tree
+    - export : writing the tree with tree_export
+    - save : writing the tokens and the tree with saved_parse
+    - cache_load, cache_store : reading and writing the ParseCache
+
+    ### Attributes
+    - stage_seconds : stage name to its total wall time
+    - stage_calls : stage name to the number of times it ran
+    - counters : parses, tokens, nodes [syntax tree nodes], graph_nodes, diagnostics
+    - max_tree_depth : the deepest syntax tree node seen, the root statements being at 1
+    - rules : True to also count and time the grammar rules, recursive engine only
+    - rule_calls : rule method name to its number of calls
+    - rule_seconds : rule method name to its own wall time, the time of the rules it calls
+    is left out so the rules add up to the parse
+    - max_rule_depth : the deepest nesting of rule calls seen, i.e. the recursion depth
+    - depth, nested_seconds : the rule calls in progress and the time spent in the rules called
+    by the innermost one
+    - listeners : callables called with (stage name, seconds) at the end of every stage
+
+    ### Args
+    - rules : False by default
+    - listeners : an optional list of callables
+    """
+
+    def __init__(self, rules=False, listeners=None):
+        """
+        Constructor
+        """
+        self.stage_seconds = {}
+        self.stage_calls = {}
+        self.counters = dict.fromkeys(("parses", "tokens", "nodes", "graph_nodes", "diagnostics"), 0)
+        self.max_tree_depth = 0
+        self.rules = rules
+        self.rule_calls = dict.fromkeys(RULES, 0)
+        self.rule_seconds = dict.fromkeys(RULES, 0.0)
+        self.max_rule_depth = 0
+        self.depth = 0
+        self.nested_seconds = 0.0
+        self.listeners = list(listeners or ())
+
+    @staticmethod
+    def now():
+        """
+        Returns the clock value a stage is measured from
+        """
+        return time.perf_counter()
+
+    def add_stage(self, stage, started):
+        """
+        Records that the stage ran from the clock value started up to now
+
+        ### Returns
+        now, the start of the next stage
+        """
+        end = time.perf_counter()
+        seconds = end - started
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        self.stage_calls[stage] = self.stage_calls.get(stage, 0) + 1
+        for listener in self.listeners:
+            listener(stage, seconds)
+        return end
+
+    def count(self, counter, value=1):
+        """
+        Adds value to one of the counters
+        """
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def count_tree(self, tree):
+        """
+        Counts the nodes of a syntax tree and records its depth
+        """
+        nodes = 0
+        depth = 0
+        stack = [(i, 1) for i in tree or ()]
+        while stack:
+            node, level = stack.pop()
+            nodes += 1
+            if level > depth:
+                depth = level
+            for i in node.__slots__:
+                child = getattr(node, i)
+                if child.__class__ is list:
+                    stack.extend((j, level + 1) for j in child)
+                elif isinstance(child, Node):
+                    stack.append((child, level + 1))
+        self.count("nodes", nodes)
+        if depth > self.max_tree_depth:
+            self.max_tree_depth = depth
+
+    def instrument(self, parser):
+        """
+        Shadows the rule methods of the parser instance with counting ones
+        """
+        for name in RULES:
+            setattr(parser, name, self.wrap(name, getattr(parser, name)))
+        parser.statement_rules = (parser.is_if, parser.is_repeat, parser.is_assig, parser.is_read,
+                                  parser.is_write)
+
+    def release(self, parser):
+        """
+        Gives the parser instance its plain rule methods back
+        """
+        for name in RULES:
+            parser.__dict__.pop(name, None)
+        parser.statement_rules = (parser.is_if, parser.is_repeat, parser.is_assig, parser.is_read,
+                                  parser.is_write)
+
+    def wrap(self, name, method):
+        """
+        Returns method counting its calls, time and nesting under name
+        """
+        calls = self.rule_calls
+        seconds = self.rule_seconds
+        clock = time.perf_counter
+
+        def rule():
+            self.depth += 1
+            if self.depth > self.max_rule_depth:
+                self.max_rule_depth = self.depth
+            outer_nested = self.nested_seconds
+            self.nested_seconds = 0.0
+            start = clock()
+            try:
+                return method()
+            finally:
+                elapsed = clock() - start
+                seconds[name] += elapsed - self.nested_seconds
+                self.nested_seconds = outer_nested + elapsed
+                calls[name] += 1
+                self.depth -= 1
+        return rule
+
+    def to_dict(self):
+        """
+        Returns the metrics as a JSON ready dict
+        """
+        result = {
+            "stages": dict((i, {"seconds": self.stage_seconds[i], "calls": self.stage_calls[i]})
+                           for i in self.stage_seconds),
+            "counters": dict(self.counters),
+            "max_tree_depth": self.max_tree_depth,
+        }
+        if self.rules:
+            result["rules"] = dict((i, {"seconds": self.rule_seconds[i], "calls": self.rule_calls[i]})
+                                   for i in RULES if self.rule_calls[i])
+            result["max_rule_depth"] = self.max_rule_depth
+        return result
+
+    def merge(self, other):
+        """
+        Adds the metrics of other, a ParseMetrics or its to_dict(), e.g. sent back by a worker process
+        """
+        if isinstance(other, ParseMetrics):
+            other = other.to_dict()
+        for stage, stats in other["stages"].items():
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + stats["seconds"]
+            self.stage_calls[stage] = self.stage_calls.get(stage, 0) + stats["calls"]
+        for counter, value in other["counters"].items():
+            self.count(counter, value)
+        self.max_tree_depth = max(self.max_tree_depth, other["max_tree_depth"])
+        for name, stats in other.get("rules", {}).items():
+            self.rules = True
+            self.rule_seconds[name] += stats["seconds"]
+            self.rule_calls[name] += stats["calls"]
+        self.max_rule_depth = max(self.max_rule_depth, other.get("max_rule_depth", 0))
+
+    def to_json(self):
+        """
+        Returns the metrics as JSON text
+        """
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, prefix="tiny_parser"):
+        """
+        Returns the metrics in the Prometheus text exposition format
+        """
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append("# HELP " + prefix + "_" + name + " " + help_text)
+            lines.append("# TYPE " + prefix + "_" + name + " " + kind)
+            for labels, value in samples:
+                lines.append(prefix + "_" + name + labels + " " + repr(value))
+
+        metric("stage_seconds_total", "counter", "Wall time spent per stage",
+               [('{stage="' + i + '"}', self.stage_seconds[i]) for i in sorted(self.stage_seconds)])
+        metric("stage_runs_total", "counter", "Number of times each stage ran",
+               [('{stage="' + i + '"}', self.stage_calls[i]) for i in sorted(self.stage_calls)])
+        for counter in sorted(self.counters):
+            metric(counter + "_total", "counter", COUNTER_HELP.get(counter, counter.replace("_", " ")),
+                   [("", self.counters[counter])])
+        metric("max_tree_depth", "gauge", "Deepest syntax tree node", [("", self.max_tree_depth)])
+        if self.rules:
+            metric("rule_calls_total", "counter", "Calls per grammar rule",
+                   [('{rule="' + i + '"}', self.rule_calls[i]) for i in RULES])
+            metric("rule_seconds_total", "counter", "Own wall time per grammar rule, nested rules excluded",
+                   [('{rule="' + i + '"}', self.rule_seconds[i]) for i in RULES])
+            metric("max_rule_depth", "gauge", "Deepest nesting of grammar rule calls",
+                   [("", self.max_rule_depth)])
+        return "\n".join(lines) + "\n"
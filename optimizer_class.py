@@ -0,0 +1,247 @@
+from ast_ds import Node, If, Repeat, Assign, Read, Write, Op, Const
+
+
+def count_nodes(tree):
+    """
+    Returns the number of nodes of a syntax tree, statements and expressions
+    """
+    nodes = 0
+    stack = list(tree or ())
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        for i in node.__slots__:
+            child = getattr(node, i)
+            if child.__class__ is list:
+                stack.extend(child)
+            elif isinstance(child, Node):
+                stack.append(child)
+    return nodes
+
+
+def has_division(expr):
+    """
+    Returns true if evaluating expr may fail on a division by zero
+    """
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if node.__class__ is Op:
+            if node.op == "/":
+                return True
+            stack.append(node.left)
+            stack.append(node.right)
+    return False
+
+
+class Optimizer(object):
+    """
+    Simplifies the syntax tree built by the parser, for a smaller tree to draw and to compile
+    (see compiler_class)
+
+    - constant folding : an operator over two numbers becomes a number, comparisons give 1 or 0
+    as run by tiny_vm, a division by zero is left for the run to report
+    - identities : x + 0, 0 + x, x - 0, x * 1, 1 * x, x / 1 are x and x * 0 is 0 [unless x
+    holds a division], (x + 1) + 2 is x + 3 and (x * 2) * 3 is x * 6
+    - dead branches : an if over a number is replaced by the part it runs, a repeat until
+    a non zero number by its body, run once
+
+    The tree given is left as is, the unchanged subtrees are shared with the new one
+
+    ### Attributes
+    - folded : operators replaced by their value
+    - simplified : operators removed or merged by an identity
+    - branches : if / repeat statements decided by a constant test
+    - nodes_before, nodes_after : the node counts of the last optimized tree and its result
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.reset()
+
+    def reset(self):
+        """
+        Clears the counts
+        """
+        self.folded = 0
+        self.simplified = 0
+        self.branches = 0
+        self.nodes_before = 0
+        self.nodes_after = 0
+
+    def optimize(self, tree):
+        """
+        Optimizes a whole program, the list of its top level statement nodes
+
+        ### Returns
+        the new list of statement nodes
+        """
+        self.reset()
+        self.nodes_before = count_nodes(tree)
+        result = self.stmt_seq(tree)
+        self.nodes_after = count_nodes(result)
+        return result
+
+    def report(self):
+        """
+        Returns the summary of the last optimize() as text
+        """
+        removed = self.nodes_before - self.nodes_after
+        percent = 100.0 * removed / self.nodes_before if self.nodes_before else 0.0
+        return ("Optimizer : " + str(self.nodes_before) + " -> " + str(self.nodes_after) + " nodes (-"
+                + ("%.1f" % percent) + "%), " + str(self.folded) + " folded, " + str(self.simplified)
+                + " simplified, " + str(self.branches) + " branches removed")
+
+    def stmt_seq(self, stmts):
+        """
+        Optimizes a statement sequence, a decided if / repeat is replaced by the statements it runs
+
+        The nested sequences are walked with an explicit stack of (statement iterator, result
+        list) frames so deep programs do not hit the recursion limit. An if / repeat is added
+        to its result list right away with empty lists, which the frames pushed for its parts
+        fill, and the part run by a decided one is optimized straight into the enclosing list
+        """
+        result = []
+        stack = [(iter(stmts), result)]
+        while stack:
+            stmts_iter, target = stack[-1]
+            stmt = next(stmts_iter, None)
+            if stmt is None:
+                stack.pop()
+                continue
+            cls = stmt.__class__
+            if cls is Assign:
+                target.append(Assign(stmt.name, self.expr(stmt.expr)))
+            elif cls is Write:
+                target.append(Write(self.expr(stmt.expr)))
+            elif cls is Read:
+                target.append(stmt)
+            elif cls is If:
+                test = self.expr(stmt.test)
+                if test.__class__ is Const:
+                    self.branches += 1
+                    if int(test.value) != 0:
+                        stack.append((iter(stmt.then_part), target))
+                    elif stmt.else_part is not None:
+                        stack.append((iter(stmt.else_part), target))
+                else:
+                    node = If(test, [], None if stmt.else_part is None else [])
+                    target.append(node)
+                    if stmt.else_part is not None:
+                        stack.append((iter(stmt.else_part), node.else_part))
+                    stack.append((iter(stmt.then_part), node.then_part))
+            else:
+                test = self.expr(stmt.test)
+                if test.__class__ is Const and int(test.value) != 0:
+                    self.branches += 1
+                    stack.append((iter(stmt.body), target))
+                else:
+                    node = Repeat([], test)
+                    target.append(node)
+                    stack.append((iter(stmt.body), node.body))
+        return result
+
+    def expr(self, node):
+        """
+        Optimizes an expression, the operators are simplified bottom up with an explicit stack
+
+        ### Returns
+        the simplified expression node, node itself when nothing changed
+        """
+        if node.__class__ is not Op:
+            return node
+        values = []
+        stack = [(node, False)]
+        while stack:
+            current, visited = stack.pop()
+            if current.__class__ is not Op:
+                values.append(current)
+            elif visited:
+                right = values.pop()
+                values.append(self.simplify(current, values.pop(), right))
+            else:
+                stack.append((current, True))
+                stack.append((current.right, False))
+                stack.append((current.left, False))
+        return values[0]
+
+    def simplify(self, node, left, right):
+        """
+        Simplifies the operator node whose operands were optimized into left and right
+
+        ### Returns
+        the simplified expression node, node itself when nothing changed
+        """
+        op = node.op
+        left_value = int(left.value) if left.__class__ is Const else None
+        right_value = int(right.value) if right.__class__ is Const else None
+        if left_value is not None and right_value is not None:
+            value = self.fold(op, left_value, right_value)
+            if value is not None:
+                self.folded += 1
+                return Const(str(value))
+        elif right_value is not None:
+            if (right_value == 0 and (op == "+" or op == "-")) or (right_value == 1 and (op == "*" or op == "/")):
+                self.simplified += 1
+                return left
+            if right_value == 0 and op == "*" and not has_division(left):
+                self.simplified += 1
+                return Const("0")
+            if left.__class__ is Op and left.right.__class__ is Const:
+                merged = self.merge(left, op, right_value)
+                if merged is not None:
+                    self.simplified += 1
+                    return merged
+        elif left_value is not None:
+            if (left_value == 0 and op == "+") or (left_value == 1 and op == "*"):
+                self.simplified += 1
+                return right
+            if left_value == 0 and op == "*" and not has_division(right):
+                self.simplified += 1
+                return Const("0")
+        if left is node.left and right is node.right:
+            return node
+        return Op(op, left, right)
+
+    @staticmethod
+    def fold(op, left, right):
+        """
+        Returns the value of left <op> right as computed by tiny_vm, None for a division by zero
+        """
+        if op == "+":
+            return left + right
+        if op == "-":
+            return left - right
+        if op == "*":
+            return left * right
+        if op == "/":
+            if right == 0:
+                return None
+            quotient = abs(left) // abs(right)
+            return -quotient if (left < 0) != (right < 0) else quotient
+        if op == "<":
+            return 1 if left < right else 0
+        return 1 if left == right else 0
+
+    @staticmethod
+    def merge(left, op, value):
+        """
+        Merges the constant value into left, an operator with a constant right operand :
+        (x + a) + value, (x - a) + value ... as x + b and (x * a) * value as x * b
+
+        ### Returns
+        the new node, None when they do not combine
+        """
+        inner = int(left.right.value)
+        if (op == "+" or op == "-") and (left.op == "+" or left.op == "-"):
+            offset = (inner if left.op == "+" else -inner) + (value if op == "+" else -value)
+            if offset == 0:
+                return left.left
+            if offset > 0:
+                return Op("+", left.left, Const(str(offset)))
+            return Op("-", left.left, Const(str(-offset)))
+        if op == "*" and left.op == "*":
+            return Op("*", left.left, Const(str(inner * value)))
+        return None
@@ -0,0 +1,168 @@
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+
+
+class ParseCache(object):
+    """
+    On disk cache of parse results keyed by the hash of the source text, the parser
+    version and the parse options. An entry keeps the token stream, the syntax tree,
+    the parser text output and the rendered image so a hit skips the scanner,
+    the recursive descent and graphviz altogether
+
+    The cache is bounded to max_bytes, the least recently used entries are evicted first
+    (entry files are touched on every hit). Writes are atomic so several processes
+    can share the same cache directory
+
+    Entries are pickles and unpickling runs arbitrary code, so the cache directory must be
+    trusted : never point it at a directory other users can write to
+
+    ### Attributes
+    - cache_dir : the directory holding the entries, <key>.entry and <key>.img files
+    - max_bytes : the cache size limit
+    - hits, misses, evictions : the lookup statistics of this instance
+
+    ### Args
+    - cache_dir : the cache directory, created if needed
+    - max_bytes : the cache size limit, 256MB by default
+    """
+
+    def __init__(self, cache_dir=".parse_cache", max_bytes=256 * 1024 * 1024):
+        """
+        Constructor
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(in_file_dir, version, **options):
+        """
+        Returns the cache key of a parse of in_file_dir, a hash of the file content,
+        the parser version and the options affecting the results
+        """
+        digest = hashlib.sha256()
+        with open(in_file_dir, 'rb') as in_file:
+            for chunk in iter(lambda: in_file.read(1 << 16), b""):
+                digest.update(chunk)
+        digest.update(repr((version, sorted(options.items()))).encode())
+        return digest.hexdigest()
+
+    def get(self, key, need_image=False):
+        """
+        Looks an entry up, counts a hit or a miss
+
+        ### Arguments
+        - key : the entry key
+        - need_image : only entries holding a rendered image count as hits
+
+        ### Returns
+        the entry dict [tokens, tree, trace], None on a miss
+        """
+        entry_dir = self._path(key, ".entry")
+        try:
+            if need_image and not os.path.exists(self._path(key, ".img")):
+                raise IOError("no image")
+            with open(entry_dir, 'rb') as entry_file:
+                entry = pickle.load(entry_file)
+            os.utime(entry_dir, None)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key, entry, image_dir=None):
+        """
+        Stores an entry, and the image at image_dir if given, then evicts
+        the least recently used entries if the cache grew past max_bytes
+        """
+        self._atomic_write(key, ".entry", pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+        if image_dir is not None:
+            self.put_image(key, image_dir)
+        self.evict()
+
+    def put_image(self, key, image_dir):
+        """
+        Adds the rendered image of an entry
+        """
+        with open(image_dir, 'rb') as image_file:
+            self._atomic_write(key, ".img", image_file.read())
+
+    def copy_image(self, key, out_image_dir):
+        """
+        Copies the cached image of an entry to out_image_dir
+        """
+        shutil.copyfile(self._path(key, ".img"), out_image_dir)
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes
+        """
+        entries = {}
+        total = 0
+        for i in os.scandir(self.cache_dir):
+            key, ext = os.path.splitext(i.name)
+            if ext not in (".entry", ".img"):
+                continue
+            stat = i.stat()
+            size, mtime = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+            total += stat.st_size
+        for key in sorted(entries, key=lambda k: entries[k][1]):
+            if total <= self.max_bytes:
+                break
+            for ext in (".entry", ".img"):
+                try:
+                    os.remove(self._path(key, ext))
+                except OSError:
+                    pass
+            total -= entries[key][0]
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        """
+        Returns the hit/miss statistics and the current cache size
+        """
+        entries = 0
+        size = 0
+        for i in os.scandir(self.cache_dir):
+            if i.name.endswith(".entry"):
+                entries += 1
+            if i.name.endswith((".entry", ".img")):
+                size += i.stat().st_size
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": float(self.hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        """
+        Removes every entry
+        """
+        for i in os.scandir(self.cache_dir):
+            if i.name.endswith((".entry", ".img")):
+                os.remove(i.path)
+
+    def _path(self, key, ext):
+        return os.path.join(self.cache_dir, key + ext)
+
+    def _atomic_write(self, key, ext, data):
+        tmp_dir = self._path(key, ext) + ".tmp" + str(os.getpid()) + "_" + str(threading.get_ident())
+        with open(tmp_dir, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_dir, self._path(key, ext))
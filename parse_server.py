@@ -0,0 +1,269 @@
+"""
+Resident parse server : keeps warm parsers in a pool of worker processes and answers
+line-delimited JSON requests, so a client pays neither the interpreter start nor the imports
+per parse
+
+    python parse_server.py --socket /tmp/tiny.sock --jobs 4
+    python parse_server.py --stdio < requests.jsonl
+
+One request per line, either the source text or the path of a program :
+
+    {"id": 1, "source": "read x; write x", "tokens": true}
+    {"id": 2, "path": "tiny_sample_code.txt", "recover": true, "tree": "sexp", "image": "tree.png"}
+
+- id : echoed back, responses of a connection come in completion order
+- recover : report every error instead of stopping at the first one, see Parser.parse()
+- engine : "recursive" (default) or "iterative"
+- tokens : also return the tokens, [literal, type name, line, column] each
+- tree : "json" (default, see tree_export.json_parts), "sexp" or null to leave it out
+- image : also draw the tree to this path, needs PyGraphviz
+
+One response line per request :
+
+    {"id": 1, "ok": true, "error": null, "diagnostics": [], "tokens": [...], "image": null,
+     "seconds": 0.0002, "tree": [...]}
+
+The requests are decoded, parsed and encoded in the workers, the event loop only moves lines
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from diagnostic_ds import ParseError
+from parser_class import Parser
+from token_ds import TYPE_NAMES
+from tree_export import to_json, to_sexp
+
+# the warm parsers of a worker process, one per engine, built by warm_up()
+PARSERS = {}
+
+
+def warm_up():
+    """
+    Worker initializer, builds the parsers and compiles the scanner regex once per process
+    """
+    for engine in Parser.ENGINES:
+        PARSERS[engine] = Parser(engine)
+        PARSERS[engine].scanner.compile_master()
+
+
+def token_rows(tokens):
+    """
+    Returns the [literal, type name, line, column] rows of a TokenTable
+    """
+    rows = []
+    for i in range(len(tokens)):
+        line, column = tokens.position(i)
+        rows.append([tokens.literal(i), TYPE_NAMES[tokens.type_code(i)], line, column])
+    return rows
+
+
+def handle_request(line):
+    """
+    Answers one request line, runs in a worker process
+
+    ### Returns
+    the response line, JSON text without the new line
+    """
+    start = time.perf_counter()
+    response = {"id": None, "ok": False, "error": None, "diagnostics": [], "tokens": None,
+                "tree": None, "image": None}
+    tree_text = None
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("A request must be a JSON object")
+        response["id"] = request.get("id")
+        tree_format = request.get("tree", "json")
+        if tree_format not in ("json", "sexp", None):
+            raise ValueError('Unknown tree format "' + str(tree_format) + '"')
+        engine = request.get("engine", "recursive")
+        if engine not in PARSERS:
+            raise ValueError('Unknown parser engine "' + str(engine) + '"')
+        if "source" in request:
+            text = request["source"]
+        elif "path" in request:
+            in_file = open(request["path"])
+            text = in_file.read()
+            in_file.close()
+        else:
+            raise ValueError('A request needs a "source" or a "path"')
+        parser = PARSERS[engine]
+        # the scanner reports its errors on stdout, which is the response stream in --stdio mode
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                tree = parser.parse_text(text, recover=bool(request.get("recover")))
+            except ParseError as err:
+                parser.report(err)
+                tree = None
+                response["error"] = str(err)
+        if parser.tokens is None:
+            response["error"] = "Scanner error at line " + str(parser.scanner.error_line)
+        elif parser.diagnostics and response["error"] is None:
+            response["error"] = str(len(parser.diagnostics)) + " errors"
+        response["diagnostics"] = [i.to_dict() for i in parser.diagnostics]
+        if request.get("tokens") and parser.tokens is not None:
+            response["tokens"] = token_rows(parser.tokens)
+        if tree is not None:
+            if tree_format == "json":
+                # encoded apart, json.dumps() recurses once per tree level
+                tree_text = to_json(tree)
+            elif tree_format == "sexp":
+                response["tree"] = "(program" + "".join(" " + to_sexp(i) for i in tree) + ")"
+            if request.get("image"):
+                from syntaxtree_draw import SyntaxTree
+                graph = SyntaxTree(request["image"])
+                graph.draw(tree)
+                graph.show()
+                response["image"] = request["image"]
+        response["ok"] = response["error"] is None
+    except Exception as err:
+        response["error"] = err.__class__.__name__ + ": " + str(err)
+        response["ok"] = False
+    response["seconds"] = time.perf_counter() - start
+    if tree_text is None:
+        return json.dumps(response)
+    del response["tree"]
+    return json.dumps(response)[:-1] + ', "tree": ' + tree_text + "}"
+
+
+class ParseServer(object):
+    """
+    asyncio front end of the worker pool, every connection [or stdin] may have many
+    requests in flight, each one is answered as soon as its worker is done
+
+    ### Attributes
+    - pool : the ProcessPoolExecutor running handle_request()
+    - served : number of requests answered so far
+
+    ### Args
+    - jobs : number of worker processes [cpu count by default]
+    """
+
+    # longest request line accepted on a socket, a whole program travels in one line
+    LINE_LIMIT = 64 * 1024 * 1024
+
+    def __init__(self, jobs=None):
+        """
+        Constructor
+        """
+        self.pool = ProcessPoolExecutor(max_workers=jobs, initializer=warm_up)
+        self.served = 0
+
+    async def answer(self, line, write):
+        """
+        Runs one request line on the pool and writes its response line with write
+        """
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(self.pool, handle_request, line)
+        write(response + "\n")
+        self.served += 1
+
+    async def serve_lines(self, readline, write, drain=None):
+        """
+        Reads request lines until the end of the input, then waits for the pending responses
+
+        ### Arguments
+        - readline : coroutine function returning the next line, "" at the end
+        - write : writes a response line
+        - drain : optional coroutine function waiting for the written lines to be sent
+        """
+        pending = set()
+        while True:
+            line = await readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.ensure_future(self.answer(line, write))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            if drain is not None:
+                await drain()
+        if pending:
+            await asyncio.wait(pending)
+        if drain is not None:
+            await drain()
+
+    async def client(self, reader, writer):
+        """
+        Serves one socket connection
+        """
+        async def readline():
+            return (await reader.readline()).decode("utf-8")
+        try:
+            await self.serve_lines(readline, lambda text: writer.write(text.encode("utf-8")), writer.drain)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_socket(self, path):
+        """
+        Listens on the Unix domain socket path until cancelled
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        server = await asyncio.start_unix_server(self.client, path=path, limit=self.LINE_LIMIT)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def serve_stdio(self):
+        """
+        Answers the requests read from stdin on stdout, until the end of stdin
+        """
+        loop = asyncio.get_running_loop()
+
+        async def readline():
+            # a blocking read in a thread works for pipes, terminals and regular files alike
+            return await loop.run_in_executor(None, sys.stdin.readline)
+
+        def write(text):
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        await self.serve_lines(readline, write)
+
+    def close(self):
+        """
+        Stops the worker processes
+        """
+        self.pool.shutdown()
+
+
+def main(argv=None):
+    """
+    Command line interface
+    """
+    arg_parser = argparse.ArgumentParser(description="Resident TINY parse server")
+    mode = arg_parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--socket", default=None, help="listen on this Unix domain socket")
+    mode.add_argument("--stdio", action="store_true", help="read requests on stdin, answer on stdout")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=None,
+                            help="number of worker processes [cpu count by default]")
+    args = arg_parser.parse_args(argv)
+
+    server = ParseServer(args.jobs)
+    try:
+        if args.stdio:
+            asyncio.run(server.serve_stdio())
+        else:
+            asyncio.run(server.serve_socket(args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,11 @@
+import sys
+
 from parser_class import Parser
 
+# python parser.py [file name [--no-render]], the file name is asked for when not given
 MY_PARSER = Parser()
-file_name = input('File name : ')
-MY_PARSER.parse(in_file_dir=file_name)
\ No newline at end of file
+if len(sys.argv) > 1:
+    file_name = sys.argv[1]
+else:
+    file_name = input('File name : ')
+MY_PARSER.parse(in_file_dir=file_name, trace="stream", render="--no-render" not in sys.argv[2:])
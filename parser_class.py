@@ -1,5 +1,20 @@
+import os
+
 from scanner_class import Scanner
-from syntaxtree_draw import SyntaxTree
+from token_ds import Token, TokenList, TokenBuffer, MappedTokenTable, KIND_NAMES, OP_GROUP, EOF, K_NUMBER, \
+    K_IDENTIFIER, K_IF, K_THEN, K_ELSE, K_END, K_REPEAT, K_UNTIL, K_READ, K_WRITE, K_ASSIGN, \
+    K_LPAREN, K_RPAREN, K_SEMI, MUL_OP, ADD_OP, COMPARE_OP
+from diagnostic_ds import ParseError, Diagnostic
+from ast_ds import If, Repeat, Assign, Read, Write, Op, Const, Id
+from symbol_ds import SymbolTable, READ_DEF, ASSIGN_DEF, USE
+from trace_class import TraceWriter, ignore
+import iterative_parser
+
+# syntaxtree_draw, tree_export and concurrent.futures are imported by the methods using them,
+# a parse without drawing starts without loading them
+
+# bump whenever the tokens, the tree or the text output change, invalidates the ParseCache entries
+PARSER_VERSION = "2"
 
 class Parser(object):
     """
@@ -8,67 +23,432 @@ class Parser(object):
     1. Invoke the parser scan()
     2. Get the parser array of tokens
     3. Using recursive descent navigate token by token
-    4. Form the syntax tree, export it to an output file
+    4. Form the syntax tree (see ast_ds), export it to an output file
+    5. Optionally draw the tree with SyntaxTree
 
     ### Attributes
     - scanner : the scanner object
-    - graph : graphviz object, used to form the syntax tree
+    - tokens : the tokens being parsed, either the scanner TokenList, a TokenBuffer
+    over Scanner.iter_tokens() when streaming, a TokenTable in compact mode or a
+    MappedTokenTable over a memory mapped file [released by the next reset()]
+    - tree : the syntax tree of the last parse, a list of statement nodes
+    - graph : SyntaxTree drawing of tree, None unless rendering was asked for
+    PyGraphviz must be installed to render
+    - render_job : the future of the image when it is drawn by a RenderPool
     - next_token : an int that points to the next token from the scanner token array
-    PyGraphviz must be installed
-    - num_tokens : the total number of tokens to be consumed
-    - log : the text output [ONLY FOR THE ASSIGNMENT]
-    - num_nodes : the number of nodes in the syntax tree
-    - parent_node : the name of the last node to attach at the same level
-    - draw_horizontal : bool used to determine if statements are at the same scope or not
-    - draw_id : used to ensure an ID will not be drawn in the specific cases for read, assign
-    it is set to false everytime we are drawing a block that is part of other block
-    e.g. the 'then' @ the 'if block'
-    - last_factor : the last factor node id in the graph
+    - num_tokens : the total number of tokens to be consumed, None when streaming
+    - trace : the text output [ONLY FOR THE ASSIGNMENT], one line per recognized rule,
+    either None (disabled), a list of the lines or a TraceWriter streaming them to a file
+    - emit : called with every trace line, a no-op when the trace is disabled
+    - from_cache : True if the last parse result was loaded from a ParseCache
+    - engine : "recursive" (the is_* methods) or "iterative" (see iterative_parser),
+    both give the same results, the iterative one is not bounded by the recursion limit
+    - recover : keep parsing after a syntax error, see parse()
+    - diagnostics : the Diagnostic list of the last recovering parse, sorted by position
+    - error_token : the index of the token of the last diagnostic, None before the first one
+    - metrics : the ParseMetrics of the current parse, None when not measured
+    - symbols : the SymbolTable filled by the last parse, None unless asked for
+    - optimizer : the Optimizer that simplified the tree of the last parse, None unless asked for
+
+    ### Args
+    - engine : "recursive" by default
+    - scanner : the Scanner to use, a default one otherwise
+
+    A parser holds the state of the parse it runs, one instance runs any number of parses
+    one after the other [every entry point starts with reset()]. To parse concurrently,
+    each thread takes its own context() : it shares the engine and the scanner configuration
+    and has a state of its own
+
+    Every is_* method returns the node it recognized, False otherwise. Tokens are matched
+    by their kind code (see token_ds) rather than by their literal
     """
 
-    def __init__(self):
-        self.scanner = Scanner()
+    ENGINES = ("recursive", "iterative")
+
+    # the position in the statement rules [is_if, is_repeat, is_assig, is_read, is_write] of
+    # the first one that can match a leading token kind, the following ones are still tried
+    # when it fails after consuming tokens, as in the original chain of "or"
+    STATEMENT_START = {K_IF: 0, K_REPEAT: 1, K_IDENTIFIER: 2, K_READ: 3, K_WRITE: 4}
+
+    def __init__(self, engine="recursive", scanner=None):
+        if engine not in self.ENGINES:
+            raise ValueError('Unknown parser engine "' + str(engine) + '"')
+        self.engine = engine
+        self.scanner = Scanner() if scanner is None else scanner
+        self.tokens = None
+        self.statement_rules = (self.is_if, self.is_repeat, self.is_assig, self.is_read, self.is_write)
+        self.reset()
+
+    def context(self):
+        """
+        Returns a new Parser with the same engine and a context() of the scanner,
+        for a parse running alongside the ones of this parser
+        """
+        return Parser(self.engine, self.scanner.context())
+
+    def reset(self):
+        """
+        Forgets everything about the previous parse so the same parser can be used again
+        """
+        self.scanner.reset()
+        if self.tokens.__class__ is MappedTokenTable:
+            self.tokens.close()
+        self.tokens = None
+        self.tree = None
         self.graph = None
+        self.render_job = None
         self.next_token = 0
         self.num_tokens = 0
-        self.log = ""
-        self.num_nodes = 0
-        self.parent_node = None
-        self.draw_horizontal = True
-        self.draw_id = False
-        self.last_factor = None
-        self.draw_id_block = True
+        self.trace = None
+        self.emit = ignore
+        self.from_cache = False
+        self.recover = False
+        self.diagnostics = []
+        self.error_token = None
+        self.metrics = None
+        self.symbols = None
+        self.optimizer = None
 
     def parse(self, in_file_dir="tiny_sample_code.txt", out_file_dir="parser_output.txt",
-             out_image_dir="syntax_tree_output.png"):
+             out_image_dir="syntax_tree_output.png", stream=False, compact=False, render=True,
+              trace=None, render_pool=None, cache=None, recover=False, mapped=False, export=None,
+              metrics=None, symbols=False, optimize=False, save=None):
         """
         Implements the parse functionality. Attempts to 
         1. scan the input file
         2. check everything is ok from the scanner side
         3. form the syntax tree and the parser output file
+        4. draw the syntax tree image, unless render is False
 
         Note : Everything is considered at the same [or a relative] directory to the code
         this includes inputs and outputs
         ### Arguments
         - in_file_dir : input tiny code file in a .txt format
-        - out_file_dir : the parser text output
+        - out_file_dir : the parser text output, only written when tracing
         - out_image_dir : the image output for the syntax tree
+        - stream : consume the tokens lazily through Scanner.iter_tokens() instead of
+        scanning the whole file first, scanner errors are then raised as ValueError
+        - compact : scan into a TokenTable, no Token object is built per token
+        - mapped : same as compact over a memory mapped file, see Scanner.scan_mapped()
+        - export : also write the tree to this .dot, .json or .sexp file (see tree_export),
+        no graphviz is needed for it
+        - save : also write the tokens and the tree to this binary file, reloaded without
+        parsing by saved_parse.SavedParse
+        - render : draw the tree to out_image_dir, a parse only run skips graphviz entirely
+        - render_pool : RenderPool doing the drawing in the background, parse then returns
+        as soon as the tree is built and the image future is kept at render_job
+        - trace : None to disable the text output, "list" to collect it at Parser.trace
+        and write it at the end or "stream" to flush it to out_file_dir while parsing
+        - cache : ParseCache, a hit restores the tokens, tree, text output and image
+        without scanning, parsing or drawing
+        - recover : report every scanner and syntax error at diagnostics instead of stopping
+        at the first one. Invalid characters are skipped, after a syntax error the tokens are
+        skipped up to the next ";", "end" or "until" and the statement is left out of the tree.
+        Tokens left after the program, ignored otherwise, are reported too. Always scans
+        into a TokenTable, mapped or not [stream and compact are ignored], and never uses the cache
+        - metrics : ParseMetrics adding the time of every stage and the counts of this parse
+        - symbols : also fill a SymbolTable at Parser.symbols while parsing, the variables and
+        the positions of their definitions and uses. Never uses the cache
+        - optimize : fold the constants and remove the dead branches of the tree before drawing
+        and exporting it (see optimizer_class), the trace and the symbols still describe the source
+
+        ### Returns
+        the syntax tree, None in case the scanner failed
+        """
+        self.reset()
+        self.recover = recover
+        self.metrics = metrics
+        if symbols:
+            self.symbols = SymbolTable()
+        if recover or symbols:
+            cache = None
+        if cache is not None:
+            if metrics is not None:
+                started = metrics.now()
+            # the dialect and the engines change the tokens, the tree or the errors as well
+            scanner = self.scanner
+            cache_key = cache.key(in_file_dir, PARSER_VERSION, stream=stream, render=render,
+                                  image=os.path.splitext(out_image_dir)[1], trace=trace is not None,
+                                  optimize=optimize, res_words=sorted(scanner.res_words),
+                                  sp_symbols=sorted(scanner.sp_symbols), scanner=scanner.engine,
+                                  engine=self.engine)
+            hit = self.load_cached(cache, cache_key, out_file_dir, out_image_dir, render, trace,
+                                   render_pool)
+            if metrics is not None:
+                metrics.add_stage("cache_load", started)
+            if hit:
+                if export is not None:
+                    self.export_tree(export)
+                if save is not None:
+                    self.save_tree(save)
+                if metrics is not None:
+                    self.count_parse()
+                return self.tree
+        if recover or mapped:
+            scan = self.scanner.scan_mapped if mapped else self.scanner.scan_table
+            self.tokens = scan(in_file_dir, recover=recover, metrics=metrics)
+            if self.tokens is None:
+                return
+            self.diagnostics.extend(self.scanner.diagnostics)
+            self.num_tokens = len(self.tokens)
+        elif stream:
+            self.tokens = TokenBuffer(self.scanner.iter_tokens(in_file_dir))
+            self.num_tokens = None
+        elif compact:
+            self.tokens = self.scanner.scan_table(in_file_dir, metrics=metrics)
+            if self.tokens is None:
+                return
+            self.num_tokens = len(self.tokens)
+        else:
+            s = self.scanner.scan(in_file_dir, write_opt=False, metrics=metrics)
+            if s == 0:
+                return
+            self.tokens = self.scanner.tokens
+            self.num_tokens = len(self.tokens)
+        if trace == "stream":
+            self.trace = TraceWriter(out_file_dir)
+        elif trace == "list":
+            self.trace = []
+        else:
+            self.trace = None
+        self.emit = ignore if self.trace is None else self.trace.append
+
+        # Attempts to check if the progam is a sequence of statements
+        try:
+            self.tree = self.run_program()
+            if self.tree:
+                self.emit("Program found")
+        finally:
+            if trace == "stream":
+                self.trace.close()
+        if recover:
+            self.diagnostics.sort(key=lambda i: (i.line, i.column))
+        if self.diagnostics:
+            print("Parser finished with " + str(len(self.diagnostics)) + " errors")
+        else:
+            print("Parser executed successfully")
+        if optimize and self.tree:
+            self.optimize_tree()
+        if metrics is not None:
+            started = metrics.now()
+        if trace == "list":
+            out_file = open(out_file_dir, 'w')
+            out_file.write(self.log+"\n")
+            out_file.close()
+            if metrics is not None:
+                started = metrics.add_stage("trace_write", started)
+        if render:
+            from syntaxtree_draw import SyntaxTree
+            self.graph = SyntaxTree(out_image_dir)
+            self.graph.draw(self.tree)
+            if metrics is not None:
+                started = metrics.add_stage("tree_build", started)
+                metrics.count("graph_nodes", len(self.graph.nodes))
+            self.render_job = self.graph.show(render_pool)
+            if metrics is not None:
+                metrics.add_stage("draw", started)
+        if export is not None:
+            self.export_tree(export)
+        if save is not None:
+            self.save_tree(save)
+        if cache is not None:
+            if metrics is not None:
+                started = metrics.now()
+            self.store_cached(cache, cache_key, out_file_dir, out_image_dir, render, trace)
+            if metrics is not None:
+                metrics.add_stage("cache_store", started)
+        if metrics is not None:
+            self.count_parse()
+        return self.tree
+
+    def optimize_tree(self):
+        """
+        Replaces the tree of the last parse by its optimized version and prints the reduction
+        """
+        from optimizer_class import Optimizer
+        if self.metrics is not None:
+            started = self.metrics.now()
+        self.optimizer = Optimizer()
+        self.tree = self.optimizer.optimize(self.tree)
+        if self.metrics is not None:
+            self.metrics.add_stage("optimize", started)
+        print(self.optimizer.report())
+
+    def export_tree(self, out_file_dir, tree_format=None):
+        """
+        Writes the tree of the last parse as text, see tree_export.export()
         """
-        s = self.scanner.scan(in_file_dir, write_opt=False)
-        if s == 0:
+        from tree_export import export
+        if self.metrics is None:
+            export(self.tree, out_file_dir, tree_format)
             return
-        self.num_tokens = len(self.scanner.tokens)
-        self.graph = SyntaxTree(out_image_dir)
+        started = self.metrics.now()
+        export(self.tree, out_file_dir, tree_format)
+        self.metrics.add_stage("export", started)
 
-        # Attempts to check if the progam is a sequence of statements
-        s = self.is_stmt_seq()
-        if s:
-            self.log += "Program found\n"
+    def save_tree(self, out_file_dir):
+        """
+        Writes the tokens and the tree of the last parse to a binary file, see saved_parse.
+        The tokens are left out when streaming, they are gone by then
+        """
+        from saved_parse import save_parse
+        if self.metrics is not None:
+            started = self.metrics.now()
+        tokens = None if self.num_tokens is None else self.tokens
+        save_parse(out_file_dir, self.tree, tokens, self.num_tokens)
+        if self.metrics is not None:
+            self.metrics.add_stage("save", started)
+
+    def load_cached(self, cache, cache_key, out_file_dir, out_image_dir, render, trace, render_pool):
+        """
+        Restores a parse result from the cache and writes its outputs,
+        returns False on a cache miss
+        """
+        entry = cache.get(cache_key, need_image=render)
+        if entry is None:
+            return False
+        if entry["tokens"] is not None:
+            self.scanner.tokens = TokenList(Token(*i) for i in entry["tokens"])
+            self.tokens = self.scanner.tokens
+            self.num_tokens = len(self.tokens)
+        self.next_token = entry["next_token"]
+        self.tree = entry["tree"]
+        self.from_cache = True
+        if trace == "list":
+            self.trace = entry["trace"]
         print("Parser executed successfully")
-        out_file = open(out_file_dir, 'w')
-        out_file.write(self.log+"\n")
-        out_file.close()
-        self.graph.show()
+        if trace is not None:
+            out_file = open(out_file_dir, 'w')
+            out_file.write("".join(i + "\n" for i in entry["trace"]) + "\n")
+            out_file.close()
+        if render:
+            cache.copy_image(cache_key, out_image_dir)
+            if render_pool is not None:
+                from concurrent.futures import Future
+                self.render_job = Future()
+                self.render_job.set_result(out_image_dir)
+        return True
+
+    def store_cached(self, cache, cache_key, out_file_dir, out_image_dir, render, trace):
+        """
+        Saves the result of the parse that just finished to the cache, the image is added
+        once it is drawn
+        """
+        lines = None
+        if trace == "list":
+            lines = self.trace
+        elif trace == "stream":
+            in_file = open(out_file_dir)
+            lines = in_file.read().split("\n")[:-2]
+            in_file.close()
+        tokens = None
+        if self.num_tokens is not None:
+            tokens = [(i.literal, i.type_code, i.kind, i.offset, i.line, i.column)
+                      for i in (self.tokens[j] for j in range(self.num_tokens))]
+        entry = {"tokens": tokens, "next_token": self.next_token, "tree": self.tree, "trace": lines}
+        if not render or self.render_job is not None:
+            cache.put(cache_key, entry)
+            if self.render_job is not None:
+                self.render_job.add_done_callback(
+                    lambda done: done.exception() is None and cache.put_image(cache_key, out_image_dir))
+        else:
+            cache.put(cache_key, entry, out_image_dir)
+
+    def parse_tokens(self, tokens, recover=False, metrics=None, symbols=False):
+        """
+        Runs the recursive descent alone over already scanned tokens [any TokenList,
+        TokenBuffer or TokenTable], without trace nor drawing
+
+        ### Args
+        - recover : collect the syntax errors at diagnostics, see parse()
+        - metrics : see parse()
+        - symbols : fill a SymbolTable at Parser.symbols, see parse()
+
+        ### Returns
+        the syntax tree
+        """
+        self.reset()
+        self.recover = recover
+        self.metrics = metrics
+        if symbols:
+            self.symbols = SymbolTable()
+        self.tokens = tokens
+        self.num_tokens = None if isinstance(tokens, TokenBuffer) else len(tokens)
+        self.tree = self.run_program()
+        if metrics is not None:
+            self.count_parse()
+        return self.tree
+
+    def parse_text(self, text, recover=False, metrics=None, symbols=False):
+        """
+        Scans the source text into a TokenTable and runs the recursive descent over it,
+        without trace nor drawing. The new lines are read as open() does for a file : "\r\n"
+        and "\r" become "\n", and a text not ending with one gets it, for its last token to be
+        scanned like the one of a file ending with a new line
+
+        ### Args
+        - recover : collect the scanner and syntax errors at diagnostics, see parse()
+        - metrics : see parse()
+        - symbols : fill a SymbolTable at Parser.symbols, see parse()
+
+        ### Returns
+        the syntax tree, None in case the scanner failed
+        """
+        self.reset()
+        self.recover = recover
+        self.metrics = metrics
+        if symbols:
+            self.symbols = SymbolTable()
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        if text and not text.endswith("\n"):
+            text += "\n"
+        self.tokens = self.scanner.scan_string(text, recover, metrics)
+        if self.tokens is None:
+            return
+        self.diagnostics.extend(self.scanner.diagnostics)
+        self.num_tokens = len(self.tokens)
+        self.tree = self.run_program()
+        if recover:
+            self.diagnostics.sort(key=lambda i: (i.line, i.column))
+        if metrics is not None:
+            self.count_parse()
+        return self.tree
+
+    def run_program(self):
+        """
+        Runs is_program(), as the timed parse stage when measured
+        """
+        metrics = self.metrics
+        if metrics is None:
+            return self.is_program()
+        started = metrics.now()
+        if metrics.rules and self.engine == "recursive":
+            metrics.instrument(self)
+        try:
+            return self.is_program()
+        finally:
+            metrics.release(self)
+            metrics.add_stage("parse", started)
+
+    def count_parse(self):
+        """
+        Adds the counts of the parse that just finished to metrics
+        """
+        metrics = self.metrics
+        metrics.count("parses")
+        metrics.count("tokens", self.num_tokens if self.num_tokens is not None else self.next_token)
+        metrics.count("diagnostics", len(self.diagnostics))
+        metrics.count_tree(self.tree)
+
+    @property
+    def log(self):
+        """
+        the collected trace text, empty unless the trace is kept as a list
+        """
+        if self.trace.__class__ is not list:
+            return ""
+        return "".join(i + "\n" for i in self.trace)
 
     def match(self, val):
         """
@@ -77,7 +457,24 @@ class Parser(object):
         """
         if self.is_done():
             return False
-        if self.scanner.tokens[self.next_token].literal == val:
+        if self.tokens.literal(self.next_token) == val:
+            self.next_token += 1
+            return True
+        return False
+
+    def peek(self):
+        """
+        Returns the kind code of the current token, EOF after the last one
+        """
+        if self.is_done():
+            return EOF
+        return self.tokens.kind(self.next_token)
+
+    def match_kind(self, kind):
+        """
+        Same as match() with a kind code instead of a literal
+        """
+        if self.peek() == kind:
             self.next_token += 1
             return True
         return False
@@ -86,330 +483,313 @@ class Parser(object):
         """
         Indicate the parsing consumed all the tokens from the scanner
         """
+        if self.num_tokens is None:
+            return not self.tokens.available(self.next_token)
         return self.num_tokens == self.next_token
 
+    def report(self, err):
+        """
+        Records the ParseError err at diagnostics, located at the token where the parsing stopped.
+        A second error at the same token is only a consequence of the first one and is dropped
+        """
+        if self.error_token == self.next_token:
+            return
+        self.error_token = self.next_token
+        line, column = self.locate_token(self.next_token)
+        found = "<eof>" if self.is_done() else self.tokens.literal(self.next_token)
+        self.diagnostics.append(Diagnostic(line, column, err.expected, found, str(err)))
+
+    def locate_token(self, index):
+        """
+        Returns the (line, column) of the token #index, (None, None) for tokens without positions
+        """
+        position = getattr(self.tokens, "position", None)
+        return position(index) if position is not None else (None, None)
+
+    def add_symbol(self, name, kind, token_index, position=None):
+        """
+        Records an occurrence of the variable name at the token #token_index in symbols,
+        position is its (line, column) when it was taken before a TokenBuffer released the token
+        """
+        line, column = self.locate_token(token_index) if position is None else position
+        self.symbols.add(name, kind, token_index, line, column)
+
+    def synchronize(self):
+        """
+        Skips the tokens up to the next ";", "end" or "until" [not consumed] after a syntax error
+        """
+        kind = self.peek()
+        while kind != K_SEMI and kind != K_END and kind != K_UNTIL and kind != EOF:
+            self.next_token += 1
+            kind = self.peek()
+
+    def is_program(self):
+        """
+        The top rule, a statement sequence parsed by the engine chosen at the constructor
+        """
+        stmts = self.engine_stmt_seq()
+        while self.recover and not self.is_done():
+            # a stray "end" / "until" or a missing ";", parse what follows as more statements
+            self.report(ParseError('Unexpected token after the statement sequence', '";"'))
+            if self.peek() not in self.STATEMENT_START:
+                self.next_token += 1
+                self.match_kind(K_SEMI)
+            if not self.is_done():
+                stmts.extend(self.engine_stmt_seq())
+        return stmts
+
+    def engine_stmt_seq(self):
+        """
+        Parses a statement sequence with the engine chosen at the constructor
+        """
+        if self.engine == "iterative":
+            return iterative_parser.stmt_seq(self)
+        return self.is_stmt_seq()
+
     def is_stmt_seq(self):
         """
         Check if the current token represents a statement sequence by calling other
         checking helper functions
         The top checking function
-        """
-        # check if the current token represents a statement
-        s = self.is_statement()
 
-        # now check the optional semicolon
-        while self.match(';'):
-            s = self.is_statement()
-        self.log += "Statement_Sequence Found\n"
-        return s
+        Returns the list of the statement nodes
+        """
+        stmts = []
+        symbols = self.symbols
+        while True:
+            if symbols is not None:
+                mark = symbols.mark()
+            # check if the current token represents a statement
+            try:
+                stmts.append(self.is_statement())
+            except ParseError as err:
+                if not self.recover:
+                    raise
+                # the statement is left out of the tree, so are its variables
+                if symbols is not None:
+                    symbols.rollback(mark)
+                self.report(err)
+                self.synchronize()
+            # now check the optional semicolon
+            if not self.match_kind(K_SEMI):
+                break
+        self.emit("Statement_Sequence Found")
+        return stmts
 
     def is_statement(self):
         """
         Check if the current token represents a statement
         """
-        s = self.is_if() or self.is_repeat() or self.is_assig() or self.is_read()\
-            or self.is_write()
+        s = False
+        start = self.STATEMENT_START.get(self.peek())
+        if start is not None:
+            symbols = self.symbols
+            if symbols is not None:
+                mark = symbols.mark()
+            for rule in self.statement_rules[start:]:
+                s = rule()
+                if s:
+                    break
+                if symbols is not None:
+                    symbols.rollback(mark)
         if not s:
-            raise ValueError('Error, malformed statement')
-        self.log += "Statement Found\n"
+            raise ParseError('Error, malformed statement', 'a statement')
+        self.emit("Statement Found")
         return s
 
     def is_if(self):
         """
         Attempts to check if the current token represents an if statement
         """
-        s = self.match('if')
+        s = self.match_kind(K_IF)
         if not s:
             return False
         ## now we are sure an if exisits
-        self.parent_node = self.graph.create_node('I', "If", inline_with=self.parent_node)
-        self.draw_horizontal = False
-        rec = self.parent_node
-        if_node = self.parent_node 
-        s = self.is_expr()
-        if not s:
+        test = self.is_expr()
+        if not test:
             return False
         # throw an error
-        s = self.match('then')
-        if not s:
-            raise ValueError('Missing "then" after an if statement')
-        self.parent_node = if_node
-        self.draw_horizontal = False
-        s = self.is_stmt_seq()
+        s = self.match_kind(K_THEN)
         if not s:
-            return False
+            raise ParseError('Missing "then" after an if statement', '"then"')
+        then_part = self.is_stmt_seq()
         # else is optional
-        if self.match('else'):
-            self.parent_node = if_node
-            self.draw_horizontal = False
-            s = self.is_stmt_seq()
-            if not s:
-                return False
-        s = self.match('end')
+        else_part = None
+        if self.match_kind(K_ELSE):
+            else_part = self.is_stmt_seq()
+        s = self.match_kind(K_END)
         if not s:
-            raise ValueError('Missing "end" after an if statement')
-        # now we are sure an if exists, return the parent node to the if block
-        self.parent_node = rec
-        self.draw_horizontal = True
-        self.log += "IF_statement found\n"
-        return True
+            raise ParseError('Missing "end" after an if statement', '"end"')
+        self.emit("IF_statement found")
+        return If(test, then_part, else_part)
 
     def is_repeat(self):
         """
         Check if the current token is for a repeat statement
         """
-        s = self.match('repeat')
+        s = self.match_kind(K_REPEAT)
         if not s:
             return False
-        # now a repeat exists, draw its block and keep a reference to the current parent
-        self.parent_node = self.graph.create_node('R', "Repeat", inline_with=self.parent_node)
-        repeat_node = self.parent_node
-        self.draw_horizontal = False
         # check if statement sequence after the repeat
-        s = self.is_stmt_seq()
-        if not s:
-            return False
-        s = self.match('until')
+        body = self.is_stmt_seq()
+        s = self.match_kind(K_UNTIL)
         if not s:
-            raise ValueError('Missing "until" after a repeat statement')
-        # when creating the rec, connect it to the repeat block
-        self.parent_node = repeat_node
-        self.draw_horizontal = False
-        s = self.is_expr()
-        if not s:
-            raise ValueError('Missing "expression" after until statement')
-        # return the parent node again
-        self.draw_horizontal = True
-        self.log += "Repeat_statement found\n"
-        return True
+            raise ParseError('Missing "until" after a repeat statement', '"until"')
+        test = self.is_expr()
+        if not test:
+            raise ParseError('Missing "expression" after until statement', 'an expression')
+        self.emit("Repeat_statement found")
+        return Repeat(body, test)
 
     def is_assig(self):
         """
         Check if the current token is for an assignment statement
         """
-        self.draw_id = False
-        self.draw_id_block = False
-        s = self.is_identifier()
-        self.draw_id_block = True
-        #current_draw_h = self.draw_horizontal
-        if not s:
+        target = self.is_identifier()
+        if not target:
             return False
-        s = self.match(':=')
+        s = self.match_kind(K_ASSIGN)
         if not s:
             return False
-        block_name = "Assign\n("+self.scanner.tokens[self.next_token-2].literal+")"
-        if self.draw_horizontal:
-            self.parent_node = self.graph.create_node('A', block_name, inline_with=self.parent_node)
-        else:
-            # 1- create it
-            # 2- connect it to the upper parent
-            # 3- declare it as the new parent
-            _p = self.graph.create_node('A', block_name)
-            self.graph.connect_node(self.parent_node, _p)
-            self.parent_node = _p
-        self.draw_horizontal = False
-        self.draw_id = False
-        self.last_factor = None
-        s = self.is_expr()
-        if not s:
-            raise ValueError('Missing "expression" after assignment statement')
-        if self.last_factor is not None:
-            self.graph.connect_node(self.parent_node, self.last_factor)
-        self.draw_horizontal = True#current_draw_h
-        self.log += "Assignment_Statement found\n"
-        self.draw_id = True
-        self.draw_id_block = True
-        return True 
+        if self.symbols is not None:
+            # the target is recorded after the expression, which is evaluated first
+            target_index = self.next_token - 2
+            target_position = self.locate_token(target_index)
+        expr = self.is_expr()
+        if not expr:
+            raise ParseError('Missing "expression" after assignment statement', 'an expression')
+        if self.symbols is not None:
+            self.add_symbol(target.name, ASSIGN_DEF, target_index, target_position)
+        self.emit("Assignment_Statement found")
+        return Assign(target.name, expr)
 
     def is_read(self):
         """
         Check if the current token is for a read statement
         """
-        s = self.match('read')
+        s = self.match_kind(K_READ)
         if not s:
             return False
-        #self.draw_id = False
-        self.draw_id_block = False
         s = self.is_identifier()
-        #self.draw_id = True
         if not s:
-            raise ValueError('Missing "identifier" after read statement')
-        ## Now read followed by an identifier is detected, draw it attached to the current parent
-        ## and set it as the new parent node
-        block_name = "Read\n("+self.scanner.tokens[self.next_token-1].literal+")"
-        self.parent_node = self.graph.create_node('R', block_name, inline_with=self.parent_node)
-        self.log += "Read_Statement found\n"
-        self.draw_id_block = True
-        return True
+            raise ParseError('Missing "identifier" after read statement', 'an identifier')
+        if self.symbols is not None:
+            self.add_symbol(s.name, READ_DEF, self.next_token - 1)
+        self.emit("Read_Statement found")
+        return Read(s.name)
 
     def is_write(self):
         """
         Check if the current token is for a write statement
         """
-        s = self.match("write")
+        s = self.match_kind(K_WRITE)
         if not s:
             return False
-        # get the current parent, needed in case is_expr() wanted to draw
-        #rec = self.parent_node
-        #current_draw_h = self.draw_horizontal
-        if self.draw_horizontal:
-            self.parent_node = self.graph.create_node('W', "Write", inline_with=self.parent_node)
-        else:
-            _p = self.graph.create_node('A', "Write")
-            self.graph.connect_node(self.parent_node, _p)
-            self.parent_node = _p
-        self.draw_horizontal = False
-        s = self.is_expr(True)
-        if not s:
-            raise ValueError('Missing "expression" after write statement')
-        #self.parent_node = rec
-        self.draw_horizontal = True#current_draw_h
-        self.log += "Write_Statement found\n"
-        self.draw_id = True
-        self.draw_id_block = True        
-        return True
+        expr = self.is_expr()
+        if not expr:
+            raise ParseError('Missing "expression" after write statement', 'an expression')
+        self.emit("Write_Statement found")
+        return Write(expr)
 
-    def is_expr(self, draw_id=False):
+    def is_expr(self):
         """
         Check if the current token represents an expression
         """
-        self.draw_id = draw_id
-        self.last_factor = None
         s = self.is_simple_expr()
-        # since this is not a statement, no node can exist near it
-        rec = self.parent_node
-        current_draw_h = self.draw_horizontal
         if not s:
             return False
-        if self.match('<') or self.match('='):
-            #lhs = self.last_factor
-            self.draw_id_block = True
-            self.log += "Comparison_Operator found\n"
-            block_name = "OP\n("+self.scanner.tokens[self.next_token-1].literal+")"
-            if self.draw_horizontal:
-                self.parent_node = self.graph.create_node('O', block_name, inline_with=self.parent_node, shape='circle')
-            else:
-                _p = self.graph.create_node('O', block_name, shape='circle')
-                self.graph.connect_node(self.parent_node, _p)
-                self.parent_node = _p
-            if self.last_factor is not None:
-                self.graph.connect_node(self.parent_node, self.last_factor)
-            self.draw_horizontal = False
-            self.draw_id = True
-            s = self.is_simple_expr()
-            if not s:
+        kind = self.peek()
+        if OP_GROUP[kind] == COMPARE_OP:
+            self.next_token += 1
+            self.emit("Comparison_Operator found")
+            op = KIND_NAMES[kind]
+            rhs = self.is_simple_expr()
+            if not rhs:
                 return False
-        self.draw_horizontal = current_draw_h
-        self.parent_node = rec
-        self.log += "Expression found\n"
-        return True
+            s = Op(op, s, rhs)
+        self.emit("Expression found")
+        return s
 
     def is_simple_expr(self):
         """
         Check if the current token is in a simple expression
         """
-        self.last_factor = None
         s = self.is_term()
-        rec = self.parent_node
-        current_draw_h = self.draw_horizontal
         if not s:
             return False
-        while self.match('+') or self.match('-'):
-            self.draw_id_block = True
-            self.log += "Add_Operator found\n"
-            block_name = "OP\n("+self.scanner.tokens[self.next_token-1].literal+")"
-            if self.draw_horizontal:
-                self.parent_node = self.graph.create_node('O', block_name, inline_with=self.parent_node, shape='circle')
-            else:
-                _p = self.graph.create_node('O', block_name, shape='circle')
-                self.graph.connect_node(self.parent_node, _p)
-                self.parent_node = _p
-            if self.last_factor is not None:
-                self.graph.connect_node(self.parent_node, self.last_factor)
-            self.draw_horizontal = False
-            #self.draw_id = True
-            self.last_factor = None
-            s = self.is_term()
-            if self.last_factor is not None:
-                self.graph.connect_node(self.parent_node, self.last_factor)
-                self.last_factor = None
-            if not s:
+        kind = self.peek()
+        while OP_GROUP[kind] == ADD_OP:
+            self.next_token += 1
+            self.emit("Add_Operator found")
+            op = KIND_NAMES[kind]
+            rhs = self.is_term()
+            if not rhs:
                 return False
-            self.last_factor = None
-        self.draw_horizontal = current_draw_h
-        self.parent_node = rec
-        self.log += "Simple_Expression found\n"
-        return True
+            s = Op(op, s, rhs)
+            kind = self.peek()
+        self.emit("Simple_Expression found")
+        return s
 
     def is_term(self):
         """
         Check if the current token is a term
         """
-        self.last_factor = None
         s = self.is_factor()
-        rec = self.parent_node
-        current_draw_h = self.draw_horizontal
         if not s:
             return False
-        while self.match('*') or self.match('/'):
-            self.draw_id_block = True
-            self.log += "Mul_Operator found\n"
-            block_name = "OP\n("+self.scanner.tokens[self.next_token-1].literal+")"
-            if self.draw_horizontal:
-                self.parent_node = self.graph.create_node('O', block_name, inline_with=self.parent_node, shape='circle')
-            else:
-                _p = self.graph.create_node('O', block_name, shape='circle')
-                self.graph.connect_node(self.parent_node, _p)
-                self.parent_node = _p
-            if self.last_factor is not None:
-                self.graph.connect_node(self.parent_node, self.last_factor)
-            self.draw_horizontal = False
-            self.last_factor = None
-            s = self.is_factor()
-            if self.last_factor is not None:
-                self.graph.connect_node(self.parent_node, self.last_factor)
-                self.last_factor = None            
-            if not s:
+        kind = self.peek()
+        while OP_GROUP[kind] == MUL_OP:
+            self.next_token += 1
+            self.emit("Mul_Operator found")
+            op = KIND_NAMES[kind]
+            rhs = self.is_factor()
+            if not rhs:
                 return False
-        self.parent_node = rec
-        self.log += "Term found\n"
-        return True
+            s = Op(op, s, rhs)
+            kind = self.peek()
+        self.emit("Term found")
+        return s
 
     def is_factor(self):
         """
         Check if the current token is a factor
         """
-        s = self.match('(') and self.is_expr() and self.match(')')
+        s = False
+        if self.match_kind(K_LPAREN):
+            symbols = self.symbols
+            if symbols is not None:
+                mark = symbols.mark()
+            s = self.is_expr()
+            if s and not self.match_kind(K_RPAREN):
+                s = False
+            if not s and symbols is not None:
+                # the factor falls back to what follows, the parenthesized expression is dropped
+                symbols.rollback(mark)
         s = s or self.is_number()
-        s = s or self.is_identifier()
+        if not s:
+            s = self.is_identifier()
+            if s and self.symbols is not None:
+                self.add_symbol(s.name, USE, self.next_token - 1)
         if s:
-            self.log += "Factor found\n"
-        return s 
+            self.emit("Factor found")
+        return s
 
     def is_number(self):
         """
         Check if the current token value is for a number
         """
-        if self.scanner.tokens[self.next_token].base_type == 'number':
-            s = self.graph.create_node('C', "const\n("+self.scanner.tokens[self.next_token].literal+")", shape='circle')
-            if self.draw_id:
-                self.graph.connect_node(self.parent_node, s)
-            self.last_factor = s
+        if self.peek() == K_NUMBER:
+            s = Const(self.tokens.literal(self.next_token))
             self.next_token += 1
-            return True
+            return s
         return False
 
     def is_identifier(self):
         """
         Check if the current token value is for an identifier
         """
-        s = None
-        if self.scanner.tokens[self.next_token].base_type == 'identifier':
-            if self.draw_id_block:
-                s = self.graph.create_node('C', "Id\n("+self.scanner.tokens[self.next_token].literal+")", shape='circle')            
-            if self.draw_id and self.draw_id_block:
-                self.graph.connect_node(self.parent_node, s)
-            self.last_factor = s
+        if self.peek() == K_IDENTIFIER:
+            s = Id(self.tokens.literal(self.next_token))
             self.next_token += 1
-            return True
+            return s
         return False
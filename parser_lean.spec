@@ -0,0 +1,50 @@
+# -*- mode: python -*-
+# Lean build of parser.py for job runners : parse and trace only, no tree image
+#   pyinstaller parser_lean.spec  ->  dist/parser_lean/parser_lean file.txt --no-render
+# The drawing modules are left out, the bundle must be run with --no-render
+
+block_cipher = None
+
+# project modules only imported to draw, export or batch, see the lazy imports of parser_class
+project_excludes = ['syntaxtree_draw', 'tree_export', 'render_pool', 'parse_cache',
+                    'batch_parser', 'benchmark', 'tiny_generator', 'incremental_class']
+# stdlib and third party modules the parser never loads, most of them bring a .so
+# [ssl / crypto, lzma, bz2, readline, curses, the CJK codecs, ...]
+unused_excludes = ['pygraphviz', 'concurrent', 'asyncio', 'multiprocessing', 'logging',
+                   'json', 'pickle', 'hashlib', '_hashlib', 'ssl', '_ssl', 'socket', 'select',
+                   'selectors', 'subprocess', 'lzma', '_lzma', 'bz2', '_bz2', 'readline',
+                   'curses', '_curses', 'tkinter', 'sqlite3', 'ctypes', 'decimal', '_decimal',
+                   'csv', 'unittest', 'doctest', 'pdb', 'pydoc', 'email', 'http', 'urllib',
+                   'xml', 'xmlrpc', 'distutils', 'setuptools', 'argparse', 'tracemalloc',
+                   '_codecs_cn', '_codecs_hk', '_codecs_iso2022', '_codecs_jp', '_codecs_kr',
+                   '_codecs_tw', '_multibytecodec']
+
+a = Analysis(['parser.py'],
+             pathex=[SPECPATH],
+             binaries=[],
+             datas=[],
+             hiddenimports=[],
+             hookspath=[],
+             runtime_hooks=[],
+             excludes=project_excludes + unused_excludes,
+             win_no_prefer_redirects=False,
+             win_private_assemblies=False,
+             cipher=block_cipher)
+pyz = PYZ(a.pure, a.zipped_data,
+             cipher=block_cipher)
+# one dir and no upx : nothing to unpack nor to decompress at every start
+exe = EXE(pyz,
+          a.scripts,
+          exclude_binaries=True,
+          name='parser_lean',
+          debug=False,
+          strip=True,
+          upx=False,
+          console=True )
+coll = COLLECT(exe,
+               a.binaries,
+               a.zipfiles,
+               a.datas,
+               strip=True,
+               upx=False,
+               name='parser_lean')
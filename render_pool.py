@@ -0,0 +1,135 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class RenderPool(object):
+    """
+    Renders syntax trees off the critical path : the DOT text of a finished tree is handed
+    to a pool of threads, each running the graphviz layout program as a subprocess,
+    so the caller gets a future back immediately
+
+    Identical DOT texts are laid out only once, later requests for the same text
+    are served by copying the first output. Only the max_renders most recently requested
+    texts are remembered, by their SHA-256 digest, and a failed render is forgotten as soon
+    as it fails so the next request for its text runs the layout again
+
+    ### Attributes
+    - prog : the graphviz layout program
+    - executor : the thread pool running the layout subprocesses
+    - renders : OrderedDict mapping (DOT text digest, format) to the future and the output
+    of its first render, least recently requested first
+    - max_renders : the number of renders kept in renders
+
+    ### Args
+    - workers : max number of concurrent layouts [executor default when None]
+    - prog : the graphviz layout program, "dot" by default
+    - max_renders : the number of renders remembered for reuse
+    """
+
+    def __init__(self, workers=None, prog="dot", max_renders=1024):
+        """
+        Constructor
+        """
+        self.prog = prog
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.renders = OrderedDict()
+        self.max_renders = max_renders
+        self._lock = threading.Lock()
+
+    def submit(self, dot_text, out_image_dir):
+        """
+        Queues the render of <dot_text> to out_image_dir, the output format is taken
+        from the file extension [png by default]
+
+        ### Returns
+        a future resolved with out_image_dir once the image is written
+        """
+        fmt = os.path.splitext(out_image_dir)[1][1:] or "png"
+        key = (hashlib.sha256(dot_text.encode()).digest(), fmt)
+        with self._lock:
+            first = self.renders.get(key)
+            if first is not None and self._failed(first[0]):
+                # failed before its callback dropped it
+                first = None
+            if first is None:
+                future = self.executor.submit(self._layout, dot_text, fmt, out_image_dir)
+                self.renders[key] = (future, out_image_dir)
+                self.renders.move_to_end(key)
+                if len(self.renders) > self.max_renders:
+                    self.renders.popitem(last=False)
+            else:
+                self.renders.move_to_end(key)
+        if first is None:
+            # outside of the lock, the callback runs right away if the render is already over
+            future.add_done_callback(lambda done: self._forget_failed(key, done))
+            return future
+        first, first_dir = first
+        if os.path.abspath(first_dir) == os.path.abspath(out_image_dir):
+            return first
+        future = Future()
+        first.add_done_callback(lambda done: self._copy(done, out_image_dir, future))
+        return future
+
+    def render_many(self, jobs):
+        """
+        Queues a batch of renders
+
+        ### Arguments
+        - jobs : iterable of (DOT text, out_image_dir) pairs
+
+        ### Returns
+        the list of their futures
+        """
+        return [self.submit(dot_text, out_image_dir) for dot_text, out_image_dir in jobs]
+
+    def close(self, wait=True):
+        """
+        Stops accepting renders, waits for the queued ones unless wait is False
+        """
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _forget_failed(self, key, done):
+        """
+        Drops the render <done> of key if it failed
+        """
+        if self._failed(done):
+            with self._lock:
+                if key in self.renders and self.renders[key][0] is done:
+                    del self.renders[key]
+
+    @staticmethod
+    def _failed(future):
+        """
+        Returns true if future is over without a result
+        """
+        return future.done() and (future.cancelled() or future.exception() is not None)
+
+    def _layout(self, dot_text, fmt, out_image_dir):
+        """
+        Runs the layout program, the DOT text is given on its stdin
+        """
+        subprocess.run([self.prog, "-T" + fmt, "-o", out_image_dir], input=dot_text.encode(),
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        return out_image_dir
+
+    @staticmethod
+    def _copy(done, out_image_dir, future):
+        """
+        Completes <future> with a copy of the already rendered image of <done>
+        """
+        try:
+            shutil.copyfile(done.result(), out_image_dir)
+            future.set_result(out_image_dir)
+        except Exception as err:
+            future.set_exception(err)
@@ -0,0 +1,499 @@
+"""
+Binary save file of a parse : the tokens and the syntax tree, reloaded without scanning nor
+parsing (see Parser.parse(save=...))
+
+    save_parse("program.tpb", parser.tree, parser.tokens)
+    saved = SavedParse("program.tpb")
+    saved.tokens.literal(0), saved.statement(0), saved.tree()
+
+Layout, native byte order, every part 8 bytes aligned so the arrays are read in place from
+a memory mapping :
+
+- header : MAGIC, FORMAT_VERSION (u16), BYTE_ORDER_MARK (u16), the number of records (u32)
+- records, each one a tag (4 bytes), a count (u32), the payload length (u64), then the payload
+padded to 8 bytes. A reader skips the tags it does not know
+  - STRS : count strings, count + 1 offsets (u32) into the UTF-8 text that follows,
+  the identifiers, numbers, operators and token literals are stored once each
+  - TOKS : count tokens, one column after the other : the source offsets (i32, one more for
+  the end of the input, -1 without a position, so sources up to 2GB), the literal string ids
+  (i32), the type codes and the kind codes (i8)
+  - LINS : count lines, the offsets of their first characters (i64), the token positions are
+  found from them as in a TokenTable
+  - TREE : count top level statements, their end offsets (i32) into the code that follows,
+  the nodes in postorder as i32 words, see encode_tree()
+
+The file is only read through the mapping, several processes loading the same file share
+its pages
+"""
+import mmap
+import struct
+from array import array
+from bisect import bisect_right
+
+from ast_ds import If, Repeat, Assign, Read, Write, Op, Const, Id
+from token_ds import Token
+
+MAGIC = b"TINYPRS\x00"
+FORMAT_VERSION = 1
+BYTE_ORDER_MARK = 0x0102
+HEADER = struct.Struct("=8sHHI")
+RECORD = struct.Struct("=4sIQ")
+
+# node codes of the tree records, the words following the code are listed
+T_IF = 0          # then count, else count [-1 without else], after the test and the parts
+T_REPEAT = 1      # body count, after the body and the test
+T_ASSIGN = 2      # name string id, after the expression
+T_READ = 3        # name string id
+T_WRITE = 4       # after the expression
+T_OP = 5          # operator string id, after the left and right operands
+T_CONST = 6       # value string id
+T_ID = 7          # name string id
+
+
+def pad(length):
+    """
+    Returns the padding bytes bringing length to a multiple of 8
+    """
+    return b"\x00" * (-length % 8)
+
+
+class StringTable(object):
+    """
+    Interns the strings of a save file, every distinct string gets an id
+
+    ### Attributes
+    - ids : string to its id
+    - strings : the strings in id order
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, text):
+        """
+        Returns the id of text, a new one the first time
+        """
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def payload(self):
+        """
+        Returns the STRS record payload
+        """
+        blobs = [i.encode("utf-8") for i in self.strings]
+        offsets = array('I', [0])
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+        head = offsets.tobytes()
+        return head + pad(len(head)) + b"".join(blobs)
+
+
+def encode_tokens(tokens, num_tokens, strings):
+    """
+    Returns the TOKS and the LINS record payloads of the first num_tokens tokens. The columns
+    of a TokenTable are copied as they are, other tokens are read one by one and the line
+    starts are worked out from their positions
+    """
+    intern = strings.intern
+    literal = tokens.literal
+    literals = array('i', [intern(literal(i)) for i in range(num_tokens)])
+    if hasattr(tokens, "line_starts"):
+        end_line, end_column = tokens.position(num_tokens)
+        starts = array('i', tokens.starts[:num_tokens])
+        starts.append(tokens.starts[num_tokens] if num_tokens < len(tokens) else len(tokens.source))
+        line_starts = array('q', tokens.line_starts)
+        type_codes = array('b', tokens.type_codes[:num_tokens])
+        kinds = array('b', tokens.kinds[:num_tokens])
+    else:
+        starts = array('i')
+        type_codes = array('b')
+        kinds = array('b')
+        # line to the offset of its first character, known from the tokens on it
+        known = {}
+        for i in range(num_tokens):
+            token = tokens[i]
+            type_codes.append(token.type_code)
+            kinds.append(token.kind)
+            if token.line is None or token.offset is None:
+                starts.append(-1)
+            else:
+                starts.append(token.offset)
+                known[token.line] = token.offset - token.column + 1
+        end_line, end_column = tokens.position(num_tokens)
+        if end_line is None or not known:
+            starts.append(-1)
+        else:
+            # the end is on the line of the last token, right after it
+            last = num_tokens - 1
+            starts.append(starts[last] + end_column - tokens.position(last)[1])
+        # a line without tokens starts with the next one, so bisect_right never picks it
+        line_starts = array('q', [0] * max(known or (0,)))
+        following = starts[-1] if starts[-1] >= 0 else 0
+        for line in range(len(line_starts), 0, -1):
+            following = known.get(line, following)
+            line_starts[line - 1] = following
+    payload = b"".join(i.tobytes() for i in (starts, literals, type_codes, kinds))
+    return payload, line_starts.tobytes()
+
+
+def encode_tree(tree, strings):
+    """
+    Returns the TREE record payload : the end offsets of the top level statements, then
+    every node after its children (postorder) so the reader rebuilds the tree with a stack,
+    no recursion and no child offsets needed
+    """
+    code = array('i')
+    ends = array('i')
+    for stmt in tree:
+        stack = [(stmt, False)]
+        while stack:
+            node, done = stack.pop()
+            cls = node.__class__
+            if not done:
+                stack.append((node, True))
+                if cls is If:
+                    children = [node.test] + node.then_part + (node.else_part or [])
+                elif cls is Repeat:
+                    children = node.body + [node.test]
+                elif cls is Assign or cls is Write:
+                    children = [node.expr]
+                elif cls is Op:
+                    children = [node.left, node.right]
+                else:
+                    children = ()
+                stack.extend((i, False) for i in reversed(children))
+            elif cls is Id:
+                code.extend((T_ID, strings.intern(node.name)))
+            elif cls is Const:
+                code.extend((T_CONST, strings.intern(node.value)))
+            elif cls is Op:
+                code.extend((T_OP, strings.intern(node.op)))
+            elif cls is Assign:
+                code.extend((T_ASSIGN, strings.intern(node.name)))
+            elif cls is Read:
+                code.extend((T_READ, strings.intern(node.name)))
+            elif cls is Write:
+                code.append(T_WRITE)
+            elif cls is Repeat:
+                code.extend((T_REPEAT, len(node.body)))
+            else:
+                code.extend((T_IF, len(node.then_part), -1 if node.else_part is None else len(node.else_part)))
+        ends.append(len(code))
+    return ends.tobytes() + code.tobytes()
+
+
+def save_parse(out_file_dir, tree, tokens=None, num_tokens=None):
+    """
+    Writes a save file
+
+    ### Arguments
+    - out_file_dir : the file to write
+    - tree : the list of the top level statement nodes, None to leave the tree out
+    - tokens : TokenList, TokenTable ... to store as well, None to leave them out
+    - num_tokens : how many of the tokens to store, all of them by default
+    """
+    strings = StringTable()
+    records = []
+    if tokens is not None:
+        if num_tokens is None:
+            num_tokens = len(tokens)
+        payload, line_starts = encode_tokens(tokens, num_tokens, strings)
+        records.append((b"TOKS", num_tokens, payload))
+        records.append((b"LINS", len(line_starts) // 8, line_starts))
+    if tree is not None:
+        records.append((b"TREE", len(tree), encode_tree(tree, strings)))
+    records.insert(0, (b"STRS", len(strings.strings), strings.payload()))
+    out_file = open(out_file_dir, 'wb')
+    out_file.write(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER_MARK, len(records)))
+    for tag, count, payload in records:
+        out_file.write(RECORD.pack(tag, count, len(payload)))
+        out_file.write(payload)
+        out_file.write(pad(len(payload)))
+    out_file.close()
+
+
+class SavedTokens(object):
+    """
+    The tokens of a save file, read in place from the mapping. It has the accessors the parser
+    reads tokens through, Parser.parse_tokens() runs over it
+
+    ### Attributes
+    - saved : the SavedParse holding the string table
+    - starts, literal_ids, type_codes, kinds : memoryviews of the columns, starts has one more
+    entry, the end of the input
+    - line_starts : memoryview of the offsets of the lines
+    """
+
+    def __init__(self, saved, view, count, line_starts):
+        """
+        Constructor, view is the TOKS payload
+        """
+        self.saved = saved
+        end = 4 * (count + 1)
+        self.starts = view[:end].cast('i')
+        self.literal_ids = view[end:end + 4 * count].cast('i')
+        end += 4 * count
+        self.type_codes = view[end:end + count].cast('b')
+        self.kinds = view[end + count:end + 2 * count].cast('b')
+        self.line_starts = line_starts
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        """
+        builds a Token object for the token #index
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('token index out of range')
+        start = self.starts[index]
+        line, column = self.position(index)
+        return Token(self.literal(index), self.type_codes[index], self.kinds[index],
+                     None if start < 0 else start, line, column)
+
+    def literal(self, index):
+        """
+        returns the literal of the token #index
+        """
+        return self.saved.string(self.literal_ids[index])
+
+    def type_code(self, index):
+        """
+        returns the type code of the token #index
+        """
+        return self.type_codes[index]
+
+    def kind(self, index):
+        """
+        returns the kind code of the token #index
+        """
+        return self.kinds[index]
+
+    def position(self, index):
+        """
+        returns the (line, column) of the token #index, the end of the input for an index
+        past the end
+        """
+        offset = self.starts[min(index, len(self))]
+        if offset < 0 or not len(self.line_starts):
+            return None, None
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+    def release(self):
+        """
+        Releases the memoryviews so the mapping can be closed
+        """
+        for i in (self.starts, self.literal_ids, self.type_codes, self.kinds, self.line_starts):
+            i.release()
+
+
+class SavedParse(object):
+    """
+    Reader of a save file written by save_parse(). The file is memory mapped and only the
+    header and the record boundaries are read when opening it : the tokens are read in place
+    and a statement is only rebuilt when asked for
+
+    ### Attributes
+    - source : the mmap of the file
+    - view : memoryview of the whole mapping
+    - string_offsets : memoryview of the string table offsets
+    - string_text : memoryview of the string table text
+    - string_cache : the decoded strings by id, None until one is asked for, the strings
+    not asked for yet are None
+    - tokens : the SavedTokens, None if the file has no tokens
+    - num_statements : the number of top level statements, None if the file has no tree
+    - statement_ends : memoryview of the end offsets of the statements in code
+    - code : memoryview of the tree words
+
+    ### Args
+    - in_file_dir : the save file
+
+    ### Raises
+    ValueError : if the file is not a save file of this format version
+    """
+
+    # the smallest payload of a record holding count items
+    RECORD_SIZES = {
+        b"STRS": lambda count: 4 * (count + 1),
+        b"TOKS": lambda count: 10 * count + 4,
+        b"LINS": lambda count: 8 * count,
+        b"TREE": lambda count: 4 * count,
+    }
+
+    def __init__(self, in_file_dir):
+        """
+        Constructor
+        """
+        in_file = open(in_file_dir, 'rb')
+        try:
+            self.source = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError('"' + str(in_file_dir) + '" is empty, not a saved parse')
+        finally:
+            in_file.close()
+        self.view = memoryview(self.source)
+        self.string_offsets = self.string_text = self.string_cache = None
+        self.tokens = None
+        self.num_statements = self.statement_ends = self.code = None
+        try:
+            self.read_records(in_file_dir)
+        except Exception:
+            self.close()
+            raise
+
+    def read_records(self, in_file_dir):
+        """
+        Checks the header and locates the records
+        """
+        if len(self.view) < HEADER.size:
+            raise ValueError('"' + str(in_file_dir) + '" is not a saved parse')
+        magic, version, byte_order, num_records = HEADER.unpack_from(self.view, 0)
+        if magic != MAGIC:
+            raise ValueError('"' + str(in_file_dir) + '" is not a saved parse')
+        if version != FORMAT_VERSION:
+            raise ValueError('"' + str(in_file_dir) + '" is a saved parse of format version ' + str(version)
+                             + ', ' + str(FORMAT_VERSION) + ' expected')
+        if byte_order != BYTE_ORDER_MARK:
+            raise ValueError('"' + str(in_file_dir) + '" was saved on a machine of the other byte order')
+        # every record is checked before any view is taken, a view left over by an error
+        # would keep the mapping from being closed
+        records = []
+        tokens = None
+        offset = HEADER.size
+        for _ in range(num_records):
+            if offset + RECORD.size > len(self.view):
+                raise ValueError('"' + str(in_file_dir) + '" is truncated')
+            tag, count, length = RECORD.unpack_from(self.view, offset)
+            offset += RECORD.size
+            if offset + length > len(self.view) or length < self.RECORD_SIZES.get(tag, lambda n: 0)(count):
+                raise ValueError('"' + str(in_file_dir) + '" is truncated')
+            records.append((tag, count, offset, length))
+            offset += length + (-length % 8)
+        view = self.view
+        line_starts = None
+        for tag, count, offset, length in records:
+            end = offset + length
+            if tag == b"STRS":
+                head = 4 * (count + 1)
+                self.string_offsets = view[offset:offset + head].cast('I')
+                self.string_text = view[offset + head + (-head % 8):end]
+            elif tag == b"TOKS":
+                tokens = (view[offset:end], count)
+            elif tag == b"LINS":
+                line_starts = view[offset:offset + 8 * count].cast('q')
+            elif tag == b"TREE":
+                self.num_statements = count
+                self.statement_ends = view[offset:offset + 4 * count].cast('i')
+                self.code = view[offset + 4 * count:end - (end - offset) % 4].cast('i')
+        if tokens is not None:
+            self.tokens = SavedTokens(self, tokens[0], tokens[1],
+                                      view[0:0].cast('q') if line_starts is None else line_starts)
+
+    def string(self, string_id):
+        """
+        Returns the string #string_id of the string table
+        """
+        if self.string_cache is None:
+            self.string_cache = [None] * (len(self.string_offsets) - 1)
+        text = self.string_cache[string_id]
+        if text is None:
+            start = self.string_offsets[string_id]
+            text = self.string_cache[string_id] = str(
+                self.string_text[start:self.string_offsets[string_id + 1]], "utf-8")
+        return text
+
+    def statement(self, index):
+        """
+        Returns the top level statement #index, rebuilt from its words alone
+        """
+        if self.code is None:
+            raise ValueError("The saved parse has no tree")
+        if not 0 <= index < self.num_statements:
+            raise IndexError('statement index out of range')
+        start = self.statement_ends[index - 1] if index else 0
+        return self.decode(start, self.statement_ends[index])[0]
+
+    def tree(self):
+        """
+        Returns the whole syntax tree, the list of the top level statement nodes
+        """
+        if self.code is None:
+            raise ValueError("The saved parse has no tree")
+        return self.decode(0, len(self.code))
+
+    def decode(self, start, end):
+        """
+        Rebuilds the nodes of the words code[start:end], only the strings they use are decoded
+
+        ### Returns
+        the list of the statement nodes they hold
+        """
+        string = self.string
+        words = self.code[start:end].tolist()
+        stack = []
+        i = 0
+        end = len(words)
+        while i < end:
+            op = words[i]
+            if op == T_ID:
+                stack.append(Id(string(words[i + 1])))
+                i += 2
+            elif op == T_CONST:
+                stack.append(Const(string(words[i + 1])))
+                i += 2
+            elif op == T_OP:
+                right = stack.pop()
+                stack[-1] = Op(string(words[i + 1]), stack[-1], right)
+                i += 2
+            elif op == T_ASSIGN:
+                stack[-1] = Assign(string(words[i + 1]), stack[-1])
+                i += 2
+            elif op == T_WRITE:
+                stack[-1] = Write(stack[-1])
+                i += 1
+            elif op == T_READ:
+                stack.append(Read(string(words[i + 1])))
+                i += 2
+            elif op == T_REPEAT:
+                test = stack.pop()
+                first = len(stack) - words[i + 1]
+                body = stack[first:]
+                del stack[first:]
+                stack.append(Repeat(body, test))
+                i += 2
+            elif op == T_IF:
+                else_part = None
+                if words[i + 2] >= 0:
+                    first = len(stack) - words[i + 2]
+                    else_part = stack[first:]
+                    del stack[first:]
+                first = len(stack) - words[i + 1]
+                then_part = stack[first:]
+                del stack[first:]
+                stack[-1] = If(stack[-1], then_part, else_part)
+                i += 3
+            else:
+                raise ValueError("Invalid node code " + str(op) + " in the saved parse")
+        return stack
+
+    def close(self):
+        """
+        Releases the mapping, the nodes already rebuilt stay valid
+        """
+        if self.tokens is not None:
+            self.tokens.release()
+        for i in (self.string_offsets, self.string_text, self.statement_ends, self.code):
+            if i is not None:
+                i.release()
+        self.view.release()
+        self.source.close()
@@ -1,82 +1,208 @@
-from token_ds import Token
+import mmap
+import os
+
+from diagnostic_ds import Diagnostic
+from token_ds import Token, TokenList, TokenTable, MappedTokenTable, TYPE_NAMES, NUMBER, IDENTIFIER, \
+    RESERVED_WORD, SPECIAL_SYMBOL, ASSIGNMENT, KINDS, K_NUMBER, K_IDENTIFIER, K_ASSIGN, K_OTHER
+
+# the classes of the characters out of the FSM input state, see char_class_table()
+C_INVALID = 0
+C_SPACE = 1
+C_BRACE = 2
+C_DIGIT = 3
+C_LETTER = 4
+C_COLON = 5
+C_SYMBOL = 6
+
+
+def char_class_table(sp_symbols, look_up_numbers, look_up_symbols):
+    """
+    Returns the 256 entries class table of the latin-1 characters, any other character is invalid.
+    The classes are given in the priority order of the FSM input state : "{", digits, letters,
+    ":", the special symbols then the white spaces
+    """
+    table = bytearray(256)
+    for char in " \n":
+        table[ord(char)] = C_SPACE
+    for char in sp_symbols:
+        table[ord(char)] = C_SYMBOL
+    table[ord(":")] = C_COLON
+    for char in look_up_symbols:
+        table[ord(char)] = C_LETTER
+    for char in look_up_numbers:
+        table[ord(char)] = C_DIGIT
+    table[ord("{")] = C_BRACE
+    return bytes(table)
+
 
 class Scanner(object):
     """
     Defines the scanner class implementation follows the doubly nested switch-case approach
 
     ### Attributes
-    - res_words : an array of all the reserver words for the language
-    - sp_symbols : an array of all the reserved symbols for the language
+    - res_words : a frozenset of all the reserver words for the language
+    - sp_symbols : a frozenset of all the reserved symbols for the language
+    - char_classes : the class of every latin-1 character, indexed by its code [see char_class_table()],
+    the FSM input state reads it instead of testing the character against every table
     - _tokens_file : a string of the overall value+type to be shown @ the text file [can be omitted]
-    - tokens : array of Token objects
+    only filled when scan() is asked to write it
+    - tokens : TokenList of Token objects
     - state : a variable indicating the current state. Negative value for this
     variable indicates an error; Note : 1 is the input state, 0 is the end state
     - stream_pos : a variable indicating the index at the input stream character
     - current_token_val : FSM internal variable to track the 
+    - line_text, line_no, line_offset : FSM internal variables, the line being scanned,
+    its number and the offset of its first character
+    - token_offset, token_line, token_column : FSM internal variables, the position
+    of the token being scanned, numbers and identifiers are sliced out of line_text
+    - error_line : the line of the first invalid character of the last scan, None if there is none
+    - recover : skip the invalid characters instead of stopping at the first one
+    - diagnostics : a Diagnostic per invalid character skipped by the last recovering scan
     - look_up_symbols : used to lookup for the symbols of the language
     - look_up_numbers : used to look up for a valid number
+    - engine : the scanning engine, either "fsm" (char by char state machine) or "regex"
+    (one precompiled master regex over the whole input). Both produce the same tokens
 
     ### Args
-    - res_words : An array of all the reserved words that the scanner should consider.
+    - res_words : An iterable of all the reserved words that the scanner should consider.
     By default it will assume `["if", "then", "else", "end",
     "repeat", "until", "read", "write"]`
-    - sp_symbols : An array of all the special symbols supported by the language.
-    By default it will assume `["+", "-", "*", "/", "=", "<", "(", ")", ";", ":", "="]`
-    as the only special symbols
+    - sp_symbols : An iterable of all the special symbols supported by the language, single
+    latin-1 characters. By default it will assume `["+", "-", "*", "/", "=", "<", "(", ")", ";"]`
+    as the only special symbols [":" always starts an assignment]
+    Words and symbols outside of the TINY ones are scanned with the kind K_OTHER (see token_ds)
+    - engine : "fsm" by default, "regex" selects the table-driven fast path
 
+    The configuration [res_words, sp_symbols, the look up tables and the compiled regexes]
+    is never modified after the constructor, context() gives a scanner sharing it with its own
+    scan state. Use one context per thread to scan concurrently with the same configuration
     """
 
-    def __init__(self, res_words=None, sp_symbols=None):
+    ENGINES = ("fsm", "regex")
+
+    RES_WORDS = ("if", "then", "else", "end", "repeat", "until", "read", "write")
+    SP_SYMBOLS = ("+", "-", "*", "/", "=", "<", "(", ")", ";")
+
+    # the attributes copied by context(), the rest is the scan state cleared by reset()
+    CONFIG = ("res_words", "sp_symbols", "look_up_symbols", "look_up_numbers", "char_classes", "engine")
+
+    # compiled master regexes by (symbols, numbers, letters, binary), shared by every scanner
+    MASTERS = {}
+
+    def __init__(self, res_words=None, sp_symbols=None, engine="fsm"):
         """
         out_file_dir : assumes a def. value for the dir
         """
         # Initially set the default values if not given at constructor
-        if res_words is None:
-            self.res_words = ["if", "then", "else", "end", "repeat", "until", "read", "write"]
-        if sp_symbols is None:
-            self.sp_symbols = ["+", "-", "*", "/", "=", "<", "(", ")", ";"]
+        self.res_words = frozenset(self.RES_WORDS if res_words is None else res_words)
+        self.sp_symbols = frozenset(self.SP_SYMBOLS if sp_symbols is None else sp_symbols)
+        for i in self.sp_symbols:
+            if len(i) != 1 or ord(i) > 255:
+                raise ValueError('A special symbol must be a single latin-1 character, got "' + str(i) + '"')
+        self.keep_tokens_file = True
+        self.reset()
+
+        self.look_up_symbols = "abcdefghijklmnopqrstuvwxyz"
+        self.look_up_numbers = "1234567890"
+        self.char_classes = char_class_table(self.sp_symbols, self.look_up_numbers, self.look_up_symbols)
+
+        if engine not in self.ENGINES:
+            raise ValueError('Unknown scanner engine "' + str(engine) + '"')
+        self.engine = engine
+
+    def context(self):
+        """
+        Returns a new Scanner with the same configuration [shared, nothing is rebuilt]
+        and a clean scan state of its own
+        """
+        scanner = Scanner.__new__(Scanner)
+        for i in self.CONFIG:
+            setattr(scanner, i, getattr(self, i))
+        scanner.keep_tokens_file = True
+        scanner.reset()
+        return scanner
+
+    def reset(self):
+        """
+        Clears the result and the FSM state of the previous scan
+        """
         # initiallize the empty tokens array
         self._tokens_file = []
-        self.tokens = []
+        self.tokens = TokenList()
         #Set the initial state to the input state and the initial stream_pos
         self.state = 1
         self.stream_pos = 0
-
-        self.look_up_symbols = "abcdefghijklmnopqrstuvwxyz"
-        self.look_up_numbers = "1234567890"
+        self.error_line = None
+        self.recover = False
+        self.diagnostics = []
 
         self.current_token_val = ""
         self.current_token_type = ""
+        self.line_text = ""
+        self.line_no = 1
+        self.line_offset = 0
+        self.token_offset = self.token_line = self.token_column = None
 
-    def scan(self, in_file_dir="tiny_sample_code.txt", out_file_dir="scanner_output.txt", write_opt=True):
+    def scan(self, in_file_dir="tiny_sample_code.txt", out_file_dir="scanner_output.txt", write_opt=True,
+             recover=False, metrics=None):
         """
         Collects the tokens of in_file_dir and saves the result at out_file_dir
 
         ## Args
         - in_file_dir : input tiny code file
         - out_file_dir : text output location
+        - write_opt : write the tokens to out_file_dir, otherwise _tokens_file is not built
+        - recover : report every invalid character at diagnostics and skip it instead of
+        stopping at the first one, the scan then always goes to the end of the file
+        - metrics : ParseMetrics timing the read and tokenize stages
         
         ## Returns
         0 : in case the scanner failed
         1 : in case the scanner successfully scanned the tiny without errors
         """
+        self.reset()
+        self.keep_tokens_file = write_opt
+        self.recover = recover
+        if metrics is not None:
+            started = metrics.now()
         # read input text
         in_file = open(in_file_dir)
-        # initially we start at the 1st line
-        current_line = 1
-        for line in in_file.readlines():
-            line = line + " "
-            end = len(line[:-1])-1
-            while self.stream_pos <= end:
-                self.get_token(line[self.stream_pos])
-            self.stream_pos = 0
-            if self.state < 0:
-                break
-            current_line += 1
+        source = in_file.read() if self.engine == "regex" else in_file.readlines()
         in_file.close()
+        if metrics is not None:
+            started = metrics.add_stage("read", started)
+        if self.engine == "regex":
+            current_line = self.scan_text(source)
+        else:
+            # initially we start at the 1st line
+            current_line = 1
+            for line in source:
+                self.line_no = current_line
+                line = line + " "
+                self.line_text = line
+                end = len(line[:-1])-1
+                while self.stream_pos <= end:
+                    self.get_token(line[self.stream_pos])
+                    if self.state < 0 and recover:
+                        # the invalid character is consumed, go on from the input state
+                        self.report(current_line, self.stream_pos, line[self.stream_pos - 1])
+                        self.state = 1
+                self.stream_pos = 0
+                if self.state < 0:
+                    break
+                current_line += 1
+                self.line_offset += end + 1
+        if metrics is not None:
+            metrics.add_stage("tokenize", started)
         if self.state < 0:
+            self.error_line = current_line
             print ("ERROR IN YOUR CODE AT LINE : ", current_line)
             return 0
+        if self.diagnostics:
+            self.error_line = self.diagnostics[0].line
+            for i in self.diagnostics:
+                print ("ERROR IN YOUR CODE AT LINE : ", i.line, " COLUMN : ", i.column)
+            return 0
         # store the results
         if write_opt:
             out_file = open(out_file_dir, 'w')
@@ -86,30 +212,68 @@ class Scanner(object):
             print ("Scanner executed successfully")
         return 1
 
+    def scan_line(self, line, state=1, line_no=1, line_offset=0, colon=None):
+        """
+        Runs the FSM over a single line, starting at <state>. Used to rescan only the lines
+        touched by an edit : between two lines ending with a new line the FSM is always at
+        the input state (1), inside a comment (2) or waiting for the "=" of ":=" (5)
+
+        ## Args
+        - line : the line text, with its new line
+        - state : the FSM state at the start of the line
+        - line_no, line_offset : the line number and the offset of the first character of
+        the line the token positions are given from
+        - colon : the (offset, line, column) of the ":" when state is 5, the ":" was on a
+        previous line. After the scan, token_offset, token_line and token_column hold the
+        position of the ":" the line ends waiting for
+
+        ## Returns
+        (the tokens of the line, the FSM state after it), a negative state on error
+        """
+        self.reset()
+        self.keep_tokens_file = False
+        self.state = state
+        self.line_text = line
+        self.line_no = line_no
+        self.line_offset = line_offset
+        if state == 5:
+            self.current_token_type = ": assignment"
+            self.token_offset, self.token_line, self.token_column = colon or (line_offset, line_no, 1)
+        end = len(line) - 1
+        while self.stream_pos <= end and self.state >= 0:
+            self.get_token(line[self.stream_pos])
+        return self.tokens, self.state
+
     def get_token(self, next_in):
         """
         Reads and may consume the current input from the input stream
         """
         if self.state == 1:
+            code = ord(next_in)
+            char_class = self.char_classes[code] if code < 256 else C_INVALID
             # ignore white spaces
-            if next_in == "{":
-                self.state = 2
-            elif next_in in self.look_up_numbers:
-                self.state = 3
-                self.current_token_val = next_in
-                self.current_token_type = ": number"
-            elif next_in in self.look_up_symbols:
+            if char_class == C_SPACE:
+                pass
+            elif char_class == C_LETTER:
                 self.state = 4
-                self.current_token_val = next_in
                 self.current_token_type = ": identifier"
-            elif next_in == ":":
-                self.state = 5
-                self.current_token_type = ": assignment"
-            elif next_in in self.sp_symbols:
+                self.start_token()
+            elif char_class == C_SYMBOL:
                 self.current_token_val = next_in
                 self.current_token_type = ": special symbol"
                 self.state = 6
-            elif next_in != " " and next_in != "\n":
+                self.start_token()
+            elif char_class == C_DIGIT:
+                self.state = 3
+                self.current_token_type = ": number"
+                self.start_token()
+            elif char_class == C_COLON:
+                self.state = 5
+                self.current_token_type = ": assignment"
+                self.start_token()
+            elif char_class == C_BRACE:
+                self.state = 2
+            else:
                 #error
                 self.state = -1
         elif self.state == 2:
@@ -118,19 +282,17 @@ class Scanner(object):
                 self.state = 1
                 self.current_token_val = ""
         elif self.state == 3:
-            # input number state
-            if next_in in self.look_up_numbers:
-                self.current_token_val += next_in
-            else:
+            # input number state, the digits are sliced out of the line once it ends
+            if next_in not in self.look_up_numbers:
                 self.state = 6
+                self.current_token_val = self.line_text[self.token_column - 1:self.stream_pos]
                 #dont consume the current input
                 self.stream_pos -= 1
         elif self.state == 4:
             #letter state
-            if next_in in self.look_up_symbols:
-                self.current_token_val += next_in
-            else:
+            if next_in not in self.look_up_symbols:
                 self.state = 6
+                self.current_token_val = self.line_text[self.token_column - 1:self.stream_pos]
                 if self.current_token_val in self.res_words:
                     self.current_token_type = ": reserved word"
                 # dont consume next output
@@ -140,9 +302,293 @@ class Scanner(object):
                 self.current_token_val = ":="
                 self.state = 6
         elif self.state == 6:
-            self._tokens_file.append(self.current_token_val + self.current_token_type)
-            self.tokens.append(Token(self.current_token_val, self.current_token_type[2:]))
+            if self.keep_tokens_file:
+                self._tokens_file.append(self.current_token_val + self.current_token_type)
+            self.tokens.append(Token(self.current_token_val, self.current_token_type[2:], None,
+                                     self.token_offset, self.token_line, self.token_column))
             self.stream_pos -= 1
             self.state = 1
         self.stream_pos += 1
-        
\ No newline at end of file
+
+    def start_token(self):
+        """
+        Records the position of the token starting at the current input
+        """
+        self.token_offset = self.line_offset + self.stream_pos
+        self.token_line = self.line_no
+        self.token_column = self.stream_pos + 1
+        
+    def compile_master(self, binary=False):
+        """
+        Builds (once) the master regex used by the "regex" engine, every alternative
+        mirrors one transition out of the FSM input state, in the same priority order
+
+        binary gives the version matching the raw bytes of a file (see scan_mapped), where
+        "\\r" is skipped like the new lines the text engines read it as
+        """
+        key = (self.sp_symbols, self.look_up_numbers, self.look_up_symbols, binary)
+        master = self.MASTERS.get(key)
+        if master is not None:
+            return master
+        # only the regex engine needs re, the default FSM starts without it
+        import re
+        symbols = "".join(re.escape(i) for i in sorted(self.sp_symbols))
+        pattern = ((r"[ \r\n]+" if binary else r"[ \n]+") + r"|\{[^}]*\}?"
+                   "|(?P<number>[" + re.escape(self.look_up_numbers) + "]+)"
+                   "|(?P<identifier>[" + re.escape(self.look_up_symbols) + "]+)"
+                   "|(?P<assignment>:[^=]*=?)")
+        if symbols:
+            pattern += "|(?P<symbol>[" + symbols + "])"
+        pattern += "|(?P<error>.)"
+        # two threads may both compile it the first time, the last one is kept
+        master = re.compile(pattern.encode("ascii") if binary else pattern, re.S)
+        self.MASTERS[key] = master
+        return master
+
+    def scan_text(self, text):
+        """
+        Table-driven alternative to the get_token() loop, matches whole tokens
+        at once instead of feeding the FSM one character at a time
+
+        Keeps the FSM quirks so both engines agree : a token is only emitted once
+        the character after it has been read (a token touching the end of the input is dropped),
+        an unterminated comment or ":" silently swallows the rest of the input
+
+        ## Returns
+        the line number where the scanner stopped, used for error reporting
+        """
+        end = len(text)
+        tokens_file = self._tokens_file if self.keep_tokens_file else None
+        tokens = self.tokens
+        # the line of the last token, where it begins and the next new line after it
+        line = 1
+        line_start = 0
+        newline = text.find("\n")
+        for match in self.compile_master().finditer(text):
+            kind = match.lastgroup
+            if kind is None:
+                continue
+            start = match.start()
+            while 0 <= newline < start:
+                line += 1
+                line_start = newline + 1
+                newline = text.find("\n", line_start)
+            if kind == "error":
+                if self.recover:
+                    self.report(line, start - line_start + 1, match.group())
+                    continue
+                self.state = -1
+                return line
+            if match.end() == end:
+                break
+            val, type_code, token_kind = self.classify(kind, match)
+            if tokens_file is not None:
+                tokens_file.append(val + ": " + TYPE_NAMES[type_code])
+            tokens.append(Token(val, type_code, token_kind, start, line, start - line_start + 1))
+        return text.count("\n") + 1
+
+    def scan_table(self, in_file_dir="tiny_sample_code.txt", recover=False, metrics=None):
+        """
+        Compact version of scan(), stores the tokens in a TokenTable of
+        (type code, offset, length) entries into the file text instead of Token objects
+
+        ## Args
+        - recover : see scan(), the table is then returned even if diagnostics were reported
+        - metrics : see scan()
+
+        ## Returns
+        the TokenTable, None in case the scanner failed
+        """
+        if metrics is not None:
+            started = metrics.now()
+        in_file = open(in_file_dir)
+        text = in_file.read()
+        in_file.close()
+        if metrics is not None:
+            metrics.add_stage("read", started)
+        return self.scan_string(text, recover, metrics)
+
+    def scan_string(self, text, recover=False, metrics=None):
+        """
+        Same as scan_table() over a source text already in memory
+
+        ## Returns
+        the TokenTable, None in case the scanner failed
+        """
+        self.reset()
+        self.recover = recover
+        if metrics is None:
+            return self.fill_table(TokenTable(text), self.compile_master())
+        started = metrics.now()
+        table = self.fill_table(TokenTable(text), self.compile_master())
+        metrics.add_stage("tokenize", started)
+        return table
+
+    def scan_mapped(self, in_file_dir="tiny_sample_code.txt", recover=False, metrics=None):
+        """
+        Same as scan_table() over a memory mapped file : the master regex runs on the mapped
+        bytes, the file content is never copied into a string and the literals are only
+        decoded when read. Meant for big files
+
+        ## Args
+        - recover : see scan()
+        - metrics : see scan(), there is no read stage, the pages are read while tokenizing
+
+        ## Returns
+        the MappedTokenTable [close() it once done with the literals], None in case the scanner failed
+        """
+        self.reset()
+        self.recover = recover
+        in_file = open(in_file_dir, 'rb')
+        if os.fstat(in_file.fileno()).st_size:
+            source = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # an empty file can not be mapped
+            source = b""
+        in_file.close()
+        if metrics is not None:
+            started = metrics.now()
+        table = self.fill_table(MappedTokenTable(source), self.compile_master(binary=True))
+        if metrics is not None:
+            metrics.add_stage("tokenize", started)
+        if table is None and source:
+            source.close()
+        return table
+
+    def fill_table(self, table, master):
+        """
+        Runs the master regex over table.source and stores the tokens at table,
+        shared by scan_table() and scan_mapped()
+
+        ## Returns
+        the table, None in case the scanner failed
+        """
+        source = table.source
+        end = len(source)
+        for match in master.finditer(source):
+            kind = match.lastgroup
+            if kind is None:
+                continue
+            if kind == "error":
+                line, column = table.locate(match.start())
+                if self.recover:
+                    char = match.group()
+                    if char.__class__ is bytes:
+                        char = char.decode("ascii", "replace")
+                    self.report(line, column, char)
+                    continue
+                self.state = -1
+                self.error_line = line
+                print ("ERROR IN YOUR CODE AT LINE : ", self.error_line)
+                return None
+            if match.end() == end:
+                break
+            start = match.start()
+            _, type_code, token_kind = self.classify(kind, match)
+            table.append(type_code, start, match.end() - start, token_kind)
+        if self.diagnostics:
+            self.error_line = self.diagnostics[0].line
+        return table
+
+    def report(self, line, column, char):
+        """
+        Records an invalid character at diagnostics
+        """
+        self.diagnostics.append(Diagnostic(line, column, "a valid character", char,
+                                           "Error in your code at line " + str(line)))
+
+    def classify(self, kind, match):
+        """
+        Maps a master regex match of group <kind> to its (literal, type code, kind code)
+        """
+        if kind == "identifier":
+            val = match.group()
+            if val.__class__ is bytes:
+                # a mapped file, the valid tokens are all ascii
+                val = val.decode("ascii")
+            if val in self.res_words:
+                return val, RESERVED_WORD, KINDS.get(val, K_OTHER)
+            return val, IDENTIFIER, K_IDENTIFIER
+        if kind == "number":
+            return match.group(), NUMBER, K_NUMBER
+        if kind == "assignment":
+            return ":=", ASSIGNMENT, K_ASSIGN
+        val = match.group()
+        if val.__class__ is bytes:
+            val = val.decode("ascii")
+        return val, SPECIAL_SYMBOL, KINDS.get(val, K_OTHER)
+
+    def iter_tokens(self, source="tiny_sample_code.txt", chunk_size=65536):
+        """
+        Generator version of scan(), reads the input in fixed size chunks and yields
+        the tokens lazily, nothing is kept at tokens or _tokens_file
+
+        A match touching the end of the current chunk might continue in the next one
+        (a number, an identifier, an open comment, ...) so it is carried over and matched again
+        once more input is available. Uses the "regex" engine tables whatever the engine is
+
+        ## Args
+        - source : a file path or an already opened text file object
+        - chunk_size : the number of characters read at once
+
+        ## Raises
+        ValueError : at the first invalid character
+        """
+        in_file = open(source) if isinstance(source, str) else source
+        master = self.compile_master()
+        buf = ""
+        # the input offset of buf[0]
+        base = 0
+        # the line of the next match start and the input offset where that line begins
+        line = 1
+        line_start = 0
+        # (offset, line, column) of buf[0] when only that first char of a long match was kept
+        head = None
+        eof = False
+        try:
+            while not eof:
+                chunk = in_file.read(chunk_size)
+                eof = not chunk
+                buf += chunk
+                end = len(buf)
+                tail = end
+                for match in master.finditer(buf):
+                    kind = match.lastgroup
+                    start = match.start()
+                    if kind == "error":
+                        raise ValueError('Error in your code at line ' + str(line))
+                    if match.end() == end:
+                        tail = start
+                        break
+                    if start == 0 and head is not None:
+                        offset, token_line, column = head
+                        head = None
+                    else:
+                        offset = base + start
+                        token_line = line
+                        column = offset - line_start + 1
+                    if kind is None or kind == "assignment":
+                        newlines = buf.count("\n", start, match.end())
+                        if newlines:
+                            line += newlines
+                            line_start = base + buf.rfind("\n", start, match.end()) + 1
+                        if kind is None:
+                            continue
+                    yield Token(*self.classify(kind, match), offset, token_line, column)
+                if eof:
+                    break
+                buf = buf[tail:]
+                base += tail
+                # the body of an open comment or of ":..=" is skipped anyway, no need to keep it
+                if buf[:1] in ("{", ":") and buf[-1] not in ("}", "="):
+                    if head is None:
+                        head = (base, line, base - line_start + 1)
+                    newlines = buf.count("\n")
+                    if newlines:
+                        line += newlines
+                        line_start = base + buf.rfind("\n") + 1
+                    base += len(buf) - 1
+                    buf = buf[0]
+        finally:
+            if in_file is not source:
+                in_file.close()
@@ -0,0 +1,217 @@
+import random
+
+
+class SumNode(object):
+    """
+    A node of a SumTree, it holds one value and the size and the total of its subtree
+    """
+    __slots__ = ("value", "priority", "size", "total", "left", "right")
+
+    def __init__(self, value, priority):
+        self.value = value
+        self.priority = priority
+        self.size = 1
+        self.total = value
+        self.left = None
+        self.right = None
+
+    def update(self):
+        """
+        Recomputes the size and the total from the children
+        """
+        size = 1
+        total = self.value
+        if self.left is not None:
+            size += self.left.size
+            total += self.left.total
+        if self.right is not None:
+            size += self.right.size
+            total += self.right.total
+        self.size = size
+        self.total = total
+
+
+class SumTree(object):
+    """
+    A sequence of non negative ints with its running sums, e.g. the number of tokens of every
+    line : the sum of the first i values, the index where the sums reach a given total and
+    replacing a slice all take O(log n), where a list would recompute the sums from the start
+
+    An implicit treap, the position of a value is its rank in the tree
+
+    ### Attributes
+    - root : the root SumNode, None when empty
+    - random : the source of the node priorities
+
+    ### Args
+    - values : the initial values
+    """
+
+    def __init__(self, values=()):
+        """
+        Constructor
+        """
+        self.random = random.Random(0)
+        self.root = self.build(list(values))
+
+    def build(self, values):
+        """
+        Returns the root of a balanced tree of values, the priorities are drawn then given
+        level by level so every parent outranks its children
+        """
+        if not values:
+            return None
+        nodes = [SumNode(i, 0.0) for i in values]
+        # the middle node of every range is the root of its subtree, breadth first
+        order = []
+        ranges = [(0, len(nodes))]
+        for start, stop in ranges:
+            middle = (start + stop) // 2
+            order.append((middle, start, stop))
+            if start < middle:
+                ranges.append((start, middle))
+            if middle + 1 < stop:
+                ranges.append((middle + 1, stop))
+        priorities = sorted((self.random.random() for _ in nodes), reverse=True)
+        for (middle, start, stop), priority in zip(order, priorities):
+            node = nodes[middle]
+            node.priority = priority
+            if start < middle:
+                node.left = nodes[(start + middle) // 2]
+            if middle + 1 < stop:
+                node.right = nodes[(middle + 1 + stop) // 2]
+        for middle, _, _ in reversed(order):
+            nodes[middle].update()
+        return nodes[order[0][0]]
+
+    def __len__(self):
+        return self.root.size if self.root is not None else 0
+
+    def __getitem__(self, index):
+        """
+        Returns the value #index
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('SumTree index out of range')
+        node = self.root
+        while True:
+            left_size = node.left.size if node.left is not None else 0
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.value
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def values(self):
+        """
+        Returns all the values as a list
+        """
+        result = []
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            result.append(node.value)
+            node = node.right
+        return result
+
+    def prefix(self, index):
+        """
+        Returns the sum of the first index values
+        """
+        total = 0
+        node = self.root
+        while node is not None:
+            left_size = node.left.size if node.left is not None else 0
+            if index <= left_size:
+                node = node.left
+            else:
+                if node.left is not None:
+                    total += node.left.total
+                total += node.value
+                index -= left_size + 1
+                node = node.right
+        return total
+
+    def bisect_left(self, total):
+        """
+        Returns the number of values whose running sum [the sum up to and including them]
+        is below total, i.e. bisect_left() over the running sums
+        """
+        return self.search(total, False)
+
+    def bisect_right(self, total):
+        """
+        Returns the number of values whose running sum is at most total
+        """
+        return self.search(total, True)
+
+    def search(self, total, right):
+        """
+        Shared by bisect_left() and bisect_right()
+        """
+        index = 0
+        before = 0
+        node = self.root
+        while node is not None:
+            left = node.left
+            if left is not None:
+                # the last running sum of the left subtree
+                left_end = before + left.total
+                if left_end > total or (not right and left_end == total):
+                    node = left
+                    continue
+                index += left.size
+                before = left_end
+            before += node.value
+            if before > total or (not right and before == total):
+                return index
+            index += 1
+            node = node.right
+        return index
+
+    def replace(self, start, stop, values):
+        """
+        Replaces the values [start, stop) with values, like a list slice assignment
+        """
+        left, rest = self.split(self.root, start)
+        _, right = self.split(rest, stop - start)
+        self.root = self.merge(self.merge(left, self.build(list(values))), right)
+
+    def split(self, node, count):
+        """
+        Splits the tree of node into the trees of its first count values and of the others
+        """
+        if node is None:
+            return None, None
+        left_size = node.left.size if node.left is not None else 0
+        if count <= left_size:
+            left, node.left = self.split(node.left, count)
+            node.update()
+            return left, node
+        node.right, right = self.split(node.right, count - left_size - 1)
+        node.update()
+        return node, right
+
+    def merge(self, left, right):
+        """
+        Returns the tree of the values of left followed by the ones of right
+        """
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = self.merge(left.right, right)
+            left.update()
+            return left
+        right.left = self.merge(left, right.left)
+        right.update()
+        return right
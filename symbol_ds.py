@@ -0,0 +1,183 @@
+from array import array
+
+# the occurrence kinds of a variable
+READ_DEF = 0      # read x
+ASSIGN_DEF = 1    # x := ...
+USE = 2           # x inside an expression
+OCCURRENCE_NAMES = ("read", "assign", "use")
+
+
+class SymbolTable(object):
+    """
+    The variables of a program and every place they occur, filled by the parser while it
+    parses (see Parser.parse(symbols=True)) : no tree walk nor scan is needed to build it
+
+    The occurrences are kept in the order they are evaluated, the uses of the right hand side
+    of an assignment come before its target. Since the parser backtracks and recovers from
+    errors, the occurrences of a rule that fails are rolled back with mark() / rollback(),
+    leaving only the ones of the final tree. The per variable index answering the queries is
+    built from that log the first time it is needed
+
+    ### Attributes
+    - names : the interned variable names, the variable #id is names[id]
+    - ids : name to its id
+    - symbols : array of the variable id of every occurrence
+    - kinds : array of the occurrence kinds, READ_DEF, ASSIGN_DEF or USE
+    - token_indexes : array of the index of the identifier token of every occurrence
+    - lines, columns : arrays of its position, 0 when the tokens carry none
+    - index : per variable id, the list of its occurrence numbers, None until a query
+    """
+
+    def __init__(self):
+        """
+        constructor
+        """
+        self.names = []
+        self.ids = {}
+        self.symbols = array('l')
+        self.kinds = array('b')
+        self.token_indexes = array('q')
+        self.lines = array('l')
+        self.columns = array('l')
+        self.index = None
+
+    def __len__(self):
+        """
+        the number of occurrences
+        """
+        return len(self.symbols)
+
+    def __contains__(self, name):
+        return name in self.ids and bool(self.occurrences(name))
+
+    def intern(self, name):
+        """
+        Returns the id of the variable name, a new one the first time
+        """
+        symbol = self.ids.get(name)
+        if symbol is None:
+            symbol = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol
+
+    def add(self, name, kind, token_index, line, column):
+        """
+        Records one occurrence of the variable name
+        """
+        self.symbols.append(self.intern(name))
+        self.kinds.append(kind)
+        self.token_indexes.append(token_index)
+        self.lines.append(line or 0)
+        self.columns.append(column or 0)
+        self.index = None
+
+    def mark(self):
+        """
+        Returns the point rollback() goes back to
+        """
+        return len(self.symbols)
+
+    def rollback(self, mark):
+        """
+        Forgets the occurrences recorded since mark(), the interned names stay
+        """
+        if mark < len(self.symbols):
+            del self.symbols[mark:]
+            del self.kinds[mark:]
+            del self.token_indexes[mark:]
+            del self.lines[mark:]
+            del self.columns[mark:]
+            self.index = None
+
+    def build_index(self):
+        """
+        Groups the occurrence numbers by variable, one pass over the log
+        """
+        index = [[] for _ in self.names]
+        for number, symbol in enumerate(self.symbols):
+            index[symbol].append(number)
+        self.index = index
+        return index
+
+    def occurrence(self, number):
+        """
+        Returns the occurrence #number as a (kind name, line, column, token index) tuple
+        """
+        return (OCCURRENCE_NAMES[self.kinds[number]], self.lines[number], self.columns[number],
+                self.token_indexes[number])
+
+    def occurrences(self, name, kinds=(READ_DEF, ASSIGN_DEF, USE)):
+        """
+        Returns the occurrences of the variable name of the given kinds, in evaluation order,
+        as (kind name, line, column, token index) tuples
+        """
+        symbol = self.ids.get(name)
+        if symbol is None:
+            return []
+        index = self.index if self.index is not None else self.build_index()
+        return [self.occurrence(i) for i in index[symbol] if self.kinds[i] in kinds]
+
+    def definitions(self, name):
+        """
+        Returns where the variable name is written, by a read or an assignment
+        """
+        return self.occurrences(name, (READ_DEF, ASSIGN_DEF))
+
+    def uses(self, name):
+        """
+        Returns where the value of the variable name is used
+        """
+        return self.occurrences(name, (USE,))
+
+    def variables(self):
+        """
+        Returns the names of the variables of the program, in the order they first occur
+        """
+        index = self.index if self.index is not None else self.build_index()
+        return [self.names[symbol] for symbol in sorted(range(len(index)), key=lambda i: index[i][:1])
+                if index[symbol]]
+
+    def used_before_assignment(self):
+        """
+        Returns the variables whose first occurrence is a use, read before anything is written
+        to them : never written at all, or written later in the program. This is the order of
+        the source, a variable assigned in a single branch of an if is not reported
+
+        ### Returns
+        a list of (name, line, column) of the first uses, in the order of the source
+        """
+        index = self.index if self.index is not None else self.build_index()
+        found = []
+        for numbers in index:
+            if numbers and self.kinds[numbers[0]] == USE:
+                first = numbers[0]
+                found.append((self.token_indexes[first], self.names[self.symbols[first]],
+                              self.lines[first], self.columns[first]))
+        found.sort()
+        return [i[1:] for i in found]
+
+    def unused(self):
+        """
+        Returns the variables that are written but never used, in the order of the source
+
+        ### Returns
+        a list of (name, line, column) of their first definitions
+        """
+        index = self.index if self.index is not None else self.build_index()
+        found = []
+        for numbers in index:
+            if numbers and all(self.kinds[i] != USE for i in numbers):
+                first = min(numbers, key=self.token_indexes.__getitem__)
+                found.append((self.token_indexes[first], self.names[self.symbols[first]],
+                              self.lines[first], self.columns[first]))
+        found.sort()
+        return [i[1:] for i in found]
+
+    def to_dict(self):
+        """
+        Returns the cross reference as a JSON ready dict, variable name to its definitions
+        and uses as [line, column] pairs
+        """
+        return dict((name, {"definitions": [[i[1], i[2]] for i in self.definitions(name)],
+                            "uses": [[i[1], i[2]] for i in self.uses(name)]})
+                    for name in self.variables())
@@ -1,16 +1,28 @@
-import pygraphviz as pygviz
+from ast_ds import If, Repeat, Assign, Read, Write, Op, Const
+
+# the tasks of the explicit stack of SyntaxTree.draw()
+SEQ = 0
+EXPR = 1
+OPERATOR = 2
 
 
 class SyntaxTree(object):
     """
     Implements the graph drawing wrapper for the syntax tree
 
+    The graph is only kept as plain lists while it is built, the DOT text is written in one go
+    by to_dot() and PyGraphviz is only imported by show(). The statements of a same sequence
+    form one chain, drawn at the same rank by a single subgraph per chain
+
     ### Arguments
     - out_image_dir : the output tree image location
 
     ### Attributes
     - out_image_dir : the image name, used for storing the output image
-    - dot : PyGraphviz object, abstract all the graph operations for us
+    - nodes : (name, label, shape) of every node, in creation order
+    - edges : (name1, name2) of every edge, in creation order
+    - chains : lists of the node names drawn at the same rank
+    - chain_of : the chain of every node that belongs to one
     - counter : internal variable used to avoid name duplication
     """
 
@@ -19,7 +31,10 @@ class SyntaxTree(object):
         Constructor
         """
         self.out_image_dir = out_image_dir
-        self.dot = pygviz.AGraph()
+        self.nodes = []
+        self.edges = []
+        self.chains = []
+        self.chain_of = {}
         self.counter = 0
 
     def create_node(self, node_name, node_text, shape='square', inline_with=None):
@@ -32,12 +47,17 @@ class SyntaxTree(object):
         - shape : the node shape, can be either "square" or "circle"
         - inline_with : the node name of the node at the same scope
         """
-        self.dot.add_node(node_name + str(self.counter), label=node_text, shape=shape)
         ret = node_name+str(self.counter)
+        self.nodes.append((ret, node_text, shape))
         self.counter += 1
         if inline_with is not None:
-            self.dot.subgraph(nbunch=[inline_with, ret],rank='same')
-            self.dot.add_edge(inline_with, ret)
+            chain = self.chain_of.get(inline_with)
+            if chain is None:
+                chain = self.chain_of[inline_with] = [inline_with]
+                self.chains.append(chain)
+            chain.append(ret)
+            self.chain_of[ret] = chain
+            self.edges.append((inline_with, ret))
         return ret
 
     def connect_node(self, name1, name2):
@@ -49,10 +69,142 @@ class SyntaxTree(object):
         - name1 : the first node in the connection
         - name2 : the 2nd node in the connection
         """
-        self.dot.add_edge(name1, name2)
+        self.edges.append((name1, name2))
+
+    def draw(self, stmts):
+        """
+        Draws a whole syntax tree as built by the parser
+
+        Every node hangs below the node it belongs to and the statements of a sequence
+        after the 1st one are chained at its right, at the same rank
+
+        The tree is walked with an explicit stack so deep trees do not hit the recursion limit.
+        Its tasks are drawn in the order of a recursive walk, for the same node names and DOT
+        text : a statement sequence frame [SEQ, statement iterator, parent, previous node name],
+        an expression (EXPR, node, parent, keep) and the operator of an expression whose left
+        operand was drawn (OPERATOR, node, parent, keep). keep puts the name of the expression
+        node on names, where the operator drawn after its left operand takes it from
+
+        ### Arguments
+        - stmts : the list of the top level statement nodes
+        """
+        stack = [[SEQ, iter(stmts), None, None]]
+        names = []
+        while stack:
+            task = stack[-1]
+            tag = task[0]
+            if tag == SEQ:
+                stmt = next(task[1], None)
+                if stmt is None:
+                    stack.pop()
+                    continue
+                # the 1st statement hangs below the parent, the next ones at the right of the previous one
+                prev = task[3]
+                task[3] = self.draw_stmt(stmt, task[2] if prev is None else None, prev, stack)
+            elif tag == EXPR:
+                stack.pop()
+                self.draw_expr(task[1], task[2], task[3], stack, names)
+            else:
+                stack.pop()
+                _, expr, parent, keep = task
+                lhs = names.pop()
+                name = self.create_node('O', "OP\n("+expr.op+")", shape='circle')
+                if keep:
+                    names.append(name)
+                if parent is not None:
+                    self.connect_node(parent, name)
+                self.connect_node(name, lhs)
+                stack.append((EXPR, expr.right, name, False))
 
-    def show(self):
+    def draw_stmt(self, stmt, parent, inline_with, stack):
+        """
+        Draws a statement node and pushes the drawing of its children on stack,
+        returns the statement node name
+        """
+        cls = stmt.__class__
+        if cls is Assign:
+            name = self.create_node('A', "Assign\n("+stmt.name+")", inline_with=inline_with)
+        elif cls is Read:
+            name = self.create_node('R', "Read\n("+stmt.name+")", inline_with=inline_with)
+        elif cls is Write:
+            name = self.create_node('W', "Write", inline_with=inline_with)
+        elif cls is If:
+            name = self.create_node('I', "If", inline_with=inline_with)
+        else:
+            name = self.create_node('R', "Repeat", inline_with=inline_with)
+        if parent is not None:
+            self.connect_node(parent, name)
+        # pushed in reverse, the last one pushed is drawn first
+        if cls is Assign or cls is Write:
+            stack.append((EXPR, stmt.expr, name, False))
+        elif cls is If:
+            if stmt.else_part is not None:
+                stack.append([SEQ, iter(stmt.else_part), name, None])
+            stack.append([SEQ, iter(stmt.then_part), name, None])
+            stack.append((EXPR, stmt.test, name, False))
+        elif cls is Repeat:
+            stack.append((EXPR, stmt.test, name, False))
+            stack.append([SEQ, iter(stmt.body), name, None])
+        return name
+
+    def draw_expr(self, expr, parent, keep, stack, names):
+        """
+        Draws an expression below <parent>, the left operand of an operator
+        is drawn before the operator itself : for an operator, its left operand
+        then the operator are pushed on stack
+        """
+        if expr.__class__ is Op:
+            stack.append((OPERATOR, expr, parent, keep))
+            stack.append((EXPR, expr.left, None, True))
+            return
+        if expr.__class__ is Const:
+            name = self.create_node('C', "const\n("+expr.value+")", shape='circle')
+        else:
+            name = self.create_node('C', "Id\n("+expr.name+")", shape='circle')
+        if keep:
+            names.append(name)
+        if parent is not None:
+            self.connect_node(parent, name)
+
+    def to_dot(self):
+        """
+        Returns the graph as DOT text, e.g. to be rendered later by a RenderPool
+        """
+        return "".join(self.dot_lines())
+
+    def write_dot(self, out_file):
+        """
+        Writes the DOT text to the opened text file out_file line by line
+        """
+        out_file.writelines(self.dot_lines())
+
+    def dot_lines(self):
+        """
+        Yields the DOT text line by line
+
+        The nodes come first then the edges, both in creation order so the layout is the
+        same as the graph built call by call, the chains are listed at the end
+        """
+        yield "strict graph {\n"
+        for name, label, shape in self.nodes:
+            label = label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            yield '\t%s\t[label="%s", shape=%s];\n' % (name, label, shape)
+        for name1, name2 in self.edges:
+            yield "\t%s -- %s;\n" % (name1, name2)
+        for chain in self.chains:
+            yield "\t{rank=same; " + "; ".join(chain) + ";}\n"
+        yield "}\n"
+
+    def show(self, render_pool=None):
         """
         Shows the whole graph, exports an image @ the dir given at the constructor
+
+        ### Arguments
+        - render_pool : RenderPool used to draw in the background, in that case
+        the future of the image is returned immediately
         """
-        self.dot.draw(self.out_image_dir, prog='dot')
+        if render_pool is not None:
+            return render_pool.submit(self.to_dot(), self.out_image_dir)
+        # only needed here, the rest of the package works without PyGraphviz
+        import pygraphviz as pygviz
+        pygviz.AGraph(string=self.to_dot()).draw(self.out_image_dir, prog='dot')
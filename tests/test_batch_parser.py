@@ -0,0 +1,63 @@
+import json
+import os
+
+from batch_parser import collect_files, main, run_batch
+from parser_class import Parser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def programs(tmp_path):
+    source = tmp_path / "programs"
+    source.mkdir()
+    with open(os.path.join(ROOT, "tiny_sample_code.txt")) as in_file:
+        text = in_file.read()
+    for copies in range(1, 4):
+        (source / ("good%d.txt" % copies)).write_text(" ".join([text] * copies))
+    (source / "bad.txt").write_text("read x;\nwrite $\n")
+    (source / "syntax.txt").write_text("read x;\nif x < then write x end\n")
+    (source / "notes.md").write_text("not a program")
+    return source
+
+
+def test_collect_files(tmp_path):
+    source = programs(tmp_path)
+    files = collect_files([str(source), str(source / "good*.txt")])
+    assert [i.rsplit("/", 1)[-1] for i in files] == ["bad.txt", "good1.txt", "good2.txt", "good3.txt", "syntax.txt"]
+
+
+def test_run_batch(tmp_path):
+    source = programs(tmp_path)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    results = run_batch(collect_files([str(source)]), jobs=2, out_dir=str(out_dir), render=False, trace=True)
+    assert [(i["file"].rsplit("/", 1)[-1], i["ok"]) for i in results] == [
+        ("bad.txt", False), ("good1.txt", True), ("good2.txt", True), ("good3.txt", True), ("syntax.txt", False)]
+    assert results[0]["error"] == "Scanner error at line 2"
+    assert results[4]["error"] == "ParseError: Error, malformed statement"
+    assert results[2]["tokens"] > results[1]["tokens"] > 0
+    assert (out_dir / "good1_parser_output.txt").read_text().startswith("Read_Statement found")
+
+    results = run_batch(collect_files([str(source)]), jobs=2, out_dir=str(out_dir), render=False, recover=True,
+                        tree_format="sexp")
+    assert [i["ok"] for i in results] == [False, True, True, True, False]
+    assert results[0]["diagnostics"][0]["line"] == 2
+    assert results[4]["diagnostics"][0]["line"] == 2
+    assert (out_dir / "good1_syntax_tree.sexp").read_text().startswith("(program")
+
+
+def test_main(tmp_path, capsys):
+    source = programs(tmp_path)
+    summary = tmp_path / "summary.json"
+    assert main([str(source / "good*.txt"), "--no-render", "--jobs", "1", "--json", str(summary)]) == 0
+    assert "3 files, 3 passed, 0 failed" in capsys.readouterr().out
+    assert len(json.loads(summary.read_text())) == 3
+    assert main([str(source), "--no-render", "--jobs", "1"]) == 1
+
+
+def test_parser_reuse(tmp_path, capsys):
+    source = programs(tmp_path)
+    parser = Parser()
+    assert parser.parse(str(source / "bad.txt"), str(tmp_path / "out.txt"), render=False) is None
+    tree = parser.parse(str(source / "good2.txt"), str(tmp_path / "out.txt"), render=False)
+    assert repr(tree) == repr(Parser().parse(str(source / "good2.txt"), str(tmp_path / "out.txt"), render=False))
@@ -0,0 +1,23 @@
+from benchmark import run
+from parser_class import Parser
+from tiny_generator import TinyGenerator
+
+
+def test_generated_programs_parse(tmp_path):
+    in_file_dir = str(tmp_path / "program.txt")
+    TinyGenerator(3, 200, max_depth=4).write(in_file_dir)
+    assert TinyGenerator(3, 200, max_depth=4).program() == open(in_file_dir).read()
+    tree = Parser().parse(in_file_dir, out_file_dir=str(tmp_path / "parser_output.txt"), render=False)
+    # nested statements count too
+    assert tree is not None and 0 < len(tree) <= 200
+
+
+def test_stages(tmp_path):
+    in_file_dir = str(tmp_path / "program.txt")
+    TinyGenerator(1, 50).write(in_file_dir)
+    results = run(in_file_dir, repeat=1, render=False)
+    assert sorted(results) == ["parse", "scan_fsm", "scan_mapped", "scan_regex"]
+    for stats in results.values():
+        assert stats["seconds"] > 0 and stats["tokens"] > 0
+        assert stats["alloc_peak_bytes"] > 0
+        assert stats["process_peak_rss_kb"] >= stats["rss_growth_kb"] >= 0
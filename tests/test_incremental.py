@@ -0,0 +1,95 @@
+import random
+
+from incremental_class import IncrementalParser
+from parser_class import Parser
+from scanner_class import Scanner
+
+PIECES = ["read x", "write x", "x := 1", "y := x + 2", ";", ";", "\n", "\n", " ", "{c", "}",
+          "if x < 1 then", "else", "end", "repeat", "until x = 0", "(", ")", "*", ":", "=", "z"]
+
+
+def as_tuples(tokens):
+    return [(i.literal, i.type_code, i.offset, i.line, i.column) for i in tokens]
+
+
+def full_parse(text):
+    """
+    The tree and the tokens of a parse of the whole text, ('err', None) on an error
+    """
+    parser = Parser()
+    try:
+        tree = parser.parse_text(text)
+    except ValueError:
+        return "err", None
+    if tree is None:
+        return "err", None
+    return repr(tree), parser.tokens
+
+
+def random_edits(seed, trials, steps):
+    """
+    Yields (incremental parser, its tree or 'err') after every random edit
+    """
+    rng = random.Random(seed)
+    for _ in range(trials):
+        inc = IncrementalParser()
+        try:
+            inc.set_text(" ".join(rng.choice(PIECES) for _ in range(rng.randint(0, 30))))
+        except ValueError:
+            pass
+        for _ in range(steps):
+            lines = inc.text.splitlines(True) or [""]
+            start_line = rng.randrange(len(lines))
+            start_col = rng.randint(0, len(lines[start_line]))
+            end_line = rng.randint(start_line, min(start_line + 2, len(lines) - 1))
+            end_col = rng.randint(0 if end_line > start_line else start_col, len(lines[end_line]))
+            new_text = " ".join(rng.choice(PIECES) for _ in range(rng.randint(0, 3)))
+            try:
+                got = repr(inc.edit(start_line, start_col, end_line, end_col, new_text))
+            except ValueError:
+                got = "err"
+            yield inc, got
+
+
+def test_edits_give_the_tree_of_a_full_parse():
+    for inc, got in random_edits(1, 60, 10):
+        expected, tokens = full_parse(inc.text)
+        assert got == expected, inc.text
+        if tokens is not None:
+            assert [(i.literal, i.type_code) for i in inc.tokens] == \
+                   [(i.literal, i.type_code) for i in tokens], inc.text
+
+
+def test_edit_reparses_only_the_touched_statement():
+    text = "".join("x := x + " + str(i) + ";\n" for i in range(1000)) + "write x\n"
+    inc = IncrementalParser(text)
+    inc.edit(500, 9, 500, 12, "7")
+    # the statement before the edit is parsed again too, it may have grown
+    assert inc.last_edit == {"lines_scanned": 1, "statements_parsed": 2}
+    assert repr(inc.tree) == full_parse(inc.text)[0]
+
+
+def test_token_positions_match_a_full_scan(tmp_path, capsys):
+    source = tmp_path / "source.txt"
+    checked = 0
+    for inc, _ in random_edits(2, 60, 10):
+        if inc.error_lines:
+            continue
+        # the scan of a file drops a last token not followed by a new line
+        source.write_text(inc.text if inc.text.endswith("\n") else inc.text + "\n")
+        scanner = Scanner()
+        assert scanner.scan(str(source), write_opt=False) == 1
+        expected = as_tuples(scanner.tokens)
+        assert as_tuples(inc.tokens) == expected, inc.text
+        assert [inc.tokens.position(i) for i in range(len(expected))] == [i[3:] for i in expected]
+        assert [as_tuples([inc.tokens[i]])[0] for i in range(len(expected))] == expected
+        checked += 1
+    assert checked > 100
+
+
+def test_assignment_split_over_lines():
+    inc = IncrementalParser("x := 1;\ny :\n\n  = 2;\nwrite y\n")
+    assert as_tuples(inc.tokens)[4:7] == [("y", 1, 8, 2, 1), (":=", 4, 10, 2, 3), ("2", 0, 17, 4, 5)]
+    inc.edit(0, 0, 0, 0, "read z;\n\n")
+    assert as_tuples(inc.tokens)[7:10] == [("y", 1, 17, 4, 1), (":=", 4, 19, 4, 3), ("2", 0, 26, 6, 5)]
+    assert inc.tokens.position(len(inc.tokens)) == (7, 8)
@@ -0,0 +1,60 @@
+import io
+
+import pytest
+
+from parser_class import Parser
+from scanner_class import Scanner
+from token_ds import TokenBuffer
+
+PROGRAM = ("{ Sample program\n  in TINY language }\nread x; { input an integer }\n"
+           "if 0 < x then { don't compute if x <= 0 }\n  fact := 1;\n"
+           "  repeat\n    fact := fact * x;\n    x := x - 1\n  until x = 0;\n"
+           "  write fact { output factorial of x }\nend\n") * 5
+
+
+def as_tuples(tokens):
+    return [(i.literal, i.base_type) for i in tokens]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 65536])
+def test_same_tokens_as_scan(tmp_path, chunk_size, capsys):
+    path = str(tmp_path / "program.txt")
+    with open(path, "w") as out_file:
+        out_file.write(PROGRAM)
+    scanner = Scanner()
+    assert scanner.scan(path, write_opt=False) == 1
+    assert as_tuples(Scanner().iter_tokens(path, chunk_size)) == as_tuples(scanner.tokens)
+
+
+def test_lazy():
+    source = io.StringIO("read x;\n" * 1000 + "write x\n")
+    tokens = Scanner().iter_tokens(source, chunk_size=16)
+    assert [next(tokens).literal for _ in range(3)] == ["read", "x", ";"]
+    # only the first chunks were read
+    assert source.tell() < 100
+
+
+def test_invalid_character():
+    with pytest.raises(ValueError):
+        list(Scanner().iter_tokens(io.StringIO("read x;\nwrite $\n")))
+
+
+def test_token_buffer_window():
+    buffer = TokenBuffer(Scanner().iter_tokens(io.StringIO("read x; write x\n")), lookback=1)
+    assert buffer[2].literal == ";"
+    assert buffer[1].literal == "x"
+    with pytest.raises(IndexError):
+        buffer[0]
+    assert buffer.available(4) and not buffer.available(5)
+
+
+def test_streaming_parse(tmp_path, capsys):
+    path = str(tmp_path / "program.txt")
+    with open(path, "w") as out_file:
+        out_file.write(PROGRAM)
+    Parser().parse(path, str(tmp_path / "list.txt"), render=False, trace="list")
+    parser = Parser()
+    parser.parse(path, str(tmp_path / "stream.txt"), render=False, stream=True,
+                 trace="list")
+    assert parser.num_tokens is None
+    assert (tmp_path / "stream.txt").read_text() == (tmp_path / "list.txt").read_text()
@@ -0,0 +1,49 @@
+import pytest
+
+from parser_class import Parser
+from scanner_class import Scanner
+from tiny_generator import TinyGenerator
+
+ERRORS = ["read x;\nif x < then write x end\n", "x := (1 + 2;\n", "repeat write 1\n", "write 1;\n",
+          "read x write x\n", "if x then else end\n", "x := 1 +\n"]
+
+
+def scan(tmp_path, text):
+    path = tmp_path / "program.txt"
+    path.write_text(text)
+    scanner = Scanner()
+    assert scanner.scan(str(path), write_opt=False) == 1
+    return scanner.tokens
+
+
+def outcome(engine, tokens, recover=False):
+    parser = Parser(engine)
+    try:
+        tree = parser.parse_tokens(tokens, recover=recover)
+    except ValueError as err:
+        return "error", str(err), parser.next_token
+    return repr(tree), [i.to_dict() for i in parser.diagnostics]
+
+
+def test_same_trees_as_the_recursive_engine(tmp_path):
+    for seed in range(30):
+        tokens = scan(tmp_path, TinyGenerator(seed, 40, 4, 4).program())
+        assert outcome("iterative", tokens) == outcome("recursive", tokens)
+
+
+@pytest.mark.parametrize("text", ERRORS)
+def test_same_errors(tmp_path, text):
+    tokens = scan(tmp_path, text)
+    assert outcome("iterative", tokens) == outcome("recursive", tokens)
+    assert outcome("iterative", tokens, True) == outcome("recursive", tokens, True)
+
+
+def test_deep_nesting(tmp_path):
+    depth = 20000
+    text = ("x := " + "(" * depth + "1" + ")" * depth + ";\n"
+            + "repeat " * depth + "write x" + " until x" * depth + "\n")
+    tree = Parser("iterative").parse_tokens(scan(tmp_path, text))
+    node = tree[1]
+    for _ in range(depth - 1):
+        node = node.body[0]
+    assert repr(node.body) == "[Write(Id('x'))]"
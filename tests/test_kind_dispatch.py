@@ -0,0 +1,39 @@
+import pytest
+
+from parser_class import Parser
+from scanner_class import Scanner
+from token_ds import (Token, TokenList, EOF, K_READ, K_IDENTIFIER, K_SEMI, K_OTHER, OP_GROUP, ADD_OP, MUL_OP,
+                      COMPARE_OP, K_PLUS, K_TIMES, K_LESS, K_LPAREN, NO_OP)
+
+
+def token_list(text):
+    scanner = Scanner()
+    tokens, _ = scanner.scan_line(text + "\n")
+    return TokenList(tokens)
+
+
+def test_peek_and_match():
+    parser = Parser()
+    parser.tokens = token_list("read x;")
+    parser.num_tokens = 3
+    assert parser.peek() == K_READ
+    assert not parser.match_kind(K_IDENTIFIER)
+    assert parser.match_kind(K_READ) and parser.match("x")
+    assert parser.peek() == K_SEMI and parser.match_kind(K_SEMI)
+    assert parser.peek() == EOF and not parser.match(";")
+
+
+def test_operator_groups():
+    assert (OP_GROUP[K_PLUS], OP_GROUP[K_TIMES], OP_GROUP[K_LESS], OP_GROUP[K_LPAREN]) == (ADD_OP, MUL_OP, COMPARE_OP,
+                                                                                          NO_OP)
+
+
+def test_dialect_words_are_not_tiny_keywords():
+    # a reserved word of another dialect gets its own kind, never one of the TINY keywords
+    assert Token("loop", "reserved word").kind == K_OTHER
+    scanner = Scanner(res_words=Scanner.RES_WORDS + ("loop",))
+    tokens, _ = scanner.scan_line("loop x\n")
+    assert (tokens[0].base_type, tokens[0].kind) == ("reserved word", K_OTHER)
+    with pytest.raises(ValueError):
+        Parser(scanner=scanner).parse_text("loop x\n")
+    assert Token("read", "identifier").kind == K_IDENTIFIER
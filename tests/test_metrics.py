@@ -0,0 +1,48 @@
+import json
+
+from metrics_class import ParseMetrics
+from parser_class import Parser
+
+
+def parse(tmp_path, metrics, **options):
+    source = tmp_path / "source.txt"
+    source.write_text("read x;\nif 0 < x then repeat x := x - 1 until x = 0 end;\nwrite x\n")
+    return Parser().parse(str(source), str(tmp_path / "out.txt"), render=False, metrics=metrics, **options)
+
+
+def test_stages_and_counters(tmp_path, capsys):
+    seen = []
+    metrics = ParseMetrics(listeners=[lambda stage, seconds: seen.append(stage)])
+    parse(tmp_path, metrics, trace="list", export=str(tmp_path / "tree.sexp"))
+    assert seen == ["read", "tokenize", "parse", "trace_write", "export"]
+    assert set(metrics.stage_seconds) == set(seen)
+    assert metrics.counters["parses"] == 1
+    assert metrics.counters["tokens"] == 22
+    # read, if, write, the if test, the repeat, its assignment and test, their operands
+    assert metrics.counters["nodes"] == 15
+    assert metrics.max_tree_depth == 5
+
+
+def test_rules(tmp_path, capsys):
+    metrics = ParseMetrics(rules=True)
+    parser = Parser()
+    source = tmp_path / "source.txt"
+    source.write_text("x := ((1))\n")
+    parser.parse(str(source), str(tmp_path / "out.txt"), render=False, metrics=metrics)
+    assert metrics.rule_calls["is_factor"] == 3
+    assert metrics.max_rule_depth > 3
+    # the rule methods are put back after the parse
+    assert "is_factor" not in vars(parser)
+
+
+def test_exports(tmp_path, capsys):
+    metrics = ParseMetrics()
+    parse(tmp_path, metrics)
+    total = ParseMetrics()
+    total.merge(metrics.to_dict())
+    total.merge(metrics.to_dict())
+    assert total.counters["parses"] == 2
+    assert json.loads(total.to_json())["counters"]["tokens"] == 44
+    text = total.to_prometheus()
+    assert 'tiny_parser_stage_runs_total{stage="parse"} 2' in text
+    assert "tiny_parser_tokens_total 44" in text
@@ -0,0 +1,50 @@
+from compiler_class import Compiler
+from optimizer_class import Optimizer
+from parser_class import Parser
+from tiny_vm import VM
+from tree_export import to_sexp
+
+
+def optimized(text):
+    optimizer = Optimizer()
+    tree = optimizer.optimize(Parser().parse_text(text))
+    return [to_sexp(i) for i in tree], optimizer
+
+
+def test_folding_and_identities():
+    stmts, optimizer = optimized("x := 2 * 3 + 1; y := x * 1 + 0; z := (x + 1) + 2; w := 4 / 0; v := x * 0\n")
+    assert stmts == ["(assign x 7)", "(assign y x)", "(assign z (+ x 3))", "(assign w (/ 4 0))", "(assign v 0)"]
+    assert (optimizer.folded, optimizer.simplified) == (2, 4)
+    # x * 0 keeps an operand that may divide by zero
+    assert optimized("v := (1 / x) * 0\n")[0] == ["(assign v (* (/ 1 x) 0))"]
+
+
+def test_dead_branches():
+    stmts, optimizer = optimized("if 1 < 2 then write 1 else write 2 end; if 0 then write 3 end;"
+                                 " repeat write 4 until 1; repeat read x until x\n")
+    assert stmts == ["(write 1)", "(write 4)", "(repeat (body (read x)) x)"]
+    assert optimizer.branches == 3
+
+
+def test_same_results_as_the_plain_tree():
+    text = ("read x; y := 0 * x + 3 - 1; if y = 2 then repeat y := y * 1 + x; x := x - 1 until x < 1"
+            " else write 0 end; write y\n")
+    tree = Parser().parse_text(text)
+    for value in (0, 1, 5):
+        assert VM(Compiler().compile(Optimizer().optimize(tree))).run([value]) == \
+               VM(Compiler().compile(tree)).run([value])
+
+
+def test_deep_programs():
+    depth = 5000
+    text = ("x := " + "(" * depth + "x" + " + 1)" * depth + ";\n"
+            + "if x < 1 then " * depth + "write 1 + 1" + " end" * depth + "\n")
+    tree = Parser(engine="iterative").parse_text(text)
+    optimizer = Optimizer()
+    result = optimizer.optimize(tree)
+    assert optimizer.folded == 1 and optimizer.simplified == depth - 1
+    assert result[0].expr.right.value == str(depth)
+    node = result[1]
+    for _ in range(depth - 1):
+        node = node.then_part[0]
+    assert to_sexp(node.then_part[0]) == "(write 2)"
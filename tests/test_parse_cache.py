@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from parse_cache import ParseCache
+from parser_class import Parser
+from scanner_class import Scanner
+
+
+def parse(parser, tmp_path, cache):
+    return parser.parse(str(tmp_path / "source.txt"), out_file_dir=str(tmp_path / "parser_output.txt"),
+                        render=False, cache=cache)
+
+
+def test_hit(tmp_path):
+    (tmp_path / "source.txt").write_text("foo := 1;\nwrite foo\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    tree = parse(Parser(), tmp_path, cache)
+    parser = Parser()
+    assert repr(parse(parser, tmp_path, cache)) == repr(tree)
+    assert parser.from_cache
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_dialects_and_engines_do_not_share_entries(tmp_path):
+    (tmp_path / "source.txt").write_text("foo := 1;\nwrite foo\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    parse(Parser(), tmp_path, cache)
+    dialect = Parser(scanner=Scanner(res_words=Scanner.RES_WORDS + ("foo",)))
+    with pytest.raises(ValueError):
+        parse(dialect, tmp_path, cache)
+    assert not dialect.from_cache
+    for parser in (Parser(scanner=Scanner(sp_symbols=set(Scanner.SP_SYMBOLS) | {"!"})),
+                   Parser(scanner=Scanner(engine="regex")), Parser(engine="iterative")):
+        parse(parser, tmp_path, cache)
+        assert not parser.from_cache
+    assert cache.hits == 0
+
+
+def test_key_follows_the_content_and_the_options(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_text("write 1\n")
+    key = ParseCache.key(str(source), 1, render=False)
+    assert ParseCache.key(str(source), 1, render=False) == key
+    assert ParseCache.key(str(source), 2, render=False) != key
+    assert ParseCache.key(str(source), 1, render=True) != key
+    source.write_text("write 2\n")
+    assert ParseCache.key(str(source), 1, render=False) != key
+
+
+def test_trace_and_tokens_restored(tmp_path, capsys):
+    (tmp_path / "source.txt").write_text("read x;\nwrite x + 1\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    first = Parser()
+    first.parse(str(tmp_path / "source.txt"), out_file_dir=str(tmp_path / "first.txt"), render=False,
+                trace="list", cache=cache)
+    parser = Parser()
+    parser.parse(str(tmp_path / "source.txt"), out_file_dir=str(tmp_path / "second.txt"), render=False,
+                 trace="list", cache=cache)
+    assert parser.from_cache
+    assert parser.trace == first.trace
+    assert (tmp_path / "second.txt").read_text() == (tmp_path / "first.txt").read_text()
+    assert [parser.tokens[i].literal for i in range(parser.num_tokens)] == \
+           ["read", "x", ";", "write", "x", "+", "1"]
+    assert (parser.tokens[3].line, parser.tokens[3].column) == (2, 1)
+
+
+def test_eviction(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"), max_bytes=2500)
+    for i in range(5):
+        cache.put("key%d" % i, {"tree": [], "data": "x" * 1000})
+        # older than the next ones whatever the timestamp resolution
+        os.utime(str(tmp_path / "cache" / ("key%d.entry" % i)), (i, i))
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] <= 2500 and stats["evictions"] == 3
+    assert cache.get("key4") is not None and cache.get("key0") is None
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from parse_server import handle_request, warm_up
+from parser_class import Parser
+
+
+@pytest.fixture(autouse=True, scope="module")
+def parsers():
+    # what the worker initializer does in every process of the pool
+    warm_up()
+
+
+def test_docstring_request():
+    response = json.loads(handle_request('{"id": 1, "source": "read x; write x", "tokens": true}'))
+    assert response["ok"] is True
+    assert response["id"] == 1
+    assert response["tokens"][-1] == ["x", "identifier", 1, 15]
+    assert response["tree"] == [{"node": "Read", "name": "x"},
+                                {"node": "Write", "expr": {"node": "Id", "name": "x"}}]
+
+
+def test_crlf_source():
+    response = json.loads(handle_request(json.dumps({"id": 2, "source": "read x;\r\nwrite x\r\n", "tree": "sexp",
+                                                     "tokens": True})))
+    assert response["ok"] is True
+    assert response["tree"] == "(program (read x) (write x))"
+    assert response["tokens"][3] == ["write", "reserved word", 2, 1]
+
+
+def test_errors():
+    response = json.loads(handle_request('{"id": 3, "source": "read x; write"}'))
+    assert response["ok"] is False
+    assert response["tree"] is None
+    assert json.loads(handle_request('{"id": 4, "source": "x", "engine": "lr"}'))["error"] == \
+        'ValueError: Unknown parser engine "lr"'
+
+
+def test_parse_text_reads_new_lines_like_a_file():
+    expected = repr(Parser().parse_text("x := 1;\nwrite x\n"))
+    for text in ("x := 1;\r\nwrite x\r\n", "x := 1;\rwrite x", "x := 1;\nwrite x"):
+        assert repr(Parser().parse_text(text)) == expected
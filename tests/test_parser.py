@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+from ast_ds import If, Repeat, Assign, Read, Write, Op, Const, Id
+from parser_class import Parser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse(tmp_path, text):
+    path = str(tmp_path / "program.txt")
+    with open(path, "w") as out_file:
+        out_file.write(text)
+    return Parser().parse(path, str(tmp_path / "parser_output.txt"), render=False)
+
+
+def test_tree(tmp_path, capsys):
+    tree = parse(tmp_path, "read x;\nif 0 < x then y := 1 + 2 * x else repeat write (x - 1) / 2 until x = 0 end\n")
+    assert repr(tree) == repr([
+        Read("x"),
+        If(Op("<", Const("0"), Id("x")),
+           [Assign("y", Op("+", Const("1"), Op("*", Const("2"), Id("x"))))],
+           [Repeat([Write(Op("/", Op("-", Id("x"), Const("1")), Const("2")))], Op("=", Id("x"), Const("0")))])])
+
+
+def test_left_associative(tmp_path, capsys):
+    assert repr(parse(tmp_path, "x := 1 - 2 - 3\n")[0].expr) == repr(Op("-", Op("-", Const("1"), Const("2")), Const("3")))
+
+
+def test_syntax_error(tmp_path, capsys):
+    with pytest.raises(ValueError):
+        parse(tmp_path, "if x then write x\n")
+
+
+def test_no_graphviz_needed(tmp_path, monkeypatch, capsys):
+    monkeypatch.setitem(sys.modules, "pygraphviz", None)
+    monkeypatch.chdir(tmp_path)
+    parser = Parser()
+    tree = parser.parse(os.path.join(ROOT, "tiny_sample_code.txt"), render=False)
+    assert [i.__class__ for i in tree] == [Read, If]
+    assert parser.graph is None
+    assert "Parser executed successfully" in capsys.readouterr().out
@@ -0,0 +1,41 @@
+import pytest
+
+from parser_class import Parser
+
+
+def parse(tmp_path, text, recover=False):
+    path = tmp_path / "program.txt"
+    path.write_text(text)
+    parser = Parser()
+    tree = parser.parse(str(path), str(tmp_path / "parser_output.txt"), render=False, recover=recover)
+    return parser, tree
+
+
+def diagnostics(tmp_path, text):
+    parser, tree = parse(tmp_path, text, recover=True)
+    return tree, [(i.line, i.column, i.expected, i.found) for i in parser.diagnostics]
+
+
+def test_every_error_in_one_pass(tmp_path, capsys):
+    tree, found = diagnostics(tmp_path, "read x;\nx := ;\nwrite $ 1;\nif x < then write x end;\nwrite x\n")
+    # the broken if resynchronizes on "end", left over after the statement
+    assert [i[:2] for i in found] == [(2, 6), (3, 7), (4, 8), (4, 21)]
+    assert found[1][3] == "$"
+    # the statements around the errors are still in the tree
+    assert repr(tree[0]) == "Read('x')" and repr(tree[-1]) == "Write(Id('x'))"
+
+
+def test_the_message_is_the_one_raised_without_recovery(tmp_path, capsys):
+    text = "read x;\nx := ;\n"
+    with pytest.raises(ValueError) as err:
+        parse(tmp_path, text)
+    assert parse(tmp_path, text, recover=True)[0].diagnostics[0].message == str(err.value)
+
+
+def test_valid_program(tmp_path, capsys):
+    assert diagnostics(tmp_path, "read x; write x\n")[1] == []
+
+
+def test_missing_end(tmp_path, capsys):
+    tree, found = diagnostics(tmp_path, "if x < 1 then write x\n")
+    assert found and found[-1][3] == "<eof>"
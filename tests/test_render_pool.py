@@ -0,0 +1,56 @@
+import os
+import subprocess
+
+import pytest
+
+from render_pool import RenderPool
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="the stand-in layout program is a shell script")
+
+
+@pytest.fixture
+def layout(tmp_path):
+    """
+    A stand-in for dot : copies the DOT text to the output, fails while a "fail" file exists
+    """
+    prog = tmp_path / "layout"
+    prog.write_text('#!/bin/sh\n'
+                    'echo run >> "%s"\n'
+                    'while [ $# -gt 0 ]; do case "$1" in -o) out="$2"; shift;; esac; shift; done\n'
+                    'if [ -e "%s" ]; then echo failed >&2; exit 1; fi\n'
+                    'cat > "$out"\n' % (tmp_path / "runs", tmp_path / "fail"))
+    prog.chmod(0o755)
+    return str(prog)
+
+
+def runs(tmp_path):
+    return len((tmp_path / "runs").read_text().split())
+
+
+def test_identical_texts_are_laid_out_once(tmp_path, layout):
+    with RenderPool(workers=2, prog=layout) as pool:
+        futures = pool.render_many([("graph {a}", str(tmp_path / "1.png")), ("graph {a}", str(tmp_path / "2.png"))])
+        assert [i.result() for i in futures] == [str(tmp_path / "1.png"), str(tmp_path / "2.png")]
+    assert (tmp_path / "2.png").read_text() == "graph {a}"
+    assert runs(tmp_path) == 1
+
+
+def test_failed_renders_are_not_reused(tmp_path, layout):
+    (tmp_path / "fail").write_text("")
+    with RenderPool(prog=layout) as pool:
+        with pytest.raises(subprocess.CalledProcessError):
+            pool.submit("graph {a}", str(tmp_path / "1.png")).result()
+        os.remove(str(tmp_path / "fail"))
+        assert pool.submit("graph {a}", str(tmp_path / "1.png")).result() == str(tmp_path / "1.png")
+    assert runs(tmp_path) == 2
+
+
+def test_bounded_by_digest(tmp_path, layout):
+    with RenderPool(prog=layout, max_renders=2) as pool:
+        for i in range(3):
+            pool.submit("graph {" + str(i) + "}", str(tmp_path / (str(i) + ".png"))).result()
+        assert len(pool.renders) == 2
+        assert all(len(digest) == 32 for digest, _ in pool.renders)
+        # the oldest one was dropped and is laid out again
+        pool.submit("graph {0}", str(tmp_path / "0.png")).result()
+    assert runs(tmp_path) == 4
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from parser_class import Parser
+from scanner_class import Scanner
+from tiny_generator import TinyGenerator
+
+PROGRAMS = [TinyGenerator(seed, 40, 3).program() for seed in range(8)]
+
+
+def test_same_parser_again():
+    parser = Parser()
+    expected = [repr(Parser().parse_text(i)) for i in PROGRAMS]
+    # a failed parse in between must leave nothing behind
+    with pytest.raises(ValueError):
+        parser.parse_text("x := ;\n", recover=False)
+    parser.parse_text("x := $\n", recover=True)
+    assert [repr(parser.parse_text(i)) for i in PROGRAMS] == expected
+    assert parser.diagnostics == []
+
+
+def test_contexts_in_threads():
+    parser = Parser(scanner=Scanner(res_words=Scanner.RES_WORDS, engine="regex"))
+    expected = [repr(Parser().parse_text(i)) for i in PROGRAMS]
+
+    def parse(text):
+        return repr(parser.context().parse_text(text))
+    with ThreadPoolExecutor(4) as pool:
+        for _ in range(5):
+            assert list(pool.map(parse, PROGRAMS)) == expected
+
+
+def test_context_shares_the_configuration():
+    scanner = Scanner(res_words=Scanner.RES_WORDS + ("loop",), engine="regex")
+    context = scanner.context()
+    assert context is not scanner
+    assert context.res_words is scanner.res_words and context.sp_symbols is scanner.sp_symbols
+    assert (context.engine, context.char_classes) == ("regex", scanner.char_classes)
+    assert Parser("iterative", scanner).context().engine == "iterative"
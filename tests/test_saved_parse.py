@@ -0,0 +1,60 @@
+import pytest
+
+from parser_class import Parser
+from saved_parse import SavedParse, save_parse
+
+SOURCE = "{ factorial }\nread x;\nif 0 < x then\n  fact := 1;\n  repeat fact := fact * x; x := x - 1 until x = 0;\n  write fact\nend\n"
+
+
+def parse_and_save(tmp_path):
+    (tmp_path / "source.txt").write_text(SOURCE)
+    parser = Parser()
+    tree = parser.parse(str(tmp_path / "source.txt"), out_file_dir=str(tmp_path / "parser_output.txt"),
+                        render=False, save=str(tmp_path / "program.tpb"))
+    return parser, tree
+
+
+def test_round_trip(tmp_path):
+    parser, tree = parse_and_save(tmp_path)
+    saved = SavedParse(str(tmp_path / "program.tpb"))
+    try:
+        assert repr(saved.tree()) == repr(tree)
+        assert repr(saved.statement(1)) == repr(tree[1])
+        with pytest.raises(IndexError):
+            saved.statement(2)
+        tokens = saved.tokens
+        assert [tokens[i].literal for i in range(len(tokens))] == [i.literal for i in parser.tokens]
+        assert tokens.position(0) == (2, 1)
+        assert tokens.position(3) == (3, 1)
+        assert repr(Parser().parse_tokens(tokens)) == repr(tree)
+    finally:
+        saved.close()
+
+
+def test_tree_only(tmp_path):
+    _, tree = parse_and_save(tmp_path)
+    save_parse(str(tmp_path / "tree.tpb"), tree)
+    saved = SavedParse(str(tmp_path / "tree.tpb"))
+    try:
+        assert saved.tokens is None
+        # a statement only decodes the strings it uses
+        assert repr(saved.statement(0)) == "Read('x')"
+        assert [i for i in saved.string_cache if i is not None] == ["x"]
+        assert repr(saved.tree()) == repr(tree)
+    finally:
+        saved.close()
+
+
+@pytest.mark.parametrize("damage", ["empty", "magic", "truncated"])
+def test_bad_files(tmp_path, damage):
+    parse_and_save(tmp_path)
+    data = (tmp_path / "program.tpb").read_bytes()
+    if damage == "empty":
+        data = b""
+    elif damage == "magic":
+        data = b"NOTAPRS\x00" + data[8:]
+    else:
+        data = data[:len(data) - 12]
+    (tmp_path / "bad.tpb").write_bytes(data)
+    with pytest.raises(ValueError):
+        SavedParse(str(tmp_path / "bad.tpb"))
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from scanner_class import Scanner
+
+EDGE_CASES = [
+    "read x",                        # the last token touches the end of the file
+    "read x;\nwrite x",
+    "write 12",
+    "x := 1",
+    "",
+    "\n\n",
+    "{ comment } write 1\n",
+    "{ a comment\nover lines } x := 2;\n",
+    "{ never closed\nwrite 1\n",
+    "x := 1 { trailing }",
+    "read x; $ write x\n",           # invalid characters
+    "x := 1;\nWrite x\n",
+    "x := 1;\n\twrite x\n",
+    "x :\n= 3\n",                    # an assignment split over lines
+    "x :",
+    "if x<1then y:=x*(2-3)/4 end;\n",
+    "abc123 12abc\n",
+]
+
+
+def scan(path, engine, capsys, **tables):
+    scanner = Scanner(engine=engine, **tables)
+    result = scanner.scan(path, write_opt=False)
+    return result, [(i.literal, i.base_type, i.line, i.column) for i in scanner.tokens], capsys.readouterr().out
+
+
+def check_parity(tmp_path, text, capsys):
+    path = tmp_path / "source.txt"
+    path.write_text(text)
+    fsm = scan(str(path), "fsm", capsys)
+    assert scan(str(path), "regex", capsys) == fsm, text
+    return fsm
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_regex_engine_matches_the_fsm(tmp_path, text, capsys):
+    check_parity(tmp_path, text, capsys)
+
+
+def test_regex_engine_matches_the_fsm_on_the_sample(tmp_path, capsys):
+    with open(os.path.join(os.path.dirname(__file__), "..", "tiny_sample_code.txt")) as in_file:
+        assert check_parity(tmp_path, in_file.read(), capsys)[0] == 1
+
+
+def test_edge_cases(tmp_path, capsys):
+    # like the FSM, the regex engine drops a last token touching the end of the file
+    # and locates the tokens at the same line and column
+    assert check_parity(tmp_path, "read x", capsys)[:2] == (1, [("read", "reserved word", 1, 1)])
+    assert check_parity(tmp_path, "{ c } write 1\n", capsys)[1] == [
+        ("write", "reserved word", 1, 7), ("1", "number", 1, 13)]
+    assert check_parity(tmp_path, "read x;\n$ write x\n", capsys)[0] == 0
+    assert check_parity(tmp_path, "read x;\n$ write x\n", capsys)[2].split()[-1] == "2"
+    with pytest.raises(ValueError):
+        Scanner(engine="lalr")
+
+
+def test_dialect_tables(tmp_path, capsys):
+    tables = {"res_words": Scanner.RES_WORDS + ("loop", "while", "do"),
+              "sp_symbols": set(Scanner.SP_SYMBOLS) | {"!", "%"}}
+    path = tmp_path / "source.txt"
+    path.write_text("while x < 10 do x := x % 3 ! loop\nread y; { c } end;\n")
+    fsm = scan(str(path), "fsm", capsys, **tables)
+    assert scan(str(path), "regex", capsys, **tables) == fsm
+    assert fsm[1][:2] == [("while", "reserved word", 1, 1), ("x", "identifier", 1, 7)]
+    assert ("%", "special symbol", 1, 24) in fsm[1] and ("loop", "reserved word", 1, 30) in fsm[1]
+    with pytest.raises(ValueError):
+        Scanner(sp_symbols=Scanner.SP_SYMBOLS + ("<=",))
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_parser_class_imports_no_optional_module():
+    code = ("import sys, parser_class; print(' '.join(m for m in ('re', 'syntaxtree_draw', 'tree_export', "
+            "'concurrent.futures', 'pygraphviz', 'json', 'optimizer_class', 'saved_parse') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, stdout=subprocess.PIPE, check=True,
+                            universal_newlines=True)
+    assert result.stdout.strip() == ""
+
+
+def test_parse_only_entry_point(tmp_path):
+    program = tmp_path / "program.txt"
+    program.write_text("read x;\nwrite x\n")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    code = ("import runpy, sys; sys.argv = sys.argv[1:]; runpy.run_path(sys.argv[0], run_name='__main__');"
+            " print(sorted(sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code, os.path.join(ROOT, "parser.py"), str(program), "--no-render"],
+                            cwd=str(tmp_path), env=env, stdout=subprocess.PIPE, check=True, universal_newlines=True)
+    assert "Parser executed successfully" in result.stdout
+    assert "'syntaxtree_draw'" not in result.stdout
+    assert (tmp_path / "parser_output.txt").read_text().startswith("Read_Statement found\n")
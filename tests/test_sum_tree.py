@@ -0,0 +1,35 @@
+import random
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+import pytest
+
+from sum_tree_ds import SumTree
+
+
+def test_matches_a_list_through_random_edits():
+    rng = random.Random(7)
+    for _ in range(100):
+        values = [rng.choice((0, 0, 1, 2, 5)) for _ in range(rng.randint(0, 30))]
+        tree = SumTree(values)
+        for _ in range(20):
+            assert tree.values() == values
+            assert len(tree) == len(values)
+            ends = list(accumulate(values))
+            for total in range(-1, (ends[-1] if ends else 0) + 2):
+                assert tree.bisect_left(total) == bisect_left(ends, total)
+                assert tree.bisect_right(total) == bisect_right(ends, total)
+            for i in range(len(values) + 1):
+                assert tree.prefix(i) == sum(values[:i])
+            start = rng.randint(0, len(values))
+            stop = rng.randint(start, len(values))
+            new = [rng.choice((0, 1, 3)) for _ in range(rng.randint(0, 4))]
+            tree.replace(start, stop, new)
+            values[start:stop] = new
+
+
+def test_getitem():
+    tree = SumTree([4, 0, 2])
+    assert [tree[0], tree[1], tree[2], tree[-1]] == [4, 0, 2, 2]
+    with pytest.raises(IndexError):
+        tree[3]
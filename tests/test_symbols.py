@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from parser_class import Parser
+
+SOURCE = ("read x;\n"
+          "if 0 < x then\n"
+          "fact := 1;\n"
+          "repeat fact := fact * x; x := x - 1 until x = 0;\n"
+          "write fact + y\n"
+          "end;\n"
+          "unused := 2\n")
+
+
+@pytest.mark.parametrize("engine", ["recursive", "iterative"])
+def test_cross_reference(engine):
+    parser = Parser(engine)
+    parser.parse_text(SOURCE, symbols=True)
+    symbols = parser.symbols
+    assert symbols.variables() == ["x", "fact", "y", "unused"]
+    assert symbols.definitions("fact") == [("assign", 3, 1, 8), ("assign", 4, 8, 13)]
+    # the right hand side is used before the target is assigned
+    assert symbols.occurrences("fact")[1:3] == [("use", 4, 16, 15), ("assign", 4, 8, 13)]
+    assert [i[1:3] for i in symbols.uses("x")] == [(2, 8), (4, 23), (4, 31), (4, 43)]
+    assert symbols.used_before_assignment() == [("y", 5, 14)]
+    assert symbols.unused() == [("unused", 7, 1)]
+    assert json.loads(json.dumps(symbols.to_dict()))["x"]["definitions"] == [[1, 6], [4, 26]]
+
+
+@pytest.mark.parametrize("engine", ["recursive", "iterative"])
+def test_rolled_back_on_errors(engine):
+    parser = Parser(engine)
+    parser.parse_text("a := b;\nc := (d + ;\nwrite e\n", recover=True, symbols=True)
+    # the failed assignment of c records neither c nor d
+    assert parser.symbols.variables() == ["b", "a", "e"]
+
+
+def test_off_by_default():
+    parser = Parser()
+    parser.parse_text("x := y\n")
+    assert parser.symbols is None
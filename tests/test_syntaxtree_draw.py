@@ -0,0 +1,129 @@
+import os
+
+from parser_class import Parser
+from syntaxtree_draw import SyntaxTree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def labels(graph):
+    return dict((name, label.replace("\n", " ")) for name, label, _ in graph.nodes)
+
+
+def ranks(graph):
+    """
+    The pairs of nodes chained at the same rank
+    """
+    return [(chain[i], chain[i + 1]) for chain in graph.chains for i in range(len(chain) - 1)]
+
+
+def draw(tmp_path, text, engine="recursive"):
+    path = str(tmp_path / "program.txt")
+    with open(path, "w") as out_file:
+        out_file.write(text)
+    graph = SyntaxTree(None)
+    graph.draw(Parser(engine).parse(path, str(tmp_path / "parser_output.txt"), render=False))
+    return graph
+
+
+def edges(tmp_path, text):
+    graph = draw(tmp_path, text)
+    names = labels(graph)
+    return [(names[i], names[j]) for i, j in graph.edges]
+
+
+def test_every_node_has_one_edge_from_above(tmp_path, capsys):
+    with open(os.path.join(ROOT, "tiny_sample_code.txt")) as in_file:
+        graph = draw(tmp_path, in_file.read() + " x := (1 + 2) * 3 < 4 - x - 1; write (x)\n")
+    lower = [j for _, j in graph.edges]
+    assert sorted(lower) == sorted(set(labels(graph)) - {"R0"})
+
+
+def test_operator_chains_are_left_associative(tmp_path, capsys):
+    # formerly the 2nd "-" hung below the 1st one, as for 1 - (2 - 3)
+    assert draw(tmp_path, "x := 1 - 2 - 3\n").edges == [
+        ("O2", "C1"), ("O2", "C3"), ("A0", "O4"), ("O4", "O2"), ("O4", "C5")]
+
+
+def test_operator_operands_hang_below_it(tmp_path, capsys):
+    # formerly the "*" and the "+" hung below the statement, side by side
+    assert edges(tmp_path, "x := a * b + c\n") == [
+        ("OP (*)", "Id (a)"), ("OP (*)", "Id (b)"), ("Assign (x)", "OP (+)"), ("OP (+)", "OP (*)"),
+        ("OP (+)", "Id (c)")]
+    # formerly the "+" hung below the If instead of the "<"
+    assert edges(tmp_path, "if a + b < c then read x end\n")[2:4] == [("If", "OP (<)"), ("OP (<)", "OP (+)")]
+
+
+def test_no_extra_edges(tmp_path, capsys):
+    # formerly a was also linked to the Write and b to the "+"
+    assert edges(tmp_path, "write a + b * c\n") == [
+        ("Write", "OP (+)"), ("OP (+)", "Id (a)"), ("OP (+)", "OP (*)"), ("OP (*)", "Id (b)"),
+        ("OP (*)", "Id (c)")]
+    # formerly b was also linked to the Assign
+    assert edges(tmp_path, "x := a < b\n") == [("Assign (x)", "OP (<)"), ("OP (<)", "Id (a)"), ("OP (<)", "Id (b)")]
+
+
+def test_no_loose_operands(tmp_path, capsys):
+    # each of these operands was formerly drawn without any edge
+    assert ("If", "Id (a)") in edges(tmp_path, "if a then read x end\n")
+    assert ("Repeat", "Id (a)") in edges(tmp_path, "repeat read x until a\n")
+    assert edges(tmp_path, "write (a)\n") == [("Write", "Id (a)")]
+    assert ("OP (<)", "Id (b)") in edges(tmp_path, "x := a < (b)\n")
+
+
+def test_statements_opening_a_part(tmp_path, capsys):
+    graph = draw(tmp_path, "if a < 1 then read x; write x; if x < 2 then write 2 end end\n")
+    # the Read hangs below the If, formerly it was chained to it at the same rank,
+    # and the Write is chained to the Read, formerly it hung below it
+    assert ("I0", "R4") in graph.edges and ("R4", "W5") in ranks(graph)
+    assert ("I0", "R4") not in ranks(graph)
+    # the same for an if or a repeat opening a part
+    graph = draw(tmp_path, "repeat if x < 2 then repeat read x until 1 end until 1\n")
+    assert graph.edges[0] == ("R0", "I1") and not graph.chains
+    assert ("I1", "R5") in graph.edges
+
+
+def test_write_node_names(tmp_path, capsys):
+    # a Write hanging below its parent was formerly named A<n> like an assignment
+    assert draw(tmp_path, "if a < 1 then write a end\n").edges[3] == ("I0", "W4")
+
+
+def test_deep_trees(tmp_path, capsys):
+    depth = 20000
+    graph = draw(tmp_path, "x := " + "(" * depth + "x" + " + 1)" * depth + ";\n"
+                 + "if x < 1 then " * depth + "write x" + " end" * depth + "\n", "iterative")
+    assert len(graph.nodes) == 1 + 2 * depth + 1 + 4 * depth + 2
+    assert len(graph.edges) == len(graph.nodes) - 1
+
+
+def test_dot(tmp_path, capsys):
+    assert draw(tmp_path, "read x; if x < 1 then write x - 1 end\n").to_dot() == (
+        'strict graph {\n'
+        '\tR0\t[label="Read\\n(x)", shape=square];\n'
+        '\tI1\t[label="If", shape=square];\n'
+        '\tC2\t[label="Id\\n(x)", shape=circle];\n'
+        '\tO3\t[label="OP\\n(<)", shape=circle];\n'
+        '\tC4\t[label="const\\n(1)", shape=circle];\n'
+        '\tW5\t[label="Write", shape=square];\n'
+        '\tC6\t[label="Id\\n(x)", shape=circle];\n'
+        '\tO7\t[label="OP\\n(-)", shape=circle];\n'
+        '\tC8\t[label="const\\n(1)", shape=circle];\n'
+        '\tR0 -- I1;\n'
+        '\tI1 -- O3;\n'
+        '\tO3 -- C2;\n'
+        '\tO3 -- C4;\n'
+        '\tI1 -- W5;\n'
+        '\tW5 -- O7;\n'
+        '\tO7 -- C6;\n'
+        '\tO7 -- C8;\n'
+        '\t{rank=same; R0; I1;}\n'
+        '}\n')
+
+
+def test_one_chain_per_statement_sequence(tmp_path, capsys):
+    graph = draw(tmp_path, "read x; if x < 1 then write 1; write 2; write 3 end; write x\n")
+    names = labels(graph)
+    assert [[names[i] for i in chain] for chain in graph.chains] == [
+        ["Read (x)", "If", "Write"], ["Write", "Write", "Write"]]
+    assert graph.to_dot().count("rank=same") == 2
+    assert "subgraph" not in graph.to_dot()
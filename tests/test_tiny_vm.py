@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from compiler_class import Compiler
+from parser_class import Parser
+from tiny_vm import VM, compile_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(text, inputs=()):
+    return VM(Compiler().compile(Parser().parse_text(text))).run(inputs)
+
+
+def test_factorial_sample(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    code_object = compile_file(os.path.join(ROOT, "tiny_sample_code.txt"))
+    assert VM(code_object).run([5]) == [120]
+    assert VM(code_object).run([0]) == []
+
+
+def test_arithmetic_and_comparisons():
+    assert run("write 7 / 2; write 0 - 7 / 2; write 2 < 3; write 2 = 3; write (1 + 2) * 3\n") == [3, -3, 1, 0, 9]
+
+
+def test_if_else_and_repeat():
+    text = "read x; if x < 10 then y := 1 else y := 2 end; repeat y := y * 2; x := x - 1 until x = 0; write y\n"
+    assert run(text, [3]) == [8]
+    assert run(text, [11]) == [4096]
+
+
+def test_division_by_zero():
+    with pytest.raises(ValueError):
+        run("x := 0; write 1 / x\n")
@@ -0,0 +1,68 @@
+import pytest
+
+from parser_class import Parser
+from scanner_class import Scanner
+from token_ds import (Token, TokenList, TokenTable, NUMBER, IDENTIFIER, RESERVED_WORD, ASSIGNMENT,
+                      K_IF, K_ASSIGN, K_IDENTIFIER, K_NUMBER, K_OTHER, K_WRITE, kind_of)
+
+PROGRAM = "{ factorial }\nread x;\nif 0 < x then\n  fact := 1;\n  repeat fact := fact * x; x := x - 1 until x = 0;\n  write fact\nend\n"
+
+
+def test_token():
+    token = Token("if", "reserved word", offset=4, line=2, column=1)
+    assert (token.type_code, token.base_type, token.kind) == (RESERVED_WORD, "reserved word", K_IF)
+    assert Token(":=", ASSIGNMENT).kind == K_ASSIGN
+    assert Token("foo", "reserved word").kind == K_OTHER
+    assert Token(":=", ASSIGNMENT).base_type == "assignment"
+    assert Token("x", "identifier").is_id() and Token("12", "number").is_number()
+    with pytest.raises(AttributeError):
+        token.extra = 1
+
+
+def test_token_list():
+    tokens = TokenList([Token("read", RESERVED_WORD), Token("x", IDENTIFIER)])
+    assert (tokens.literal(1), tokens.type_code(1)) == ("x", IDENTIFIER)
+
+
+def test_token_list_position():
+    tokens = TokenList([Token("read", RESERVED_WORD, None, 0, 1, 1), Token("x", IDENTIFIER, None, 5, 1, 6)])
+    assert tokens.position(1) == (1, 6)
+    assert tokens.position(2) == (1, 7)
+    assert TokenList().position(0) == (None, None)
+
+
+def test_token_table():
+    table = TokenTable("x := 12;\nwrite x\n")
+    for type_code, start, length in ((IDENTIFIER, 0, 1), (ASSIGNMENT, 2, 2), (NUMBER, 5, 2),
+                                     (RESERVED_WORD, 9, 5), (IDENTIFIER, 15, 1)):
+        table.append(type_code, start, length, kind_of(table.source[start:start + length], type_code))
+    assert len(table) == 5
+    assert [table.literal(i) for i in range(5)] == ["x", ":=", "12", "write", "x"]
+    assert [table.type_code(i) for i in range(3)] == [IDENTIFIER, ASSIGNMENT, NUMBER]
+    assert [table.kind(i) for i in range(4)] == [K_IDENTIFIER, K_ASSIGN, K_NUMBER, K_WRITE]
+    assert table.position(3) == (2, 1)
+    assert table.position(5) == (3, 1)
+    token = table[4]
+    assert (token.literal, token.base_type) == ("x", "identifier")
+    assert (token.offset, token.line, token.column) == (15, 2, 7)
+
+
+def test_table_scans_like_the_fsm(tmp_path, capsys):
+    path = str(tmp_path / "program.txt")
+    with open(path, "w") as out_file:
+        out_file.write(PROGRAM)
+    scanner = Scanner()
+    scanner.scan(path, write_opt=False)
+    expected = [(i.literal, i.type_code, i.kind, i.offset, i.line, i.column) for i in scanner.tokens]
+    for table in (Scanner().scan_table(path), Scanner().scan_mapped(path)):
+        assert [(i.literal, i.type_code, i.kind, i.offset, i.line, i.column)
+                for i in (table[j] for j in range(len(table)))] == expected
+        if hasattr(table, "close"):
+            table.close()
+    Parser().parse(path, str(tmp_path / "list.txt"), render=False, trace="list")
+    Parser().parse(path, str(tmp_path / "compact.txt"), render=False, compact=True,
+                   trace="list")
+    assert (tmp_path / "compact.txt").read_text() == (tmp_path / "list.txt").read_text()
+    Parser().parse(path, str(tmp_path / "mapped.txt"), render=False, mapped=True,
+                   trace="list")
+    assert (tmp_path / "mapped.txt").read_text() == (tmp_path / "list.txt").read_text()
@@ -0,0 +1,38 @@
+import os
+
+from parser_class import Parser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_program(path, copies):
+    with open(os.path.join(ROOT, "tiny_sample_code.txt")) as in_file:
+        text = in_file.read()
+    with open(path, "w") as out_file:
+        out_file.write(" ".join([text] * copies))
+
+
+def test_list_and_stream_write_the_same_trace(tmp_path, capsys):
+    path = str(tmp_path / "program.txt")
+    write_program(path, 50)
+    listed = str(tmp_path / "listed.txt")
+    streamed = str(tmp_path / "streamed.txt")
+    parser = Parser()
+    parser.parse(path, listed, render=False, trace="list")
+    lines = parser.trace
+    assert lines[-1] == "Program found"
+    assert "Statement Found" in lines and "Factor found" in lines
+    Parser().parse(path, streamed, render=False, trace="stream")
+    with open(listed) as listed_file, open(streamed) as streamed_file:
+        text = listed_file.read()
+        assert text == streamed_file.read()
+    assert text == "".join(i + "\n" for i in lines) + "\n"
+
+
+def test_no_trace(tmp_path, capsys):
+    path = str(tmp_path / "program.txt")
+    write_program(path, 2)
+    parser = Parser()
+    parser.parse(path, str(tmp_path / "out.txt"), render=False)
+    assert parser.trace is None
+    assert not (tmp_path / "out.txt").exists()
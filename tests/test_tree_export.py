@@ -0,0 +1,44 @@
+import json
+
+from parser_class import Parser
+from tree_export import export, to_json, to_sexp
+
+def parse(tmp_path, text, engine="recursive", **options):
+    path = tmp_path / "program.txt"
+    path.write_text(text)
+    return Parser(engine).parse(str(path), str(tmp_path / "parser_output.txt"), render=False, **options)
+
+
+SOURCE = "read x;\nif 0 < x then fact := 1; repeat fact := fact * x; x := x - 1 until x = 0; write fact end\n"
+
+
+def test_sexp(tmp_path, capsys):
+    tree = parse(tmp_path, SOURCE)
+    assert to_sexp(tree[0]) == "(read x)"
+    assert to_sexp(tree[1]) == ("(if (< 0 x) (then (assign fact 1) (repeat (body (assign fact (* fact x)) "
+                                "(assign x (- x 1))) (= x 0)) (write fact)))")
+
+
+def test_json(tmp_path, capsys):
+    tree = parse(tmp_path, "if x < 1 then write x else y := (2) end\n")
+    assert json.loads(to_json(tree)) == [{
+        "node": "If",
+        "test": {"node": "Op", "op": "<", "left": {"node": "Id", "name": "x"},
+                 "right": {"node": "Const", "value": "1"}},
+        "then_part": [{"node": "Write", "expr": {"node": "Id", "name": "x"}}],
+        "else_part": [{"node": "Assign", "name": "y", "expr": {"node": "Const", "value": "2"}}]}]
+    assert to_json([]) == "[]"
+    assert json.loads(to_json(parse(tmp_path, "repeat read x until x\n")))[0]["body"] == [
+        {"node": "Read", "name": "x"}]
+
+
+def test_deep_trees(tmp_path, capsys):
+    depth = 5000
+    text = ("x := " + "1 - (" * depth + "1" + ")" * depth + ";\n"
+            + "if x < 1 then " * depth + "write x" + " end" * depth + "\n")
+    tree = parse(tmp_path, text, "iterative", export=str(tmp_path / "tree.json"))
+    export(tree, str(tmp_path / "tree.sexp"))
+    assert (tmp_path / "tree.sexp").read_text().count("(if") == depth
+    assert to_sexp(tree[0]).count("(- 1") == depth
+    # json.loads() recurses as well, count the nodes in the text
+    assert (tmp_path / "tree.json").read_text().count('"Op"') == 2 * depth
@@ -0,0 +1,178 @@
+"""
+Seeded generator of valid TINY programs, used by the benchmarks
+
+    python tiny_generator.py out.txt --statements 100000 --depth 4 --expr-length 6 --comments 0.1
+"""
+import argparse
+import random
+import sys
+
+RESERVED = ("if", "then", "else", "end", "repeat", "until", "read", "write")
+
+
+class TinyGenerator(object):
+    """
+    Generates random but valid TINY programs, the same seed always gives the same program
+
+    ### Attributes
+    - statements : the total number of statements, nested ones included
+    - max_depth : the max if/repeat nesting depth
+    - expr_length : the max number of operands of an expression
+    - comment_density : the probability of a comment before each statement
+    - rand : the seeded random generator
+
+    ### Args
+    - seed : the random seed
+    - statements, max_depth, expr_length, comment_density : see the attributes
+    - num_vars : how many different identifiers the programs use
+    """
+
+    def __init__(self, seed=0, statements=100, max_depth=3, expr_length=4,
+                 comment_density=0.1, num_vars=16):
+        """
+        Constructor
+        """
+        self.statements = statements
+        self.max_depth = max_depth
+        self.expr_length = max(1, expr_length)
+        self.comment_density = comment_density
+        self.rand = random.Random(seed)
+        self.variables = self._variables(num_vars)
+        self._left = 0
+
+    def _variables(self, count):
+        """
+        Builds <count> identifier names, letters only and none of them reserved
+        """
+        names = []
+        i = 0
+        while len(names) < count:
+            name = ""
+            n = i
+            while True:
+                name = chr(ord('a') + n % 26) + name
+                n = n // 26 - 1
+                if n < 0:
+                    break
+            if name not in RESERVED:
+                names.append(name)
+            i += 1
+        return names
+
+    def program(self):
+        """
+        Returns a whole program as a string
+        """
+        return "".join(self.generate())
+
+    def write(self, out_file_dir):
+        """
+        Writes a program to out_file_dir without building it in memory, returns its size
+        """
+        size = 0
+        with open(out_file_dir, 'w') as out_file:
+            for chunk in self.generate():
+                out_file.write(chunk)
+                size += len(chunk)
+        return size
+
+    def generate(self):
+        """
+        Yields the program text piece by piece, one top level statement at a time
+        """
+        self._left = max(1, self.statements)
+        first = True
+        while self._left > 0:
+            if not first:
+                yield ";\n"
+            first = False
+            yield self.statement(0, "")
+        yield "\n"
+
+    def statement(self, depth, indent):
+        """
+        Returns one random statement, nested statements are taken from the budget too
+        """
+        rand = self.rand
+        self._left -= 1
+        text = indent
+        if rand.random() < self.comment_density:
+            words = [rand.choice(self.variables) for _ in range(rand.randint(1, 5))]
+            text += "{ " + " ".join(words) + " }\n" + indent
+        choice = rand.random()
+        if depth < self.max_depth and self._left > 0 and choice < 0.15:
+            text += "if " + self.expr(True) + " then\n" + self.stmt_seq(depth + 1, indent + "  ")
+            if rand.random() < 0.5 and self._left > 0:
+                text += "\n" + indent + "else\n" + self.stmt_seq(depth + 1, indent + "  ")
+            return text + "\n" + indent + "end"
+        if depth < self.max_depth and self._left > 0 and choice < 0.25:
+            return text + "repeat\n" + self.stmt_seq(depth + 1, indent + "  ") + "\n" + indent \
+                + "until " + self.expr(True)
+        if choice < 0.35:
+            return text + "read " + rand.choice(self.variables)
+        if choice < 0.45:
+            return text + "write " + self.expr(False)
+        return text + rand.choice(self.variables) + " := " + self.expr(False)
+
+    def stmt_seq(self, depth, indent):
+        """
+        Returns a non empty statement sequence
+        """
+        stmts = [self.statement(depth, indent)]
+        while self._left > 0 and self.rand.random() < 0.6:
+            stmts.append(self.statement(depth, indent))
+        return ";\n".join(stmts)
+
+    def expr(self, compare, paren_depth=0):
+        """
+        Returns a random expression, a comparison if <compare>
+        """
+        if compare:
+            return self.simple_expr(paren_depth) + " " + self.rand.choice("<=") + " " \
+                + self.simple_expr(paren_depth)
+        return self.simple_expr(paren_depth)
+
+    def simple_expr(self, paren_depth):
+        """
+        Returns operands joined by + - * /, some of them parenthesized
+        """
+        rand = self.rand
+        parts = [self.factor(paren_depth)]
+        for _ in range(rand.randint(0, self.expr_length - 1)):
+            parts.append(rand.choice("+-*/"))
+            parts.append(self.factor(paren_depth))
+        return " ".join(parts)
+
+    def factor(self, paren_depth):
+        """
+        Returns a number, an identifier or a parenthesized expression
+        """
+        rand = self.rand
+        choice = rand.random()
+        if paren_depth < 2 and choice < 0.1:
+            return "(" + self.simple_expr(paren_depth + 1) + ")"
+        if choice < 0.5:
+            return str(rand.randint(0, 999))
+        return rand.choice(self.variables)
+
+
+def main(argv=None):
+    """
+    Command line interface
+    """
+    arg_parser = argparse.ArgumentParser(description="Generate a random valid TINY program")
+    arg_parser.add_argument("out_file", help="where to write the program")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--statements", type=int, default=100)
+    arg_parser.add_argument("--depth", type=int, default=3, help="max if/repeat nesting")
+    arg_parser.add_argument("--expr-length", type=int, default=4, help="max operands per expression")
+    arg_parser.add_argument("--comments", type=float, default=0.1, help="comment probability per statement")
+    args = arg_parser.parse_args(argv)
+    size = TinyGenerator(args.seed, args.statements, args.depth, args.expr_length,
+                         args.comments).write(args.out_file)
+    print("%d characters written to %s" % (size, args.out_file))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
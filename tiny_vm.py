@@ -0,0 +1,196 @@
+"""
+Runs TINY programs : the syntax tree is compiled to bytecode (see compiler_class, bytecode_ds)
+and executed by a dispatch loop over the instructions
+
+    python tiny_vm.py tiny_sample_code.txt 5          # the inputs of the read statements
+    echo 5 | python tiny_vm.py tiny_sample_code.txt   # or one per line on stdin
+    python tiny_vm.py tiny_sample_code.txt --dis      # prints the compiled code
+    python tiny_vm.py -O tiny_sample_code.txt 5       # folds the constants first, see optimizer_class
+
+The values are unbounded integers, a variable is 0 until assigned, "/" truncates toward zero
+and the comparisons give 1 or 0
+"""
+import argparse
+import contextlib
+import io
+import sys
+
+from bytecode_ds import ADD, SUB, MUL, DIV, LT, EQ, MOVE, JUMP, JUMP_UNLESS, JUMP_UNLESS_LT, JUMP_UNLESS_EQ, \
+    READ, WRITE, HALT
+from compiler_class import Compiler
+from parser_class import Parser
+
+
+class VM(object):
+    """
+    Executes a CodeObject
+
+    The instructions are decoded once into (opcode, a, b, c) tuples and the slots are a plain
+    list, a step of the loop is then one tuple unpacking and a few list indexings. The opcodes
+    are tested in the order of their frequency in loops
+
+    ### Attributes
+    - code_object : the program
+    - instructions : its decoded instructions
+    - slots : the values of the last run, variables, constants and temporaries
+    - steps : the jumps taken by the last run [loop iterations and if branches]
+
+    ### Args
+    - code_object : the CodeObject to run
+    """
+
+    def __init__(self, code_object):
+        """
+        Constructor
+        """
+        self.code_object = code_object
+        self.instructions = code_object.instructions()
+        self.slots = None
+        self.steps = 0
+
+    def variables(self):
+        """
+        Returns the variables of the last run as a name to value dict
+        """
+        return dict(zip(self.code_object.names, self.slots))
+
+    def run(self, inputs=(), write=None, max_steps=None):
+        """
+        Runs the program from the start
+
+        ### Arguments
+        - inputs : iterable of the values read by the read statements, ints or int strings
+        - write : called with every written value, they are collected and returned otherwise
+        - max_steps : stops with an error after that many jumps, a guard against endless loops
+
+        ### Returns
+        the list of the written values, empty when write is given
+
+        ### Raises
+        ValueError : on a division by zero, a missing or invalid input, or too many steps
+        """
+        code_object = self.code_object
+        names = code_object.names
+        slots = [0] * code_object.num_slots
+        slots[len(names):len(names) + len(code_object.consts)] = code_object.consts
+        self.slots = slots
+        outputs = []
+        if write is None:
+            write = outputs.append
+        next_input = iter(inputs).__next__
+        instructions = self.instructions
+        # counts down to 0 on the taken jumps, never reached when negative
+        budget = -1 if max_steps is None else max_steps + 1
+        start_budget = budget
+        pc = 0
+        try:
+            while True:
+                op, a, b, c = instructions[pc]
+                pc += 1
+                if op == ADD:
+                    slots[a] = slots[b] + slots[c]
+                elif op == SUB:
+                    slots[a] = slots[b] - slots[c]
+                elif op == MUL:
+                    slots[a] = slots[b] * slots[c]
+                elif op == JUMP_UNLESS_EQ:
+                    if slots[a] != slots[b]:
+                        pc = c
+                        budget -= 1
+                        if budget == 0:
+                            break
+                elif op == JUMP_UNLESS_LT:
+                    if not slots[a] < slots[b]:
+                        pc = c
+                        budget -= 1
+                        if budget == 0:
+                            break
+                elif op == MOVE:
+                    slots[a] = slots[b]
+                elif op == JUMP:
+                    pc = a
+                    budget -= 1
+                    if budget == 0:
+                        break
+                elif op == LT:
+                    slots[a] = 1 if slots[b] < slots[c] else 0
+                elif op == EQ:
+                    slots[a] = 1 if slots[b] == slots[c] else 0
+                elif op == DIV:
+                    left = slots[b]
+                    right = slots[c]
+                    if right == 0:
+                        raise ValueError("Division by zero")
+                    quotient = abs(left) // abs(right)
+                    slots[a] = -quotient if (left < 0) != (right < 0) else quotient
+                elif op == JUMP_UNLESS:
+                    if not slots[a]:
+                        pc = b
+                        budget -= 1
+                        if budget == 0:
+                            break
+                elif op == READ:
+                    try:
+                        slots[a] = int(next_input())
+                    except StopIteration:
+                        raise ValueError('Missing input for "read ' + names[a] + '"')
+                elif op == WRITE:
+                    write(slots[a])
+                elif op == HALT:
+                    break
+                else:
+                    raise ValueError("Invalid opcode " + str(op) + " at " + str(pc - 1))
+        finally:
+            self.steps = start_budget - budget
+        if budget == 0:
+            raise ValueError("Stopped after " + str(max_steps) + " steps")
+        return outputs
+
+
+def compile_file(in_file_dir, optimize=False):
+    """
+    Parses and compiles a TINY program file, after simplifying its tree when optimize is true
+
+    ### Returns
+    the CodeObject
+
+    ### Raises
+    ValueError : if the program does not scan or parse
+    """
+    parser = Parser()
+    # the parser success message is of no use here
+    with contextlib.redirect_stdout(io.StringIO()):
+        tree = parser.parse(in_file_dir, render=False, compact=True, optimize=optimize)
+    if tree is None:
+        raise ValueError("Scanner error at line " + str(parser.scanner.error_line))
+    return Compiler().compile(tree)
+
+
+def main(argv=None):
+    """
+    Command line interface
+    """
+    arg_parser = argparse.ArgumentParser(description="Run a TINY program")
+    arg_parser.add_argument("program", help="the TINY program file")
+    arg_parser.add_argument("inputs", nargs="*", help="the values read by the program [stdin by default]")
+    arg_parser.add_argument("--dis", action="store_true", help="print the compiled code instead of running it")
+    arg_parser.add_argument("-O", "--optimize", action="store_true",
+                            help="fold the constants and remove the dead branches before compiling")
+    arg_parser.add_argument("--max-steps", type=int, default=None, help="stop endless loops after that many jumps")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        code_object = compile_file(args.program, args.optimize)
+        if args.dis:
+            print(code_object.disassemble())
+            return 0
+        inputs = args.inputs if args.inputs else (line for line in sys.stdin if line.strip())
+        VM(code_object).run(inputs, print, args.max_steps)
+    except ValueError as err:
+        print("Error : " + str(err), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
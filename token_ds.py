@@ -1,3 +1,47 @@
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+# token type codes, shared by every token instead of one type string per token
+NUMBER = 0
+IDENTIFIER = 1
+RESERVED_WORD = 2
+SPECIAL_SYMBOL = 3
+ASSIGNMENT = 4
+UNKNOWN = 5
+TYPE_NAMES = ("number", "identifier", "reserved word", "special symbol", "assignment", "")
+TYPE_CODES = dict((name, code) for code, name in enumerate(TYPE_NAMES))
+
+# token kinds, one code per reserved word and special symbol of the language, so the parser
+# compares ints instead of literals. Reserved words and symbols of other dialects are K_OTHER
+KIND_NAMES = ("<eof>", "<number>", "<identifier>", "<other>",
+              "if", "then", "else", "end", "repeat", "until", "read", "write",
+              ":=", "+", "-", "*", "/", "=", "<", "(", ")", ";")
+(EOF, K_NUMBER, K_IDENTIFIER, K_OTHER,
+ K_IF, K_THEN, K_ELSE, K_END, K_REPEAT, K_UNTIL, K_READ, K_WRITE,
+ K_ASSIGN, K_PLUS, K_MINUS, K_TIMES, K_OVER, K_EQUAL, K_LESS, K_LPAREN, K_RPAREN, K_SEMI) = range(len(KIND_NAMES))
+KINDS = dict((name, code) for code, name in enumerate(KIND_NAMES) if code > K_OTHER)
+
+# the operator group of every kind, indexed by the kind code
+NO_OP = 0
+MUL_OP = 1
+ADD_OP = 2
+COMPARE_OP = 3
+OP_GROUP = tuple(MUL_OP if k in (K_TIMES, K_OVER) else ADD_OP if k in (K_PLUS, K_MINUS)
+                 else COMPARE_OP if k in (K_EQUAL, K_LESS) else NO_OP for k in range(len(KIND_NAMES)))
+
+
+def kind_of(literal, type_code):
+    """
+    Returns the kind code of a token
+    """
+    if type_code == IDENTIFIER:
+        return K_IDENTIFIER
+    if type_code == NUMBER:
+        return K_NUMBER
+    return KINDS.get(literal, K_OTHER)
+
+
 class Token(object):
     """
     Implementation of the Scanner tokens
@@ -6,28 +50,298 @@ class Token(object):
     - literal : the literal value of the token, this might contain the identifier name or numeber
     value or whatever
     the reserved word
-    - base_type : a string used for indicating wheather this token is a number, identifier
-    or some reserved word
+    - type_code : an int used for indicating wheather this token is a number, identifier
+    or some reserved word, one of the module level type codes
+    - base_type : the type name of type_code [read only]
+    - kind : the kind code, telling apart every reserved word and symbol
+    - offset : the index of the first character of the token in the source text
+    - line : the 1 based line of the first character
+    - column : the 1 based column of the first character
+    The position attributes are None for tokens not built by the scanner
 
     ### Args
     - literal : the literal value of the token
-    - base_type : the type  [used for further processing @ the parser]
+    - base_type : the type  [used for further processing @ the parser], either a type code
+    or its name
+    - kind : the kind code, computed from the literal and the type when not given
+    - offset, line, column : see the attributes
     """
-    def __init__(self, literal, base_type=''):
+    __slots__ = ("literal", "type_code", "kind", "offset", "line", "column")
+
+    def __init__(self, literal, base_type='', kind=None, offset=None, line=None, column=None):
         """
         constructor
         """
         self.literal = literal
-        self.base_type = base_type
+        if base_type.__class__ is int:
+            self.type_code = base_type
+        else:
+            self.type_code = TYPE_CODES.get(base_type, UNKNOWN)
+        self.kind = kind_of(literal, self.type_code) if kind is None else kind
+        self.offset = offset
+        self.line = line
+        self.column = column
+
+    @property
+    def base_type(self):
+        """
+        the type name, e.g. 'number' or 'reserved word'
+        """
+        return TYPE_NAMES[self.type_code]
 
     def is_number(self):
         """
         returns true if this token is a number, be it a float or an integer
         """
-        return self.base_type == 0
+        return self.type_code == NUMBER
 
     def is_id(self):
         """
         returns true if this token is for an identifier
         """
-        return self.base_type == 1
+        return self.type_code == IDENTIFIER
+
+
+class TokenList(list):
+    """
+    A plain list of Token objects with the accessors the parser reads tokens through,
+    shared with TokenBuffer and TokenTable
+    """
+    def literal(self, index):
+        """
+        returns the literal of the token #index
+        """
+        return self[index].literal
+
+    def type_code(self, index):
+        """
+        returns the type code of the token #index
+        """
+        return self[index].type_code
+
+    def kind(self, index):
+        """
+        returns the kind code of the token #index
+        """
+        return self[index].kind
+
+    def position(self, index):
+        """
+        returns the (line, column) of the token #index, right after the last token
+        for an index past the end
+        """
+        if index < len(self):
+            return self[index].line, self[index].column
+        return end_position(self[-1] if self else None)
+
+
+class TokenBuffer(object):
+    """
+    A small window over a token iterator, lets the parser index the tokens by their
+    absolute position as if they were stored in a list while only the last few stay in memory
+
+    ### Attributes
+    - source : the token iterator
+    - window : the tokens currently held, window[0] is the token #first
+    - first : the absolute index of the oldest token still held
+
+    ### Args
+    - tokens : any iterable of Token objects, e.g. Scanner.iter_tokens()
+    - lookback : how many already consumed tokens can still be indexed
+    """
+    def __init__(self, tokens, lookback=2):
+        """
+        constructor
+        """
+        self.source = iter(tokens)
+        self.window = deque(maxlen=lookback + 1)
+        self.first = 0
+
+    def __getitem__(self, index):
+        """
+        returns the token #index, pulling from the source as needed
+        raises IndexError past the end of the stream or for an already released token
+        """
+        window = self.window
+        while self.first + len(window) <= index:
+            try:
+                token = next(self.source)
+            except StopIteration:
+                raise IndexError('token index out of range')
+            if len(window) == window.maxlen:
+                self.first += 1
+            window.append(token)
+        if index < self.first:
+            raise IndexError('token #' + str(index) + ' was already released')
+        return window[index - self.first]
+
+    def available(self, index):
+        """
+        returns true if the stream holds a token #index
+        """
+        try:
+            self[index]
+        except IndexError:
+            return False
+        return True
+
+    def literal(self, index):
+        """
+        returns the literal of the token #index
+        """
+        return self[index].literal
+
+    def type_code(self, index):
+        """
+        returns the type code of the token #index
+        """
+        return self[index].type_code
+
+    def kind(self, index):
+        """
+        returns the kind code of the token #index
+        """
+        return self[index].kind
+
+    def position(self, index):
+        """
+        returns the (line, column) of the token #index, right after the last token
+        for an index past the end
+        """
+        if self.available(index):
+            return self[index].line, self[index].column
+        return end_position(self.window[-1] if self.window else None)
+
+
+def end_position(token):
+    """
+    Returns the (line, column) right after token, (None, None) without a token or a position
+    """
+    if token is None or token.line is None:
+        return None, None
+    return token.line, token.column + len(token.literal)
+
+
+class TokenTable(object):
+    """
+    Struct-of-arrays token storage, a token is only a (type code, start offset, length)
+    triple into the source text, no per-token object is ever built
+
+    ### Attributes
+    - source : the scanned text, literals are sliced out of it on demand
+    - type_codes : array of the token type codes
+    - kinds : array of the token kind codes
+    - starts : array of the token offsets into source
+    - lengths : array of the token lengths
+    - line_starts : offsets of the source lines, built by the first position() / locate() call
+
+    ### Args
+    - source : the scanned text
+    """
+    NEWLINE = "\n"
+
+    def __init__(self, source):
+        """
+        constructor
+        """
+        self.source = source
+        self.type_codes = array('b')
+        self.kinds = array('b')
+        self.starts = array('q')
+        self.lengths = array('l')
+        self.line_starts = None
+
+    def append(self, type_code, start, length, kind):
+        """
+        stores one more token
+        """
+        self.type_codes.append(type_code)
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def __len__(self):
+        return len(self.type_codes)
+
+    def __getitem__(self, index):
+        """
+        builds a Token object for the token #index, only meant for occasional access
+        """
+        line, column = self.position(index)
+        return Token(self.literal(index), self.type_codes[index], self.kinds[index],
+                     self.starts[index], line, column)
+
+    def literal(self, index):
+        """
+        returns the literal of the token #index
+        """
+        if self.type_codes[index] == ASSIGNMENT:
+            # ':' and '=' may be apart in the source, e.g. ': ='
+            return ":="
+        start = self.starts[index]
+        return self.source[start:start + self.lengths[index]]
+
+    def type_code(self, index):
+        """
+        returns the type code of the token #index
+        """
+        return self.type_codes[index]
+
+    def kind(self, index):
+        """
+        returns the kind code of the token #index
+        """
+        return self.kinds[index]
+
+    def position(self, index):
+        """
+        returns the 1 based (line, column) of the token #index, the end of the source
+        for an index past the last token
+        """
+        return self.locate(self.starts[index] if index < len(self.starts) else len(self.source))
+
+    def locate(self, offset):
+        """
+        returns the 1 based (line, column) of the source character #offset
+        """
+        if self.line_starts is None:
+            self.line_starts = array('q', [0])
+            find = self.source.find
+            newline = find(self.NEWLINE)
+            while newline >= 0:
+                self.line_starts.append(newline + 1)
+                newline = find(self.NEWLINE, newline + 1)
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+
+class MappedTokenTable(TokenTable):
+    """
+    TokenTable over the bytes of a memory mapped file (see Scanner.scan_mapped), the file is
+    never read into a string : a literal is only decoded from the mapping when asked for
+
+    Offsets and columns count bytes, which is the same as characters for a valid program
+
+    ### Attributes
+    - source : the mmap of the file, an empty bytes object for an empty file
+
+    ### Args
+    - source : see the attributes
+    """
+    NEWLINE = b"\n"
+
+    def literal(self, index):
+        """
+        returns the literal of the token #index
+        """
+        if self.type_codes[index] == ASSIGNMENT:
+            return ":="
+        start = self.starts[index]
+        return self.source[start:start + self.lengths[index]].decode("ascii")
+
+    def close(self):
+        """
+        releases the mapping, literals can not be read anymore
+        """
+        if self.source.__class__ is not bytes:
+            self.source.close()
@@ -0,0 +1,54 @@
+class TraceWriter(object):
+    """
+    Streams the parser trace to a text file instead of keeping it in memory,
+    the lines are buffered and flushed every <flush_every> lines
+
+    The file content is the same as the collected trace : one line per event
+    followed by an empty line
+
+    ### Attributes
+    - out_file : the opened output file
+    - buffer : the lines not yet written
+    - flush_every : the buffer size that triggers a write
+
+    ### Args
+    - out_file_dir : the trace output location
+    - flush_every : number of lines to buffer before writing
+    """
+    def __init__(self, out_file_dir, flush_every=4096):
+        """
+        constructor
+        """
+        self.out_file = open(out_file_dir, 'w')
+        self.buffer = []
+        self.flush_every = flush_every
+
+    def append(self, line):
+        """
+        adds one trace line
+        """
+        self.buffer.append(line)
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """
+        writes the buffered lines
+        """
+        if self.buffer:
+            self.out_file.write("\n".join(self.buffer) + "\n")
+            self.buffer = []
+
+    def close(self):
+        """
+        writes the remaining lines and the trailing empty line, then closes the file
+        """
+        self.flush()
+        self.out_file.write("\n")
+        self.out_file.close()
+
+
+def ignore(line):
+    """
+    emit() of a parser running without a trace
+    """
@@ -0,0 +1,179 @@
+"""
+Text exports of the syntax tree built by the parser, written straight to a file without
+PyGraphviz nor the dot binary
+
+- dot : the DOT text SyntaxTree would render, to be drawn later or elsewhere
+- json : nested objects, {"node": "Assign", "name": "x", "expr": {...}}, a statement
+sequence is a list and a missing else part is null
+- sexp : one S-expression per top level statement inside (program ...), e.g.
+(if (< x 0) (then (assign fact 1)) (else (write x))), (repeat (body ...) test), (read x)
+
+    export(parser.tree, "syntax_tree.json")
+"""
+import json
+import os
+
+from ast_ds import If, Assign, Read, Write, Op, Const, Id
+from syntaxtree_draw import SyntaxTree
+
+
+def json_parts(tree):
+    """
+    Yields the JSON text of a tree [a statement list or a single node] in chunks, a node is
+    {"node": <class name>, <slot>: <child>, ...}. Built with an explicit stack instead of
+    json.dump() so the depth of the tree is not limited by the recursion limit
+    """
+    stack = [tree]
+    while stack:
+        item = stack.pop()
+        cls = item.__class__
+        if cls is str:
+            yield item
+        elif cls is list:
+            if not item:
+                yield "[]"
+                continue
+            parts = ["["]
+            for i in item:
+                parts.append(i)
+                parts.append(", ")
+            parts[-1] = "]"
+            yield parts[0]
+            stack.extend(reversed(parts[1:]))
+        elif item is None:
+            yield "null"
+        elif cls is Const:
+            yield '{"node": "Const", "value": ' + json.dumps(item.value) + '}'
+        elif cls is Id:
+            yield '{"node": "Id", "name": ' + json.dumps(item.name) + '}'
+        else:
+            parts = []
+            for i in item.__slots__:
+                child = getattr(item, i)
+                parts.append(', "' + i + '": ')
+                # the names and the operators are plain strings, not chunks to write as is
+                parts.append(json.dumps(child) if child.__class__ is str else child)
+            parts.append("}")
+            yield '{"node": "' + cls.__name__ + '"'
+            stack.extend(reversed(parts))
+
+
+def to_json(tree):
+    """
+    Returns the JSON text of a tree, see json_parts()
+    """
+    return "".join(json_parts(tree))
+
+
+def sexp_parts(node):
+    """
+    Yields the S-expression of a statement or an expression node in chunks, with an explicit
+    stack so deep trees do not hit the recursion limit
+    """
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        cls = item.__class__
+        if cls is str:
+            yield item
+        elif cls is Const:
+            yield item.value
+        elif cls is Id:
+            yield item.name
+        elif cls is Op:
+            yield "(" + item.op + " "
+            stack.extend((")", item.right, " ", item.left))
+        elif cls is Assign:
+            yield "(assign " + item.name + " "
+            stack.extend((")", item.expr))
+        elif cls is Read:
+            yield "(read " + item.name + ")"
+        elif cls is Write:
+            yield "(write "
+            stack.extend((")", item.expr))
+        elif cls is If:
+            parts = ["(if ", item.test, " "] + seq_parts("then", item.then_part)
+            if item.else_part is not None:
+                parts += [" "] + seq_parts("else", item.else_part)
+            parts.append(")")
+            stack.extend(reversed(parts))
+        else:
+            parts = ["(repeat "] + seq_parts("body", item.body) + [" ", item.test, ")"]
+            stack.extend(reversed(parts))
+
+
+def seq_parts(head, stmts):
+    """
+    Returns the chunks and the nodes of a statement sequence, (<head> stmt ...)
+    """
+    parts = ["(" + head]
+    for i in stmts:
+        parts.append(" ")
+        parts.append(i)
+    parts.append(")")
+    return parts
+
+
+def to_sexp(node):
+    """
+    Returns the S-expression of a statement or an expression node
+    """
+    return "".join(sexp_parts(node))
+
+
+def write_dot(tree, out_file):
+    """
+    Writes the tree as DOT text to the opened text file out_file
+    """
+    graph = SyntaxTree(None)
+    graph.draw(tree)
+    graph.write_dot(out_file)
+
+
+def write_json(tree, out_file):
+    """
+    Writes the tree as JSON to the opened text file out_file, chunk by chunk
+    """
+    for i in json_parts(tree):
+        out_file.write(i)
+    out_file.write("\n")
+
+
+def write_sexp(tree, out_file):
+    """
+    Writes the tree as an S-expression to the opened text file out_file,
+    one top level statement per line
+    """
+    out_file.write("(program\n")
+    for stmt in tree:
+        out_file.write(" ")
+        for i in sexp_parts(stmt):
+            out_file.write(i)
+        out_file.write("\n")
+    out_file.write(")\n")
+
+
+FORMATS = {"dot": write_dot, "json": write_json, "sexp": write_sexp}
+
+
+def export(tree, out_file_dir, tree_format=None):
+    """
+    Writes the tree to out_file_dir
+
+    ### Arguments
+    - tree : the list of the top level statement nodes
+    - out_file_dir : the output location
+    - tree_format : one of FORMATS, taken from the out_file_dir extension by default
+
+    ### Raises
+    ValueError : for an unknown format
+    """
+    if tree_format is None:
+        tree_format = os.path.splitext(out_file_dir)[1][1:].lower()
+    if tree_format not in FORMATS:
+        raise ValueError('Unknown tree format "' + tree_format + '"')
+    out_file = open(out_file_dir, 'w')
+    try:
+        FORMATS[tree_format](tree, out_file)
+    finally:
+        out_file.close()